@@ -0,0 +1 @@
+# guandan-backend/benchmarks/__init__.py
@@ -0,0 +1,86 @@
+# guandan-backend/benchmarks/bench_rooms.py
+
+"""Room lookups by username and by socket id: indexes vs scanning every room.
+
+Run from guandan-backend/:
+
+    python -m benchmarks.bench_rooms
+    python -m benchmarks.bench_rooms --rooms 50000 --json rooms.json
+
+Fills rooms.rooms with N four-player lobbies (each player with a registered
+sid) through the same helpers the server uses, then times the duplicate
+username check and the disconnect lookup both ways.  The scan versions are
+what app.py did before the indexes.
+"""
+
+import argparse
+import random
+import sys
+
+from game import rooms
+from game.models import Room, Settings
+from game.rooms import check_indexes, find_user, register_sid, seat_user
+
+from .harness import Case, main as run_suite
+
+ROOMS = 50000
+LOOKUPS = 200
+
+
+def populate(count):
+    for table in (rooms.rooms, rooms.user_index, rooms.sid_index):
+        table.clear()
+    for i in range(count):
+        room_id = f"room-{i}"
+        players = [f"u{i}-{seat}" for seat in range(4)]
+        rooms.rooms[room_id] = Room(settings=Settings(), players=players, slots=list(players),
+                                    ready={p: False for p in players}, hands={}, connected_sids=[])
+        for seat, username in enumerate(players):
+            seat_user(room_id, username, seat)
+            register_sid(room_id, username, f"sid-{username}")
+
+
+def scan_user(username):
+    for room_id, room in rooms.rooms.items():
+        if username in room.get("players", []):
+            return room_id
+    return None
+
+
+def scan_sid(sid):
+    for room_id, room in rooms.rooms.items():
+        if sid in room.get("connected_sids", []):
+            return room_id
+    return None
+
+
+def index_sid(sid):
+    return rooms.sid_index.get(sid)
+
+
+def cases(count=ROOMS, seed=0):
+    populate(count)
+    problems = check_indexes()
+    if problems:
+        raise RuntimeError(f"indexes inconsistent after populate: {problems[:3]}")
+    rng = random.Random(seed)
+    users = [(f"u{rng.randrange(count)}-{rng.randrange(4)}",) for _ in range(LOOKUPS)]
+    sids = [(f"sid-{u}",) for (u,) in users]
+    # The scans take milliseconds each at 50k rooms, so they get a shorter list
+    return [
+        Case(f"find_user/index/{count}", find_user, users),
+        Case(f"find_user/scan/{count}", scan_user, users[:10]),
+        Case(f"find_sid/index/{count}", index_sid, sids),
+        Case(f"find_sid/scan/{count}", scan_sid, sids[:10]),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--rooms', type=int, default=ROOMS)
+    args, rest = parser.parse_known_args(argv)
+    return run_suite("rooms", lambda: cases(args.rooms), rest)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
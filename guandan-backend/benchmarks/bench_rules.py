@@ -0,0 +1,139 @@
+# guandan-backend/benchmarks/bench_rules.py
+
+"""Benchmarks for the rules engine in game/hands.py.
+
+Run from guandan-backend/:
+
+    python -m benchmarks.bench_rules --json bench.json
+    python -m benchmarks.bench_rules --baseline bench.json --threshold 0.15
+
+The corpus is built from a fixed seed: random 27-card hands are dealt for
+several level ranks and every legal play they contain is bucketed by hand type
+and by whether it uses the round's wild, so each case times one kind of hand.
+"""
+
+import random
+import sys
+from collections import defaultdict
+
+from game.batch import batch_counts, classify_batch
+from game.bulk import deal_batch, np
+from game.cards import wild_card
+from game.deck import create_deck, deal_cards
+from game.hands import beats, find_wilds, hand_type
+from game.moves import enumerate_plays
+
+from .harness import Case, main
+
+SEED = 2024
+LEVELS = ("2", "7", "A")
+TRUMP = "hearts"
+DEALS = 24
+PER_CASE = 200
+HAND_TYPES = ("single", "pair", "triple", "full_house", "straight", "tube", "plate",
+              "bomb", "straight_flush", "joker_bomb")
+
+
+def build_corpus(seed=SEED, deals=DEALS):
+    """{(hand_type, uses_wild): [(cards, level), ...]} plus a list of dealt hands."""
+    rng = random.Random(seed)
+    plays = defaultdict(list)
+    hands = []
+    deck = create_deck()
+    for i in range(deals):
+        level = LEVELS[i % len(LEVELS)]
+        rng.shuffle(deck)
+        wild = wild_card(level, TRUMP, True)
+        for hand in deal_cards(deck, 4):
+            hands.append((hand, level))
+            for play in enumerate_plays(hand, None, level, TRUMP, True):
+                plays[(play.type, wild in play.cards)].append((play.cards, level))
+    if not plays[('joker_bomb', False)]:  # needs all four jokers in one hand
+        plays[('joker_bomb', False)] = [(["JoB", "JoR", "JoB", "JoR"], level) for level in LEVELS]
+    for bucket in plays.values():
+        rng.shuffle(bucket)
+    return plays, hands
+
+
+def _invalid_hands(rng, count):
+    deck = create_deck()
+    found = []
+    while len(found) < count:
+        level = rng.choice(LEVELS)
+        cards = rng.sample(deck, rng.randint(2, 6))
+        if hand_type(cards, level, TRUMP, True) is None:
+            found.append((cards, level))
+    return found
+
+
+def cases():
+    rng = random.Random(SEED)
+    plays, hands = build_corpus()
+    out = []
+
+    for kind in HAND_TYPES:
+        for uses_wild in (False, True):
+            sample = plays.get((kind, uses_wild), [])[:PER_CASE]
+            if sample:
+                label = "wild" if uses_wild else "plain"
+                out.append(Case(f"hand_type/{kind}/{label}", hand_type,
+                                [(cards, level, TRUMP, True) for cards, level in sample]))
+    out.append(Case("hand_type/invalid", hand_type,
+                    [(cards, level, TRUMP, True) for cards, level in _invalid_hands(rng, PER_CASE)]))
+    for level in LEVELS:
+        mixed = [(cards, lv, TRUMP, True) for bucket in plays.values()
+                 for cards, lv in bucket[:20] if lv == level]
+        out.append(Case(f"hand_type/level-{level}", hand_type, mixed))
+    no_wild = [(cards, level, TRUMP, False) for bucket in plays.values() for cards, level in bucket[:20]]
+    out.append(Case("hand_type/wilds-off", hand_type, no_wild))
+
+    # beats: same-type pairs, bombs over non-bombs, and mismatched types
+    for kind in HAND_TYPES:
+        pool = plays.get((kind, False), []) + plays.get((kind, True), [])
+        if not pool:
+            continue
+        pairs = []
+        for _ in range(PER_CASE):
+            (a, level), (b, _) = rng.choice(pool), rng.choice(pool)
+            pairs.append(({'cards': a}, {'cards': b}, level, TRUMP, True))
+        out.append(Case(f"beats/{kind}", beats, pairs))
+    everything = [p for bucket in plays.values() for p in bucket]
+    mixed_pairs = []
+    for _ in range(PER_CASE):
+        (a, level), (b, _) = rng.choice(everything), rng.choice(everything)
+        mixed_pairs.append(({'cards': a}, {'cards': b}, level, TRUMP, True))
+    out.append(Case("beats/mixed", beats, mixed_pairs))
+    out.append(Case("beats/leading", beats, [(None, {'cards': a}, level, TRUMP, True) for a, level in everything[:PER_CASE]]))
+
+    # enumerate_plays on dealt hands, split by how many wilds the hand holds:
+    # every wild multiplies the signatures to try, so these cost the most
+    by_wilds = defaultdict(list)
+    for hand, level in hands:
+        by_wilds[len(find_wilds(hand, level, TRUMP, True))].append((hand, level))
+    for count in sorted(by_wilds):
+        sample = by_wilds[count]
+        out.append(Case(f"enumerate_plays/leading/{count}-wilds", enumerate_plays,
+                        [(hand, None, level, TRUMP, True) for hand, level in sample]))
+        following = [(hand, {'cards': rng.choice(plays[('pair', False)])[0]}, level, TRUMP, True)
+                     for hand, level in sample]
+        out.append(Case(f"enumerate_plays/following-pair/{count}-wilds", enumerate_plays, following))
+
+    out.append(Case("find_wilds/27-cards", find_wilds, [(hand, level, TRUMP, True) for hand, level in hands]))
+    out.append(Case("find_wilds/wilds-off", find_wilds, [(hand, level, TRUMP, False) for hand, level in hands]))
+
+    decks = []
+    for _ in range(20):
+        deck = create_deck()
+        rng.shuffle(deck)
+        decks.append((deck, 4))
+    out.append(Case("deal_cards/108x4", deal_cards, decks))
+    if np is not None:
+        out.append(Case("deal_batch/10000", deal_batch, [(10000, seed) for seed in range(3)]))
+        batch = [cards for cards, _ in everything][:10000]
+        arrays = batch_counts(batch, "7", TRUMP, True)
+        out.append(Case(f"classify_batch/{len(batch)}", classify_batch, [arrays + ("7",)]))
+    return out
+
+
+if __name__ == '__main__':
+    sys.exit(main("rules", cases))
@@ -0,0 +1,157 @@
+# guandan-backend/benchmarks/bench_scaling.py
+
+"""Rooms/sec and events/sec with 1..N worker processes, per room store.
+
+Run from guandan-backend/:
+
+    python -m benchmarks.bench_scaling
+    python -m benchmarks.bench_scaling --workers 4 --rooms 30 --json scaling.json
+
+Each worker process plays --rooms complete rounds, each in a fresh
+four-player room with random legal moves, and runs every command the way
+app.py does: inside store.session(room_id), on a GameState.  With the memory
+store each worker keeps its rooms to itself (one process per room, no
+sharing).  With the redis store every command locks, loads and writes back
+its room through the stand-in RespServer (benchmarks/resp.py), started in this
+process, so any worker could have served it.
+
+Throughput is total rounds and events over the wall time from the first
+worker starting to the last one finishing.  Worker counts beyond the number
+of cores only add contention, so on a single-core machine expect flat or
+falling numbers; the useful comparison there is memory vs redis per worker.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game import rooms
+from game.deck import create_deck
+from game.engine import GameState, new_room
+from game.store import MemoryStore, RedisStore
+
+from .resp import RespClient, RespServer
+
+PLAYERS = ["p1", "p2", "p3", "p4"]
+ROOMS = 20
+MAX_STEPS = 5000
+STORES = ("memory", "redis")
+
+
+def command(store, room_id, fn):
+    with store.session(room_id) as room:
+        return fn(GameState(room_id, room))
+
+
+def move(state, rng, update):
+    """One random legal move (or None once the round is over)."""
+    game = state.game
+    if game is None:
+        return None
+    if update and update.get('can_end_round'):
+        return state.end_trick(update['current_player'])
+    player = game['players'][game['turn_index']]
+    options = game['context'].enumerate_plays(state.hands[player].to_list(), game['classified_play'])
+    if options and (game['current_play'] is None or rng.random() < 0.7):
+        return state.play(player, rng.choice(options).cards)
+    return state.pass_(player)
+
+
+def play_room(store, room_id, rng):
+    """Play one round in a new room; returns (events, commands)."""
+    store.save(room_id, new_room(PLAYERS))
+    deck = create_deck()
+    rng.shuffle(deck)
+    events = len(command(store, room_id, lambda s: s.start_round(deck)))
+    commands = 1
+    update = None
+    for _ in range(MAX_STEPS):
+        out = command(store, room_id, lambda s: move(s, rng, update))
+        if out is None:
+            break
+        commands += 1
+        events += len(out)
+        for event in out:
+            if event.name == 'error_msg':
+                raise RuntimeError(f"engine rejected a move: {event.data}")
+            if event.name == 'game_update':
+                update = event.data
+    else:
+        raise RuntimeError("round did not finish")
+    store.delete(room_id)
+    rooms.rooms.pop(room_id, None)
+    return events, commands
+
+
+def run_worker(job):
+    """Play `count` rooms on one store; returns (start, end, rooms, events, commands)."""
+    kind, url, worker_id, count, seed = job
+    store = MemoryStore() if kind == "memory" else RedisStore(RespClient.from_url(url))
+    rng = random.Random(seed * 1_000_003 + worker_id)
+    events = commands = 0
+    start = time.monotonic()
+    for i in range(count):
+        e, c = play_room(store, f"w{worker_id}-{i}", rng)
+        events += e
+        commands += c
+    return start, time.monotonic(), count, events, commands
+
+
+def measure(kind, workers, count, url=None, seed=0):
+    jobs = [(kind, url, w, count, seed) for w in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(run_worker, jobs))
+    wall = max(p[1] for p in parts) - min(p[0] for p in parts)
+    total_rooms, events, commands = (sum(p[i] for p in parts) for i in (2, 3, 4))
+    return {
+        'workers': workers,
+        'rooms': total_rooms,
+        'seconds': wall,
+        'rooms_per_sec': total_rooms / wall,
+        'events_per_sec': events / wall,
+        'commands_per_sec': commands / wall,
+    }
+
+
+def report(max_workers, count, stores=STORES, seed=0):
+    """{store: [result per worker count]}."""
+    results = {}
+    server = RespServer().start() if "redis" in stores else None
+    try:
+        for kind in stores:
+            results[kind] = [measure(kind, w, count, server.url if server else None, seed)
+                             for w in range(1, max_workers + 1)]
+    finally:
+        if server:
+            server.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker scaling per room store.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="largest worker count")
+    parser.add_argument('--rooms', type=int, default=ROOMS, help="rounds played per worker")
+    parser.add_argument('--store', nargs='+', choices=STORES, default=list(STORES))
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = report(max(1, args.workers), args.rooms, args.store)
+    print(f"{os.cpu_count()} CPU(s), {args.rooms} rooms per worker")
+    for kind, rows in results.items():
+        base = rows[0]['rooms_per_sec']
+        for row in rows:
+            print(f"{kind:<7} workers {row['workers']:>2}   {row['rooms_per_sec']:8.1f} rooms/s   "
+                  f"{row['events_per_sec']:9,.0f} events/s   {row['commands_per_sec']:9,.0f} commands/s   "
+                  f"x{row['rooms_per_sec'] / base:.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cpus': os.cpu_count(), 'rooms_per_worker': args.rooms, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
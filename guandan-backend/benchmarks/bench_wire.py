@@ -0,0 +1,99 @@
+# guandan-backend/benchmarks/bench_wire.py
+
+"""JSON vs binary (game/wire.py) encoding of typical game_update payloads.
+
+Run from guandan-backend/:
+
+    python -m benchmarks.bench_wire
+    python -m benchmarks.bench_wire --json wire.json
+
+Payloads come from seeded hands played with random legal moves: the full
+broadcast game_update, the privateHands copy one player gets, and the
+game_delta a deltaUpdates room sends instead.  Payload sizes are printed
+before the timings.
+"""
+
+import json
+import random
+import sys
+
+from game.deck import create_deck
+from game.engine import GameState, private_events
+from game.updates import delta_events
+from game.wire import pack, unpack
+
+from .harness import Case, main as run_suite
+
+SEED = 7
+HANDS = 4
+PLAYERS = ["ann", "bob", "cat", "dan"]
+KINDS = ("full", "private", "delta")
+
+
+def sample_updates(seed=SEED, hands=HANDS, max_moves=60):
+    """{kind: [payload, ...]} of game_update payloads seen while playing."""
+    rng = random.Random(seed)
+    samples = {kind: [] for kind in KINDS}
+    for _ in range(hands):
+        state = GameState.new(PLAYERS, {"wildCards": False, "privateHands": True, "deltaUpdates": True})
+        deck = create_deck()
+        rng.shuffle(deck)
+        state.start_round(deck)
+        for _ in range(max_moves):
+            game = state.game
+            if game is None:
+                break
+            player = state.current_player()
+            options = game['context'].enumerate_plays(state.hands[player].to_list(), game['classified_play'])
+            if options and (game['current_play'] is None or rng.random() < 0.6):
+                events = state.play(player, rng.choice(options).cards)
+            else:
+                events = state.pass_(player)
+            full = [e for e in events if e.name == 'game_update']
+            if not full:
+                break
+            samples['full'].append(full[-1].data)
+            private = private_events(state.room, full[-1:])
+            samples['private'].append(private[0].data)
+            sent = delta_events(state.room, private)
+            samples['delta'].extend(e.data for e in sent if e.name == 'game_delta' and e.to == private[0].to)
+            if full[-1].data.get('can_end_round'):
+                break
+    return samples
+
+
+def sizes(samples):
+    """{kind: (mean JSON bytes, mean binary bytes)}."""
+    out = {}
+    for kind, payloads in samples.items():
+        if payloads:
+            js = sum(len(json.dumps(p).encode()) for p in payloads) / len(payloads)
+            mp = sum(len(pack(p)) for p in payloads) / len(payloads)
+            out[kind] = (js, mp)
+    return out
+
+
+def cases():
+    samples = sample_updates()
+    out = []
+    for kind, payloads in samples.items():
+        if not payloads:
+            continue
+        out.append(Case(f"game_update/{kind}/json-encode", json.dumps, [(p,) for p in payloads]))
+        out.append(Case(f"game_update/{kind}/binary-encode", pack, [(p,) for p in payloads]))
+        out.append(Case(f"game_update/{kind}/json-decode", json.loads, [(json.dumps(p),) for p in payloads]))
+        out.append(Case(f"game_update/{kind}/binary-decode", unpack, [(pack(p),) for p in payloads]))
+    return out
+
+
+def print_sizes():
+    for kind, (js, mp) in sizes(sample_updates()).items():
+        print(f"{kind:<8} json {js:7.0f} B   binary {mp:7.0f} B   ({js / mp:.1f}x smaller)")
+
+
+def main(argv=None):
+    return run_suite("wire", cases, argv, preamble=print_sizes)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
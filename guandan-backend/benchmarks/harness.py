@@ -0,0 +1,161 @@
+# guandan-backend/benchmarks/harness.py
+
+"""Tiny timing harness shared by the benchmark scripts.
+
+A case is a name, a function and a list of argument tuples.  Every call is
+timed on its own and the percentiles are taken over those call times, so a
+slow input shows up in p99 instead of being averaged into its pass.  Each
+time includes one clock read, reported as clock_us for sub-microsecond
+cases.  Results are plain dicts so they can be written to and compared
+against a JSON baseline.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+
+DEFAULT_MIN_TIME = 0.2    # seconds spent on each case
+DEFAULT_THRESHOLD = 0.20  # flag cases more than 20% slower than baseline
+PERCENTILES = (50, 90, 99)
+
+
+class Case:
+    __slots__ = ('name', 'fn', 'inputs')
+
+    def __init__(self, name, fn, inputs):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    i = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+def clock_overhead(rounds=1000):
+    """Smallest time between two back-to-back perf_counter_ns() reads, in ns."""
+    clock = time.perf_counter_ns
+    best = None
+    for _ in range(rounds):
+        start = clock()
+        elapsed = clock() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def measure(case, min_time=DEFAULT_MIN_TIME, min_passes=5):
+    """Time every call of case.fn over case.inputs; returns a result dict (latencies in microseconds)."""
+    fn = case.fn
+    inputs = case.inputs
+    clock = time.perf_counter_ns
+    for args in inputs[:50]:  # warm caches and branch paths
+        fn(*args)
+    samples = []
+    passes = 0
+    deadline = clock() + min_time * 1e9
+    while passes < min_passes or clock() < deadline:
+        for args in inputs:
+            start = clock()
+            fn(*args)
+            samples.append(clock() - start)
+        passes += 1
+    samples.sort()
+    calls = len(samples)
+    total = sum(samples)
+    result = {
+        'calls': calls,
+        'ops_per_sec': calls / (total / 1e9) if total else 0.0,
+        'mean_us': total / calls / 1e3,
+        'clock_us': clock_overhead() / 1e3,
+    }
+    for pct in PERCENTILES:
+        result[f'p{pct}_us'] = percentile(samples, pct) / 1e3
+    return result
+
+
+def run_cases(cases, min_time=DEFAULT_MIN_TIME, name_filter=None, out=None):
+    results = {}
+    for case in cases:
+        if name_filter and name_filter not in case.name:
+            continue
+        results[case.name] = measure(case, min_time)
+        if out is not None:
+            r = results[case.name]
+            out.write(f"{case.name:<40} {r['ops_per_sec']:>12,.0f} ops/s  "
+                      f"p50 {r['p50_us']:>9.2f}us  p99 {r['p99_us']:>9.2f}us\n")
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
+
+
+def save_results(path, suite, results):
+    with open(path, 'w') as f:
+        json.dump({'suite': suite, 'environment': environment(), 'created': time.time(),
+                   'results': results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return [(name, baseline_ops, current_ops, change)] for cases slower than threshold.
+
+    change is the relative ops/sec change (-0.25 means 25% slower).  Cases
+    missing from either side are ignored.
+    """
+    regressions = []
+    for name, current in results.items():
+        old = baseline.get(name)
+        if not old or not old.get('ops_per_sec'):
+            continue
+        change = current['ops_per_sec'] / old['ops_per_sec'] - 1
+        if change < -threshold:
+            regressions.append((name, old['ops_per_sec'], current['ops_per_sec'], change))
+    return regressions
+
+
+def main(suite, cases, argv=None, preamble=None):
+    """Command-line entry point used by the bench_*.py scripts.  Returns an exit code.
+
+    preamble, if given, is called once the arguments are parsed, before any case runs.
+    """
+    parser = argparse.ArgumentParser(description=f"Run the {suite} benchmarks.")
+    parser.add_argument('--json', metavar='PATH', help="write results to PATH")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against results saved with --json")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default %(default)s)")
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                        help="seconds per case (default %(default)s)")
+    parser.add_argument('--filter', help="only run cases whose name contains this")
+    args = parser.parse_args(argv)
+    if preamble is not None:
+        preamble()
+
+    results = run_cases(cases(), args.min_time, args.filter, out=sys.stdout)
+    if args.json:
+        save_results(args.json, suite, results)
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:,.0f} -> {new:,.0f} ops/s ({change:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
@@ -0,0 +1,111 @@
+# guandan-backend/benchmarks/mem_rooms.py
+
+"""Bytes per room: typed records (game/models.py) vs the baseline's nested dicts.
+
+Run from guandan-backend/:
+
+    python -m benchmarks.mem_rooms
+    python -m benchmarks.mem_rooms --rooms 10000 --json mem.json
+
+Builds N idle lobbies (four seated players with sids, no game) and N rooms
+with a dealt game, once as Room records and once rebuilt the way the
+baseline server kept them (baseline_room(): nested dicts with only the
+baseline's fields, hands as plain card lists, no rule objects on the game),
+and reports tracemalloc bytes per room.  Card strings are shared by both.
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from game.deck import create_deck
+from game.engine import GameState, new_room
+
+ROOMS = 10000
+LAYOUTS = ("baseline", "models")
+
+# What the baseline app.py and rooms.py stored per room and per game
+BASELINE_ROOM = ('settings', 'players', 'slots', 'ready', 'hands', 'levels', 'teams', 'sids',
+                 'connected_sids', 'dealt_players', 'game', 'tribute_state', 'round_number',
+                 'finish_order', 'last_finish_order', 'winning_team', 'win_type', 'level_up', 'ace_attempts')
+BASELINE_SETTINGS = ('cardBack', 'wildCards', 'trumpSuit', 'startingLevels')
+BASELINE_GAME = ('players', 'turn_index', 'current_play', 'round_active', 'passes', 'current_winner',
+                 'finish_order', 'trumpSuit', 'levelRank', 'wildCards', 'startingLevels', 'round_number')
+
+
+def idle_room(i):
+    players = [f"p{i}-{seat}" for seat in range(4)]
+    room = new_room(players)
+    room['sids'] = {p: f"sid-{p}" for p in players}
+    room['connected_sids'] = list(room['sids'].values())
+    room['levels'] = {p: "2" for p in players}
+    room['teams'] = [players[0::2], players[1::2]]
+    return room
+
+
+def active_room(i, rng):
+    room = idle_room(i)
+    deck = create_deck()
+    rng.shuffle(deck)
+    GameState(f"room-{i}", room).start_round(deck)
+    return room
+
+
+def baseline_room(room):
+    """room in the baseline's layout."""
+    out = {k: v for k, v in room.to_dict().items() if k in BASELINE_ROOM}
+    out['settings'] = {k: v for k, v in out['settings'].items() if k in BASELINE_SETTINGS}
+    out['hands'] = {p: list(hand) for p, hand in room['hands'].items()}
+    if 'game' in out:
+        out['game'] = {k: v for k, v in out['game'].items() if k in BASELINE_GAME}
+    return out
+
+
+def measure(build, count):
+    """tracemalloc bytes per object kept alive from build(i)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(i) for i in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def report(count=ROOMS, seed=0):
+    """{kind: {layout: bytes per room}} for idle and active rooms."""
+    results = {}
+    for kind in ("idle", "active"):
+        results[kind] = {}
+        for layout in LAYOUTS:
+            rng = random.Random(seed)
+            make = idle_room if kind == "idle" else (lambda i: active_room(i, rng))
+            build = make if layout == "models" else (lambda i: baseline_room(make(i)))
+            results[kind][layout] = measure(build, count)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory per room: records vs the baseline's nested dicts.")
+    parser.add_argument('--rooms', type=int, default=ROOMS)
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = report(args.rooms)
+    for kind, layouts in results.items():
+        before, after = layouts['baseline'], layouts['models']
+        print(f"{kind:<7} baseline {before:8,.0f} B/room   models {after:8,.0f} B/room   "
+              f"({after / before - 1:+.0%}, {(after - before) * args.rooms / 2**20:+.1f} MiB at {args.rooms:,} rooms)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rooms': args.rooms, 'bytes_per_room': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# guandan-backend/benchmarks/oracle.py
+
+"""Exhaustive differential check of a hand classifier against hand_type.
+
+Every rank multiset of 1-10 cards (jokers included, at most 8 copies of a
+rank and 2 of each joker) is tried with 0-2 wilds, as a one-suit (flush) and a
+multi-suit hand where the cards allow it, at every level rank.  The reference
+and the candidate classify the same card ids and every disagreement is
+reported.  Work is split per (level, wilds, size) across a process pool.
+
+    python -m benchmarks.oracle                         # classify_ids vs hand_type_ids
+    python -m benchmarks.oracle --max-cards 6 --workers 8
+    python -m benchmarks.oracle --candidate game.classify:classify --input cards
+"""
+
+import argparse
+import importlib
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game.cards import FACE_BY_RANK_SUIT, JOKER_B, JOKER_R, NUM_FACES, NUM_RANKS, RANK_NAMES, SUIT_INDEX, decode_cards
+
+TRUMP = "hearts"
+LEVELS = tuple(RANK_NAMES[:NUM_RANKS])
+MAX_CARDS = 10
+MAX_WILDS = 2
+REFERENCE = "game.hands:hand_type_ids"
+CANDIDATE = "game.classify:classify_ids"
+REPORT_LIMIT = 20
+
+_TRUMP = SUIT_INDEX[TRUMP]
+# Suits used for natural cards: trump last, so a level-rank card is never the wild.
+_PLAIN_SUITS = [s for s in range(4) if s != _TRUMP]
+_FLUSH_SUIT = _PLAIN_SUITS[0]
+_JOKER_FACE = {JOKER_B: FACE_BY_RANK_SUIT[(JOKER_B, -1)], JOKER_R: FACE_BY_RANK_SUIT[(JOKER_R, -1)]}
+
+
+def load(spec):
+    """'module:function' -> callable."""
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def rank_multisets(size, caps, start=0):
+    """Yield count vectors (lists over caps' slots) summing to size."""
+    if size == 0:
+        yield [0] * len(caps)
+        return
+    for slot in range(start, len(caps)):
+        for n in range(min(caps[slot], size), 0, -1):
+            for rest in rank_multisets(size - n, caps, slot + 1):
+                rest[slot] = n
+                yield rest
+
+
+def _copy(face, taken):
+    """Id of the next unused physical copy of face."""
+    n = taken.get(face, 0)
+    taken[face] = n + 1
+    return face + n * NUM_FACES
+
+
+def hand_ids(counts, wilds, wild, flush):
+    """Card ids for a count vector, or None if the variant cannot be dealt."""
+    ids = []
+    taken = {}
+    rotation = 0
+    for r, c in enumerate(counts):
+        if not c:
+            continue
+        if r >= NUM_RANKS:
+            ids.extend(_copy(_JOKER_FACE[r], taken) for _ in range(c))
+            continue
+        if flush:
+            if c > 2:
+                return None
+            suits = [_FLUSH_SUIT] * c
+        elif c <= 6:
+            # Keep rotating across ranks so any two natural cards differ in suit
+            suits = [_PLAIN_SUITS[(rotation + i) % 3] for i in range(c)]
+            rotation += c
+        else:
+            suits = (_PLAIN_SUITS * 2 + [_TRUMP] * 2)[:c]
+        ids.extend(_copy(FACE_BY_RANK_SUIT[(r, s)], taken) for s in suits)
+    ids.extend(_copy(wild, taken) for _ in range(wilds))
+    return ids
+
+
+def run_unit(unit):
+    """Check every hand for one (level, wilds, size); returns a summary dict."""
+    level, wilds, size, reference, candidate, use_cards = unit
+    ref_fn, cand_fn = load(reference), load(candidate)
+    level_index = RANK_NAMES.index(level)
+    wild = FACE_BY_RANK_SUIT[(level_index, _TRUMP)]
+    caps = [8] * NUM_RANKS + [2, 2]
+    caps[level_index] = 6  # the trump-suit copies of the level rank are the wilds
+
+    hands = []
+    for counts in rank_multisets(size - wilds, caps):
+        naturals = sum(counts[:NUM_RANKS])
+        for flush in (False, True):
+            if flush and not naturals:
+                continue  # jokers and wilds only: no suit at all
+            if not flush and naturals == 1:
+                continue  # a lone natural card is always a flush
+            ids = hand_ids(counts, wilds, wild, flush)
+            if ids is not None:
+                hands.append(decode_cards(ids) if use_cards else ids)
+
+    start = time.perf_counter()
+    expected = [ref_fn(h, level, TRUMP, True) for h in hands]
+    ref_time = time.perf_counter() - start
+    start = time.perf_counter()
+    got = [cand_fn(h, level, TRUMP, True) for h in hands]
+    cand_time = time.perf_counter() - start
+
+    mismatches = []
+    count = 0
+    for h, want, have in zip(hands, expected, got):
+        if want != have:
+            count += 1
+            if len(mismatches) < REPORT_LIMIT:
+                cards = h if use_cards else decode_cards(h)
+                mismatches.append({'cards': cards, 'level': level, 'reference': want, 'candidate': have})
+    return {'hands': len(hands), 'mismatches': count, 'examples': mismatches,
+            'reference_time': ref_time, 'candidate_time': cand_time}
+
+
+def units(levels, max_cards, reference, candidate, use_cards):
+    # Largest first so the pool does not end on one long straggler
+    return [(level, wilds, size, reference, candidate, use_cards)
+            for size in range(max_cards, 0, -1)
+            for wilds in range(min(MAX_WILDS, size) + 1)
+            for level in levels]
+
+
+def run(levels=LEVELS, max_cards=MAX_CARDS, reference=REFERENCE, candidate=CANDIDATE,
+        use_cards=False, workers=None, progress=None):
+    """Run the whole space; returns the merged summary."""
+    total = {'hands': 0, 'mismatches': 0, 'examples': [], 'reference_time': 0.0, 'candidate_time': 0.0}
+    todo = units(levels, max_cards, reference, candidate, use_cards)
+    start = time.perf_counter()
+    if workers == 1:
+        results = map(run_unit, todo)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(run_unit, todo, chunksize=4)
+    try:
+        for done, result in enumerate(results, 1):
+            for field in ('hands', 'mismatches', 'reference_time', 'candidate_time'):
+                total[field] += result[field]
+            total['examples'].extend(result['examples'][:REPORT_LIMIT - len(total['examples'])])
+            if progress:
+                progress(done, len(todo), total)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    total['wall_time'] = time.perf_counter() - start
+    return total
+
+
+def report(total, reference, candidate, out=sys.stdout):
+    out.write(f"checked {total['hands']:,} hands in {total['wall_time']:.1f}s\n")
+    for label, name, key in (("reference", reference, 'reference_time'), ("candidate", candidate, 'candidate_time')):
+        rate = total['hands'] / total[key] if total[key] else 0.0
+        out.write(f"  {label:<9} {name:<32} {rate:>12,.0f} hands/s\n")
+    if not total['mismatches']:
+        out.write("no mismatches\n")
+        return
+    out.write(f"{total['mismatches']:,} MISMATCHES (first {len(total['examples'])}):\n")
+    for m in total['examples']:
+        out.write(f"  level {m['level']:>2} {' '.join(m['cards']):<40} "
+                  f"reference={m['reference']} candidate={m['candidate']}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Differential check of a classifier against hand_type.")
+    parser.add_argument('--reference', help=f"module:function (default {REFERENCE}, or hand_type with --input cards)")
+    parser.add_argument('--candidate', default=CANDIDATE, help="module:function (default %(default)s)")
+    parser.add_argument('--input', choices=('ids', 'cards'), default='ids',
+                        help="pass card ids or card strings to both classifiers")
+    parser.add_argument('--max-cards', type=int, default=MAX_CARDS)
+    parser.add_argument('--levels', nargs='+', default=list(LEVELS), choices=LEVELS)
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    args = parser.parse_args(argv)
+    if args.reference is None:
+        args.reference = "game.hands:hand_type" if args.input == 'cards' else REFERENCE
+
+    def progress(done, total_units, total):
+        sys.stderr.write(f"\r{done}/{total_units} units, {total['hands']:,} hands, "
+                         f"{total['mismatches']:,} mismatches")
+        if done == total_units:
+            sys.stderr.write("\n")
+
+    total = run(tuple(args.levels), args.max_cards, args.reference, args.candidate,
+                args.input == 'cards', args.workers, progress)
+    report(total, args.reference, args.candidate)
+    return 1 if total['mismatches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
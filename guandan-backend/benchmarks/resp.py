@@ -0,0 +1,357 @@
+# guandan-backend/benchmarks/resp.py
+
+"""Stand-in Redis for the store tests and bench_scaling.py: a minimal RESP2
+client and an in-process server, so RedisStore (game/store.py) can run over
+the Redis protocol without redis-py or a Redis install.  The server itself
+stays out of the game package; production uses redis-py and a real Redis.
+
+RespClient covers the handful of commands RedisStore needs, with redis-py's
+method names and return types (get returns bytes or None, set returns True
+or None).  It holds one connection and serializes calls on it with a lock.
+
+RespServer answers the same commands from a dict in a background thread:
+
+    python -m benchmarks.resp --port 6380
+
+Supported: PING, GET, SET (NX, XX, PX, EX), DEL, EXISTS, KEYS, SCAN
+(MATCH, COUNT), DBSIZE, FLUSHALL, and EVAL of the store's own Lua scripts
+(run as their Python equivalents; any other script is an error).  Keys with
+a TTL expire lazily.
+"""
+
+import argparse
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import urlparse
+
+from game.store import COMMIT_SCRIPT, RELEASE_SCRIPT
+
+
+class RespError(Exception):
+    """Error reply from the server (-ERR ...)."""
+
+
+def encode_command(args):
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = b"%d" % arg
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+def read_reply(stream):
+    """One RESP reply from a binary file object; error replies come back as RespError values."""
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        return RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        data = stream.read(size + 2)
+        if len(data) != size + 2:
+            raise ConnectionError("connection closed")
+        return data[:-2]
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [read_reply(stream) for _ in range(size)]
+    raise ConnectionError(f"bad reply type {kind!r}")
+
+
+class RespClient:
+    """Blocking single-connection client with redis-py style methods."""
+
+    def __init__(self, host="localhost", port=6379, db=0, timeout=5.0):
+        self.address = (host, port)
+        self.db = db
+        self.timeout = timeout
+        self._sock = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, db, **kwargs)
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._sock.makefile("rb")
+        if self.db:
+            self._call(("SELECT", self.db))
+
+    def _call(self, args):
+        self._sock.sendall(encode_command(args))
+        reply = read_reply(self._stream)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def execute(self, *args):
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._call(args)
+            except (OSError, ConnectionError):
+                self._close()
+                raise
+
+    def _close(self):
+        if self._sock is not None:
+            self._stream.close()
+            self._sock.close()
+        self._sock = self._stream = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def ping(self):
+        return self.execute("PING") == "PONG"
+
+    def get(self, key):
+        return self.execute("GET", key)
+
+    def set(self, key, value, ex=None, px=None, nx=False, xx=False):
+        args = ["SET", key, value]
+        if ex is not None:
+            args += ["EX", ex]
+        if px is not None:
+            args += ["PX", px]
+        if nx:
+            args.append("NX")
+        if xx:
+            args.append("XX")
+        return True if self.execute(*args) == "OK" else None
+
+    def delete(self, *keys):
+        return self.execute("DEL", *keys) if keys else 0
+
+    def exists(self, *keys):
+        return self.execute("EXISTS", *keys)
+
+    def eval(self, script, numkeys, *keys_and_args):
+        return self.execute("EVAL", script, numkeys, *keys_and_args)
+
+    def scan_iter(self, match=None, count=None):
+        cursor = b"0"
+        while True:
+            args = ["SCAN", cursor]
+            if match is not None:
+                args += ["MATCH", match]
+            if count is not None:
+                args += ["COUNT", count]
+            cursor, keys = self.execute(*args)
+            yield from keys
+            if cursor == b"0":
+                return
+
+    def flushall(self):
+        return self.execute("FLUSHALL") == "OK"
+
+
+# --- stand-in server
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        db = self.server.db
+        while True:
+            try:
+                args = read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(args, list) or not args:
+                return
+            self.wfile.write(db.execute(args))
+
+
+def _bulk(value):
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(items):
+    return b"*%d\r\n" % len(items) + b"".join(_bulk(i) for i in items)
+
+
+class _Data:
+    """The keyspace; one lock, so every command is atomic like in Redis."""
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        due = self.expires.get(key)
+        if due is not None and due <= time.monotonic():
+            del self.expires[key]
+            self.values.pop(key, None)
+        return key in self.values
+
+    def execute(self, args):
+        name = args[0].decode().upper()
+        handler = getattr(self, "cmd_" + name.lower(), None)
+        if handler is None:
+            return b"-ERR unknown command '%s'\r\n" % name.encode()
+        with self.lock:
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError, IndexError):
+                return b"-ERR wrong arguments for '%s'\r\n" % name.encode()
+
+    def cmd_ping(self):
+        return b"+PONG\r\n"
+
+    def cmd_select(self, db):
+        return b"+OK\r\n"
+
+    def cmd_get(self, key):
+        return _bulk(self.values[key] if self._live(key) else None)
+
+    def cmd_set(self, key, value, *options):
+        options = [o.decode().upper() for o in options]
+        ttl = None
+        if "EX" in options:
+            ttl = float(options[options.index("EX") + 1])
+        if "PX" in options:
+            ttl = float(options[options.index("PX") + 1]) / 1000
+        exists = self._live(key)
+        if ("NX" in options and exists) or ("XX" in options and not exists):
+            return b"$-1\r\n"
+        self.values[key] = value
+        if ttl is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = time.monotonic() + ttl
+        return b"+OK\r\n"
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._live(key):
+                del self.values[key]
+                self.expires.pop(key, None)
+                removed += 1
+        return b":%d\r\n" % removed
+
+    def cmd_exists(self, *keys):
+        return b":%d\r\n" % sum(self._live(k) for k in keys)
+
+    def _match(self, pattern):
+        pattern = pattern.decode() if pattern else "*"
+        return sorted(k for k in list(self.values)
+                      if fnmatch.fnmatchcase(k.decode(errors="replace"), pattern) and self._live(k))
+
+    def cmd_keys(self, pattern):
+        return _array(self._match(pattern))
+
+    def cmd_scan(self, cursor, *options):
+        options = list(options)
+        upper = [o.decode().upper() for o in options]
+        pattern = options[upper.index("MATCH") + 1] if "MATCH" in upper else None
+        count = int(options[upper.index("COUNT") + 1]) if "COUNT" in upper else 10
+        keys = self._match(pattern)
+        start = int(cursor)
+        page = keys[start:start + count]
+        following = start + count if start + count < len(keys) else 0
+        return b"*2\r\n" + _bulk(b"%d" % following) + _array(page)
+
+    def cmd_dbsize(self):
+        return b":%d\r\n" % sum(self._live(k) for k in list(self.values))
+
+    def cmd_flushall(self):
+        self.values.clear()
+        self.expires.clear()
+        return b"+OK\r\n"
+
+    def cmd_eval(self, script, numkeys, *args):
+        run = self.SCRIPTS.get(script.decode())
+        if run is None:
+            return b"-ERR only RedisStore's scripts are supported\r\n"
+        n = int(numkeys)
+        return b":%d\r\n" % run(self, args[:n], args[n:])
+
+    def _owns(self, lock, token):
+        return self._live(lock) and self.values[lock] == token
+
+    def _release(self, keys, argv):
+        if not self._owns(keys[0], argv[0]):
+            return 0
+        del self.values[keys[0]]
+        self.expires.pop(keys[0], None)
+        return 1
+
+    def _commit(self, keys, argv):
+        lock, room = keys
+        if not self._owns(lock, argv[0]):
+            return 0
+        if len(argv) > 1:
+            self.values[room] = argv[1]
+        else:
+            self.values.pop(room, None)
+        self.expires.pop(room, None)
+        del self.values[lock]
+        self.expires.pop(lock, None)
+        return 1
+
+    SCRIPTS = {RELEASE_SCRIPT: _release, COMMIT_SCRIPT: _commit}
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """Stand-in Redis on localhost; start() serves from a daemon thread."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.db = _Data()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in Redis server for local testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args(argv)
+    server = RespServer(args.host, args.port)
+    print(f"serving {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
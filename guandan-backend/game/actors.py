@@ -0,0 +1,94 @@
+# guandan-backend/game/actors.py
+
+"""Per-room command queues: one command per room at a time, in arrival order.
+
+Socket.IO handlers run concurrently (threading async mode), and each one
+reads and rewrites the room it names: turn_index, hands, passes, the tribute
+state.  RoomQueues.submit(room_id, fn, *args) puts the command on that room's
+mailbox instead of running it straight away.  Whoever finds the mailbox idle
+becomes its executor and drains it, including commands other threads add in
+the meantime; the others return at once with a Future for their result.  So
+every room has at most one command running, in FIFO order, while different
+rooms run side by side.  There is no thread per room: an idle room has no
+mailbox at all.
+
+With an executor (e.g. a ThreadPoolExecutor) the drain runs there instead of
+on the submitting thread, which lets handlers return before the command runs.
+
+A command that submits to its own room gets queued behind itself, so it must
+not wait on that Future.
+"""
+
+import logging
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+
+class RoomQueues:
+    """Serialized command mailboxes keyed by room id."""
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._mailboxes = {}      # room_id -> deque of waiting commands; present while being drained
+        self.counts = Counter()
+
+    def submit(self, room_id, fn, *args):
+        """Run fn(*args) on room_id's queue; returns a Future for its result."""
+        command = (fn, args, Future())
+        with self._lock:
+            self.counts['submitted'] += 1
+            mailbox = self._mailboxes.get(room_id)
+            if mailbox is not None:
+                mailbox.append(command)
+                self.counts['queued'] += 1
+                self.counts['max_depth'] = max(self.counts['max_depth'], len(mailbox))
+                return command[2]
+            mailbox = self._mailboxes[room_id] = deque()
+        if self.executor is None:
+            self._drain(room_id, mailbox, command)
+        else:
+            self.executor.submit(self._drain, room_id, mailbox, command)
+        return command[2]
+
+    def _drain(self, room_id, mailbox, command):
+        while True:
+            fn, args, future = command
+            failed = False
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except Exception as exc:
+                    failed = True
+                    log.exception("command for room %s failed", room_id)
+                    future.set_exception(exc)
+            with self._lock:
+                self.counts['run'] += 1
+                self.counts['errors'] += failed
+                if not mailbox:
+                    del self._mailboxes[room_id]
+                    return
+                command = mailbox.popleft()
+
+    def busy(self, room_id):
+        """True while a command for room_id is running or waiting."""
+        with self._lock:
+            return room_id in self._mailboxes
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active_rooms': len(self._mailboxes),
+                'waiting': sum(len(m) for m in self._mailboxes.values()),
+                'submitted': self.counts['submitted'],
+                'queued': self.counts['queued'],
+                'run': self.counts['run'],
+                'errors': self.counts['errors'],
+                'max_depth': self.counts['max_depth'],
+            }
+
+
+room_queues = RoomQueues()
@@ -0,0 +1,176 @@
+# guandan-backend/game/batch.py
+
+"""Vectorized classification of many candidate plays.
+
+classify_batch() is classify.classify_counts() over a whole (N, 15) array of
+rank-count vectors (RANK_NAMES order) with per-row wild counts and flush
+flags, in one NumPy pass.  It returns per-row type codes, main ranks and the
+same integer comparison keys as hands.hand_key(), so beats_batch() is
+key_beats() against one previous play.  Like classify_counts(), rows with
+more than MAX_WILDS wilds are reported invalid.  NumPy is optional for the
+server; only this module needs it.
+"""
+
+from .cards import CARD_FACE, CARD_RANK, CARD_SUIT, NUM_CARDS, NUM_RANKS, RANK_INDEX, RANK_NAMES, encode_cards, wild_face
+from .classify import MAX_WILDS, NUM_SLOTS, PLATE_TOP, STRAIGHT_TOP, TUBE_TOP
+from .hands import BOMB_PRIORITY, JOKER_STRENGTH, KEY_GROUP_SHIFT, KEY_TIER_SHIFT, TYPE_CODES, WILD_STRENGTH
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Batch type codes: 0 is "not a hand", 1-7 are TYPE_CODES, then the bombs.
+BATCH_TYPES = [None] + sorted(TYPE_CODES, key=TYPE_CODES.get) + sorted(BOMB_PRIORITY, key=BOMB_PRIORITY.get)
+BATCH_CODES = {name: i for i, name in enumerate(BATCH_TYPES) if name}
+INVALID_KEY = -1
+
+if np is not None:
+    _STRAIGHT_TOP = np.array(STRAIGHT_TOP, dtype=np.int8)
+    _TUBE_TOP = np.array(TUBE_TOP, dtype=np.int8)
+    _PLATE_TOP = np.array(PLATE_TOP, dtype=np.int8)
+    _BITS = (1 << np.arange(NUM_RANKS)).astype(np.int32)
+    _TIERS = np.zeros(len(BATCH_TYPES), dtype=np.int32)
+    _GROUP_CODES = np.zeros(len(BATCH_TYPES), dtype=np.int32)
+    for _name, _code in BATCH_CODES.items():
+        _TIERS[_code] = BOMB_PRIORITY.get(_name, 0)
+        _GROUP_CODES[_code] = TYPE_CODES.get(_name, 0)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("game.batch needs NumPy: pip install numpy")
+
+
+class BatchResult:
+    """Per-row results of classify_batch(); rank/second are RANK_NAMES indexes, -1 when unused."""
+    __slots__ = ('types', 'ranks', 'wild', 'second', 'lengths', 'keys')
+
+    def __init__(self, types, ranks, wild, second, lengths, keys):
+        self.types = types
+        self.ranks = ranks
+        self.wild = wild
+        self.second = second
+        self.lengths = lengths
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.types)
+
+    def hand_info(self, i, level_rank=None):
+        """Row i as the (type, rank, extra) tuple hand_type() returns, or None."""
+        code = int(self.types[i])
+        if not code:
+            return None
+        rank = int(self.ranks[i])
+        name = RANK_NAMES[rank] if rank >= 0 else level_rank
+        if self.second[i] >= 0:
+            extra = RANK_NAMES[self.second[i]]
+        else:
+            extra = "wild" if self.wild[i] else None
+        return (BATCH_TYPES[code], name, extra)
+
+
+def batch_counts(hands, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """(counts, wilds, flush) arrays for a list of card lists (strings) or id lists."""
+    _require_numpy()
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    n = len(hands)
+    counts = np.zeros((n, NUM_SLOTS), dtype=np.int16)
+    wilds = np.zeros(n, dtype=np.int16)
+    flush = np.zeros(n, dtype=bool)
+    rank_of = np.array(CARD_RANK, dtype=np.int16)
+    suit_of = np.array(CARD_SUIT, dtype=np.int16)
+    is_wild = np.array([CARD_FACE[c] == wf for c in range(NUM_CARDS)])
+    for i, hand in enumerate(hands):
+        ids = np.array(encode_cards(hand) if hand and isinstance(hand[0], str) else hand, dtype=np.int16)
+        if not len(ids):
+            continue
+        w = is_wild[ids]
+        wilds[i] = w.sum()
+        natural = ids[~w]
+        counts[i] = np.bincount(rank_of[natural], minlength=NUM_SLOTS)
+        suits = suit_of[natural][rank_of[natural] < NUM_RANKS]
+        flush[i] = len(suits) > 0 and (suits == suits[0]).all()
+    return counts, wilds, flush
+
+
+def classify_batch(counts, wilds=None, flush=None, level_rank=None):
+    """Classify every row of an (N, 15) count array in one pass; returns a BatchResult."""
+    _require_numpy()
+    counts = np.asarray(counts, dtype=np.int32)
+    rows = len(counts)
+    wilds = np.zeros(rows, dtype=np.int32) if wilds is None else np.asarray(wilds, dtype=np.int32)
+    flush = np.zeros(rows, dtype=bool) if flush is None else np.asarray(flush, dtype=bool)
+    level = RANK_INDEX.get(level_rank, -1)
+
+    nat = counts[:, :NUM_RANKS]
+    jb = counts[:, NUM_RANKS]
+    jr = counts[:, NUM_RANKS + 1]
+    jokers = jb + jr
+    n = counts.sum(axis=1) + wilds
+    present = nat > 0
+    natural = present.sum(axis=1)
+    mask = present.astype(np.int32) @ _BITS
+    top = np.where(natural > 0, NUM_RANKS - 1 - np.argmax(present[:, ::-1], axis=1), -1)
+    low = np.argmax(present, axis=1)
+    deepest = nat.max(axis=1)
+    distinct = natural + (jb > 0) + (jr > 0)
+    only = np.where(natural > 0, top, np.where(jr > 0, NUM_RANKS + 1, NUM_RANKS))
+    has_wild = wilds > 0
+    idx = np.arange(rows)
+    low_count = nat[idx, low]
+    top_count = nat[idx, np.maximum(top, 0)]
+    straight = _STRAIGHT_TOP[np.minimum(wilds, MAX_WILDS), mask]
+    tube = _TUBE_TOP[mask]
+    plate = _PLATE_TOP[mask]
+
+    ok = (wilds <= MAX_WILDS) & (n > 0)
+    c_joker_bomb = ok & (n == 4) & (jb == 2) & (jr == 2)
+    c_bomb = ok & (n >= 4) & (n <= 10) & (natural == 1) & (jokers == 0)
+    c_single = ok & (n == 1)
+    c_pair = ok & (n == 2) & ((wilds == 2) | ((wilds == 1) & (only == level)) | ((wilds == 0) & (distinct == 1)))
+    c_triple = ok & (n == 3) & (distinct <= 1)
+    no_jokers = ok & (jokers == 0)
+    c_fh_high = no_jokers & (n == 5) & (natural == 2) & (low_count <= 2) & (top_count <= 3)
+    c_fh_low = no_jokers & (n == 5) & (natural == 2) & (low_count == 3) & (top_count <= 2)
+    c_straight = no_jokers & (n == 5) & (straight >= 0)
+    c_tube = no_jokers & (n == 6) & (deepest <= 2) & (tube >= 0)
+    c_plate = no_jokers & (n == 6) & (deepest <= 3) & (plate >= 0)
+
+    # Same precedence as classify_counts(): earlier conditions win
+    conditions = [c_joker_bomb, c_bomb, c_single, c_pair, c_triple, c_fh_high, c_fh_low,
+                  c_straight & flush, c_straight, c_tube, c_plate]
+    codes = [BATCH_CODES['joker_bomb'], BATCH_CODES['bomb'], BATCH_CODES['single'], BATCH_CODES['pair'],
+             BATCH_CODES['triple'], BATCH_CODES['full_house'], BATCH_CODES['full_house'],
+             BATCH_CODES['straight_flush'], BATCH_CODES['straight'], BATCH_CODES['tube'], BATCH_CODES['plate']]
+    wild_rank = np.where(distinct == 0, level, only)
+    small_rank = np.where(has_wild & ((n < 3) | (distinct == 0)), level, only)
+    ranks = [np.full(rows, NUM_RANKS + 1), top, small_rank, np.where(has_wild, level, only), wild_rank,
+             top, low, straight, straight, tube, plate]
+    types = np.select(conditions, codes, 0).astype(np.int8)
+    rank = np.select(conditions, ranks, -1).astype(np.int8)
+    second = np.select([c_fh_high, c_fh_low], [low, top], -1).astype(np.int8)
+    wild = has_wild & ((types == BATCH_CODES['bomb']) | (types == BATCH_CODES['single'])
+                       | (types == BATCH_CODES['pair']) | (types == BATCH_CODES['triple']))
+
+    # hand_key() for every row
+    r = rank.astype(np.int32)
+    tier = _TIERS[types]
+    strength = np.where(wild, WILD_STRENGTH + r, np.where(r >= NUM_RANKS, JOKER_STRENGTH + r - NUM_RANKS, r))
+    group = (_GROUP_CODES[types] << 4) | n
+    keys = np.where(tier > 0, (tier << KEY_TIER_SHIFT) | r, (group << KEY_GROUP_SHIFT) | strength)
+    keys = np.where(types > 0, keys, INVALID_KEY).astype(np.int32)
+    return BatchResult(types, rank, wild, second, n.astype(np.int16), keys)
+
+
+def beats_batch(prev_key, keys):
+    """key_beats(prev_key, k) for every k; invalid rows never beat.  prev_key None means leading."""
+    _require_numpy()
+    keys = np.asarray(keys, dtype=np.int32)
+    valid = keys != INVALID_KEY
+    if prev_key is None:
+        return valid
+    bombs = ((keys | prev_key) >> KEY_TIER_SHIFT) > 0
+    same_group = (keys >> KEY_GROUP_SHIFT) == (prev_key >> KEY_GROUP_SHIFT)
+    return valid & (keys > prev_key) & (bombs | same_group)
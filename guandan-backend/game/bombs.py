@@ -0,0 +1,129 @@
+# guandan-backend/game/bombs.py
+
+"""Per-hand bomb index.
+
+BombIndex keeps, for one player's hand, the count of each rank, a count per
+(suit, rank) and one rank bitmask per suit.  From those it answers "which
+bombs does this hand hold?" - every N-of-a-kind bomb (topped up with wilds),
+every straight flush and the joker bomb - without looking at the card list.
+Removing played cards only touches the counters for those cards.
+"""
+
+from .cards import (
+    CARD_FACE,
+    CARD_NAME,
+    CARD_RANK,
+    CARD_SUIT,
+    FACE_BY_RANK_SUIT,
+    JOKER_B,
+    JOKER_R,
+    NUM_RANKS,
+    encode_cards,
+    wild_face,
+)
+from .classify import MAX_WILDS, NUM_SLOTS
+from .moves import STRAIGHT_CHOICES, classify_signature
+from .plays import Play
+
+NUM_SUITS = 4
+
+
+class BombIndex:
+    __slots__ = ('level_rank', 'wild_face', 'wilds', 'counts', 'suit_counts', 'suit_masks', '_cache')
+
+    def __init__(self, hand, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+        self.level_rank = level_rank
+        self.wild_face = wild_face(level_rank, trump_suit, wild_cards_enabled)
+        self.wilds = 0
+        self.counts = [0] * NUM_SLOTS
+        self.suit_counts = [[0] * NUM_RANKS for _ in range(NUM_SUITS)]
+        self.suit_masks = [0] * NUM_SUITS
+        self._cache = None
+        self.add(hand)
+
+    def add(self, cards):
+        for c in encode_cards(cards):
+            if CARD_FACE[c] == self.wild_face:
+                self.wilds += 1
+                continue
+            r = CARD_RANK[c]
+            self.counts[r] += 1
+            if r < NUM_RANKS:
+                s = CARD_SUIT[c]
+                self.suit_counts[s][r] += 1
+                self.suit_masks[s] |= 1 << r
+        self._cache = None
+
+    def remove(self, cards):
+        """Forget cards that left the hand (played or given away)."""
+        for c in encode_cards(cards):
+            if CARD_FACE[c] == self.wild_face:
+                self.wilds -= 1
+                continue
+            r = CARD_RANK[c]
+            self.counts[r] -= 1
+            if r < NUM_RANKS:
+                s = CARD_SUIT[c]
+                self.suit_counts[s][r] -= 1
+                if not self.suit_counts[s][r]:
+                    self.suit_masks[s] &= ~(1 << r)
+        self._cache = None
+
+    def _wild_cards(self, k):
+        return [CARD_NAME[self.wild_face]] * k
+
+    def _play(self, cards, items, k, flush):
+        info, key = classify_signature(items, k, flush, self.level_rank)
+        return Play(None, cards, info, key)
+
+    def n_of_a_kind(self):
+        """One bomb per (rank, size), using as few wilds as possible."""
+        wilds = min(self.wilds, MAX_WILDS)
+        found = []
+        for r in range(NUM_RANKS):
+            c = self.counts[r]
+            if not c:
+                continue
+            naturals = []
+            for s in range(NUM_SUITS):
+                naturals += [CARD_NAME[FACE_BY_RANK_SUIT[(r, s)]]] * self.suit_counts[s][r]
+            for size in range(4, min(10, c + wilds) + 1):
+                used = min(c, size)
+                k = size - used
+                found.append(self._play(naturals[:used] + self._wild_cards(k), ((r, used),), k, False))
+        return found
+
+    def straight_flushes(self):
+        """One straight flush per (suit, value), using as few wilds as possible."""
+        wilds = min(self.wilds, MAX_WILDS)
+        found = {}
+        for s, suit_mask in enumerate(self.suit_masks):
+            for choices in STRAIGHT_CHOICES:
+                for mask, items, k in choices:
+                    if k > wilds or suit_mask & mask != mask:
+                        continue
+                    info, key = classify_signature(items, k, True, self.level_rank)
+                    if (s, info) in found and found[(s, info)][1] <= k:
+                        continue
+                    cards = [CARD_NAME[FACE_BY_RANK_SUIT[(r, s)]] for r, _ in items]
+                    found[(s, info)] = (self._play(cards + self._wild_cards(k), items, k, True), k)
+        return [play for play, _ in found.values()]
+
+    def joker_bomb(self):
+        if self.counts[JOKER_B] >= 2 and self.counts[JOKER_R] >= 2:
+            return self._play(["JoB", "JoB", "JoR", "JoR"], ((JOKER_B, 2), (JOKER_R, 2)), 0, False)
+        return None
+
+    def bombs(self):
+        """Every bomb in the hand, weakest first."""
+        if self._cache is None:
+            found = self.n_of_a_kind() + self.straight_flushes()
+            joker = self.joker_bomb()
+            if joker:
+                found.append(joker)
+            found.sort(key=lambda p: p.key)
+            self._cache = found
+        return list(self._cache)
+
+    def has_bomb(self):
+        return bool(self.bombs())
@@ -0,0 +1,64 @@
+# guandan-backend/game/bulk.py
+
+"""Bulk dealing with NumPy.
+
+deal_batch() shuffles N two-deck decks at once and deals them the way
+deck.deal_cards() does (card i of the shuffled deck goes to player i % 4),
+returning an (N, players, 108 // players) uint8 array of card ids (see
+cards.py).  NumPy is optional for the server; only this module needs it.
+"""
+
+from .cards import CARD_NAME, NUM_CARDS, encode_cards
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+CHUNK = 1 << 16   # decks shuffled per permuted() call, bounds temporary memory
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("game.bulk needs NumPy: pip install numpy")
+
+
+def make_rng(seed=None):
+    """numpy Generator from a seed, or pass one through."""
+    _require_numpy()
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def shuffle_batch(n, seed=None):
+    """(n, 108) uint8 array, each row an independently shuffled deck of card ids."""
+    rng = make_rng(seed)
+    decks = np.empty((n, NUM_CARDS), dtype=np.uint8)
+    ordered = np.arange(NUM_CARDS, dtype=np.uint8)
+    for start in range(0, n, CHUNK):
+        stop = min(start + CHUNK, n)
+        decks[start:stop] = rng.permuted(np.broadcast_to(ordered, (stop - start, NUM_CARDS)), axis=1)
+    return decks
+
+
+def deal_batch(n, seed=None, num_players=4):
+    """(n, num_players, 108 // num_players) uint8 array of dealt card ids."""
+    if NUM_CARDS % num_players:
+        raise ValueError(f"{NUM_CARDS} cards do not deal evenly to {num_players} players")
+    decks = shuffle_batch(n, seed)
+    per_player = NUM_CARDS // num_players
+    # deal_cards() gives card i to player i % num_players
+    return decks.reshape(n, per_player, num_players).transpose(0, 2, 1).copy()
+
+
+def deal_to_hands(deal):
+    """One (players, cards) row of deal_batch() as deal_cards()-style string hands."""
+    return [[CARD_NAME[c] for c in hand] for hand in deal.tolist()]
+
+
+def hands_to_deal(hands):
+    """Inverse of deal_to_hands() for hands dealt from one deck (two copies of each card)."""
+    _require_numpy()
+    ids = encode_cards([card for hand in hands for card in hand])
+    return np.array(ids, dtype=np.uint8).reshape(len(hands), -1)
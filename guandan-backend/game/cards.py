@@ -0,0 +1,96 @@
+# guandan-backend/game/cards.py
+
+"""Compact integer encoding for the 108 physical cards of a two-deck game.
+
+A card id is the card's position in create_deck(), so ids 0-53 are the first
+deck and 54-107 the second.  Both copies of a card share a "face" (id % 54).
+Rank, suit and joker lookups are plain list indexing into the tables below,
+so the hot paths in hands.py never have to re-parse "10H"-style strings.
+"""
+
+from .deck import create_deck
+
+# Rank index order used by the rules engine: 3 is lowest, 2 is the highest
+# natural rank, then the two jokers.
+RANK_NAMES = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2', 'JoB', 'JoR']
+SUIT_NAMES = ['clubs', 'diamonds', 'hearts', 'spades']
+NUM_RANKS = 13   # natural ranks 3..2, jokers excluded
+JOKER_B = 13
+JOKER_R = 14
+NO_SUIT = -1
+
+RANK_INDEX = {r: i for i, r in enumerate(RANK_NAMES)}
+SUIT_INDEX = {s: i for i, s in enumerate(SUIT_NAMES)}
+SUIT_LETTERS = {'C': 0, 'D': 1, 'H': 2, 'S': 3}
+
+CARD_NAME = create_deck()
+NUM_CARDS = len(CARD_NAME)      # 108
+NUM_FACES = NUM_CARDS // 2      # 54 distinct cards, two copies each
+
+CARD_FACE = [i % NUM_FACES for i in range(NUM_CARDS)]
+CARD_RANK = []
+CARD_SUIT = []
+CARD_IS_JOKER = []
+for _name in CARD_NAME:
+    if _name in ('JoB', 'JoR'):
+        CARD_RANK.append(RANK_INDEX[_name])
+        CARD_SUIT.append(NO_SUIT)
+        CARD_IS_JOKER.append(True)
+    else:
+        CARD_RANK.append(RANK_INDEX[_name[:-1]])
+        CARD_SUIT.append(SUIT_LETTERS[_name[-1]])
+        CARD_IS_JOKER.append(False)
+
+# name -> id of the first copy.  Lower-case suit letters are accepted the same
+# way parse_card() always has.
+FACE_ID = {}
+for _i, _name in enumerate(CARD_NAME[:NUM_FACES]):
+    FACE_ID[_name] = _i
+    if _name not in ('JoB', 'JoR'):
+        FACE_ID[_name[:-1] + _name[-1].lower()] = _i
+
+# (rank index, suit index) -> face id, used to locate the wild card.
+FACE_BY_RANK_SUIT = {(CARD_RANK[i], CARD_SUIT[i]): i for i in range(NUM_FACES)}
+
+
+def encode_card(card):
+    """Return the face id (0-53) for a card string."""
+    try:
+        return FACE_ID[card]
+    except (KeyError, TypeError):
+        raise ValueError("Bad card: " + repr(card))
+
+
+def encode_cards(cards):
+    """Encode a list of card strings, giving repeated cards the second-deck id."""
+    ids = []
+    seen = set()
+    for card in cards:
+        cid = encode_card(card)
+        if cid in seen:
+            cid += NUM_FACES
+        else:
+            seen.add(cid)
+        ids.append(cid)
+    return ids
+
+
+def decode_card(cid):
+    return CARD_NAME[cid]
+
+
+def decode_cards(ids):
+    return [CARD_NAME[c] for c in ids]
+
+
+def wild_face(level_rank, trump_suit, wild_cards_enabled):
+    """Face id of the wild card for this round, or None if there is no wild."""
+    if not wild_cards_enabled or not level_rank or not trump_suit:
+        return None
+    return FACE_BY_RANK_SUIT.get((RANK_INDEX.get(level_rank), SUIT_INDEX.get(trump_suit)))
+
+
+def wild_card(level_rank, trump_suit, wild_cards_enabled):
+    """Card string of this round's wild (e.g. "7H"), or None."""
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    return None if wf is None else CARD_NAME[wf]
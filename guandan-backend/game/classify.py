@@ -0,0 +1,286 @@
+# guandan-backend/game/classify.py
+
+"""Rank-histogram hand classifier.
+
+A play is reduced to a 15-slot rank-count vector (RANK_NAMES order), a wild
+count and a flush flag.  Straights, tubes and plates are then answered by
+indexing precomputed tables with the bitmask of natural ranks present, and full
+houses by a table of count shapes, so nothing walks RANK_ORDER windows per call.
+
+classify() returns exactly what hands.hand_type() returns for the same cards.
+"""
+
+import threading
+from collections import OrderedDict
+
+from .cards import (
+    CARD_FACE,
+    CARD_RANK,
+    CARD_SUIT,
+    JOKER_B,
+    JOKER_R,
+    NUM_RANKS,
+    RANK_NAMES,
+    encode_cards,
+    wild_face,
+)
+from .hands import hand_type_ids
+
+NUM_SLOTS = len(RANK_NAMES)  # 13 natural ranks + JoB + JoR
+MAX_WILDS = 2                # one wild card per deck
+NUM_MASKS = 1 << NUM_RANKS
+DEFAULT_CACHE_SIZE = 4096
+
+
+def _window_table(width, min_bits=1):
+    """Table of mask -> top rank index of the lowest window of `width` ranks that
+    contains every rank in mask (with at least min_bits of them), or -1."""
+    table = [-1] * NUM_MASKS
+    # Walk windows from the top down so lower windows overwrite higher ones.
+    for i in range(NUM_RANKS - width, -1, -1):
+        window = ((1 << width) - 1) << i
+        sub = window
+        while sub:
+            if bin(sub).count('1') >= min_bits:
+                table[sub] = i + width - 1
+            sub = (sub - 1) & window
+    return table
+
+
+# STRAIGHT_TOP[wilds][mask]: lowest 5-wide window missing at most `wilds` ranks.
+# A 5-card play never has more than 5 ranks, so subsets of a window are enough.
+STRAIGHT_TOP = [_window_table(5, 5 - w) for w in range(MAX_WILDS + 1)]
+# Tubes and plates must hold every non-wild card inside one window (each rank
+# at most 2 or 3 deep), so only the set of present ranks matters here.
+TUBE_TOP = _window_table(3)
+PLATE_TOP = _window_table(2)
+
+# Full house shapes: (count of lower rank, count of higher rank) -> which rank is the triple.
+FULL_HOUSE_SHAPES = {}
+for _low in range(1, 4):
+    for _high in range(1, 4):
+        if _low <= 2:
+            FULL_HOUSE_SHAPES[(_low, _high)] = 'high'
+        elif _high <= 2:
+            FULL_HOUSE_SHAPES[(_low, _high)] = 'low'
+
+
+def hand_counts(ids, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """Return (counts, wilds, flush) for a list of card ids.
+
+    flush is True when every non-wild, non-joker card shares one suit.
+    """
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    counts = [0] * NUM_SLOTS
+    wilds = 0
+    suit = None
+    flush = True
+    for c in ids:
+        if CARD_FACE[c] == wf:
+            wilds += 1
+            continue
+        r = CARD_RANK[c]
+        counts[r] += 1
+        if r < NUM_RANKS:
+            s = CARD_SUIT[c]
+            if suit is None:
+                suit = s
+            elif s != suit:
+                flush = False
+    return counts, wilds, flush and suit is not None
+
+
+def classify_counts(counts, wilds, flush=False, level_rank=None):
+    """Classify a rank-count vector plus wild count. Same tuples as hand_type()."""
+    if wilds > MAX_WILDS:
+        return None  # not reachable with a real deck; callers fall back
+    mask = 0
+    natural = 0
+    top = -1
+    deepest = 0
+    for r in range(NUM_RANKS):
+        c = counts[r]
+        if c:
+            mask |= 1 << r
+            natural += 1
+            top = r
+            if c > deepest:
+                deepest = c
+    jokers = counts[JOKER_B] + counts[JOKER_R]
+    n = sum(counts) + wilds
+    if n == 0:
+        return None
+
+    if n == 4 and counts[JOKER_B] == 2 and counts[JOKER_R] == 2:
+        return ("joker_bomb", "JoR", None)
+
+    # Bomb: every non-wild card has the same natural rank
+    if 4 <= n <= 10:
+        if natural == 1 and not jokers:
+            return ("bomb", RANK_NAMES[top], "wild" if counts[top] < n else None)
+
+    if n == 1:
+        if wilds:
+            return ("single", level_rank, "wild")
+        return ("single", RANK_NAMES[top if natural else (JOKER_R if counts[JOKER_R] else JOKER_B)], None)
+
+    distinct = natural + (counts[JOKER_B] > 0) + (counts[JOKER_R] > 0)
+    if distinct == 1:
+        only = top if natural else (JOKER_R if counts[JOKER_R] else JOKER_B)
+
+    if n == 2:
+        if wilds == 2:
+            return ("pair", level_rank, "wild")
+        if wilds == 1:
+            if RANK_NAMES[only] == level_rank:
+                return ("pair", level_rank, "wild")
+            return None
+        if distinct == 1:
+            return ("pair", RANK_NAMES[only], None)
+        return None
+
+    if n == 3:
+        if distinct == 1:
+            return ("triple", RANK_NAMES[only], "wild" if wilds else None)
+        if distinct == 0:
+            return ("triple", level_rank, "wild")
+        return None
+
+    if jokers:
+        return None  # jokers only ever fit singles, pairs, triples and the joker bomb
+
+    if n == 5:
+        if natural == 2:
+            low = (mask & -mask).bit_length() - 1
+            shape = FULL_HOUSE_SHAPES.get((counts[low], counts[top]))
+            if shape == 'high':
+                return ("full_house", RANK_NAMES[top], RANK_NAMES[low])
+            if shape == 'low':
+                return ("full_house", RANK_NAMES[low], RANK_NAMES[top])
+        straight = STRAIGHT_TOP[wilds][mask]
+        if straight >= 0:
+            if flush:
+                return ("straight_flush", RANK_NAMES[straight], None)
+            return ("straight", RANK_NAMES[straight], None)
+        return None
+
+    if n == 6:
+        if deepest <= 2 and TUBE_TOP[mask] >= 0:
+            return ("tube", RANK_NAMES[TUBE_TOP[mask]], None)
+        if deepest <= 3 and PLATE_TOP[mask] >= 0:
+            return ("plate", RANK_NAMES[PLATE_TOP[mask]], None)
+
+    return None
+
+
+def classify_ids(ids, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """hand_type_ids() via the rank histogram."""
+    if not ids:
+        return None
+    counts, wilds, flush = hand_counts(ids, level_rank, trump_suit, wild_cards_enabled)
+    if wilds > MAX_WILDS:
+        return hand_type_ids(ids, level_rank, trump_suit, wild_cards_enabled)
+    return classify_counts(counts, wilds, flush, level_rank)
+
+
+def classify(cards, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """Drop-in replacement for hands.hand_type()."""
+    if not cards:
+        return None
+    try:
+        ids = encode_cards(cards)
+    except ValueError:
+        return None
+    return classify_ids(ids, level_rank, trump_suit, wild_cards_enabled)
+
+
+_MISSING = object()
+
+
+class ClassifyCache:
+    """Bounded LRU cache in front of classify_counts().
+
+    Entries are keyed on the play's shape rather than its physical cards:
+    the rank-count vector (a sorted rank multiset), the flush flag, the wild
+    count and the round's levelRank/trumpSuit/wildCards.  Shapes repeat a lot
+    across rooms, so most lookups are a single dict hit.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def classify_ids(self, ids, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+        if not ids:
+            return None
+        counts, wilds, flush = hand_counts(ids, level_rank, trump_suit, wild_cards_enabled)
+        if wilds > MAX_WILDS:
+            return hand_type_ids(ids, level_rank, trump_suit, wild_cards_enabled)
+        return self.classify_counts(counts, wilds, flush, level_rank, trump_suit, wild_cards_enabled)
+
+    def classify_counts(self, counts, wilds, flush, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+        """classify_counts() for a vector the caller has already built."""
+        key = (tuple(counts), flush, wilds, level_rank, trump_suit, bool(wild_cards_enabled))
+        with self._lock:
+            result = self._entries.get(key, _MISSING)
+            if result is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = classify_counts(counts, wilds, flush, level_rank)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = result
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def classify(self, cards, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+        if not cards:
+            return None
+        try:
+            ids = encode_cards(cards)
+        except ValueError:
+            return None
+        return self.classify_ids(ids, level_rank, trump_suit, wild_cards_enabled)
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by every room in this process.
+hand_cache = ClassifyCache()
+
+
+def classify_cached(cards, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """classify() through the process-wide hand_cache."""
+    return hand_cache.classify(cards, level_rank, trump_suit, wild_cards_enabled)
@@ -0,0 +1,133 @@
+# guandan-backend/game/context.py
+
+"""Per-round rules context.
+
+levelRank, trumpSuit and wildCards are fixed for a whole round once
+start_new_game_round() picks them.  RoundContext bundles the three, works out
+wild and trump membership for all 108 card ids once, and exposes the rules
+entry points (classify, beats, take, move generation) already bound to them,
+so callers pass one object instead of three loose arguments.
+"""
+
+from functools import lru_cache
+
+from .bombs import BombIndex
+from .cards import CARD_FACE, CARD_RANK, CARD_SUIT, NUM_CARDS, NUM_RANKS, encode_card, encode_cards, wild_card, wild_face
+from .classify import MAX_WILDS, NUM_SLOTS, hand_cache
+from .hands import card_is_trump_id, hand_type_ids
+from .moves import enumerate_plays
+from .plays import Play, beats_classified
+
+
+class RoundContext:
+    __slots__ = ('level_rank', 'trump_suit', 'wild_cards_enabled', 'wild_face', 'wild_card', 'is_wild', 'is_trump')
+
+    def __init__(self, level_rank, trump_suit, wild_cards_enabled):
+        self.level_rank = level_rank
+        self.trump_suit = trump_suit
+        self.wild_cards_enabled = bool(wild_cards_enabled)
+        self.wild_face = wild_face(level_rank, trump_suit, wild_cards_enabled)
+        self.wild_card = wild_card(level_rank, trump_suit, wild_cards_enabled)
+        self.is_wild = tuple(CARD_FACE[c] == self.wild_face for c in range(NUM_CARDS))
+        self.is_trump = tuple(card_is_trump_id(c, level_rank, trump_suit, wild_cards_enabled)
+                              for c in range(NUM_CARDS))
+
+    @property
+    def args(self):
+        """(level_rank, trump_suit, wild_cards_enabled) for the loose-argument API."""
+        return (self.level_rank, self.trump_suit, self.wild_cards_enabled)
+
+    def __repr__(self):
+        return f"RoundContext{self.args!r}"
+
+    # --- card tests
+    def card_is_wild(self, card):
+        return self.is_wild[encode_card(card)]
+
+    def card_is_trump(self, card):
+        return self.is_trump[encode_card(card)]
+
+    def find_wilds(self, hand):
+        return [c for c in hand if self.is_wild[encode_card(c)]]
+
+    # --- classification
+    def hand_counts(self, ids):
+        """classify.hand_counts() using the precomputed wild table."""
+        is_wild = self.is_wild
+        counts = [0] * NUM_SLOTS
+        wilds = 0
+        suit = None
+        flush = True
+        for c in ids:
+            if is_wild[c]:
+                wilds += 1
+                continue
+            r = CARD_RANK[c]
+            counts[r] += 1
+            if r < NUM_RANKS:
+                s = CARD_SUIT[c]
+                if suit is None:
+                    suit = s
+                elif s != suit:
+                    flush = False
+        return counts, wilds, flush and suit is not None
+
+    def classify_ids(self, ids):
+        if not ids:
+            return None
+        counts, wilds, flush = self.hand_counts(ids)
+        if wilds > MAX_WILDS:
+            return hand_type_ids(ids, *self.args)
+        return hand_cache.classify_counts(counts, wilds, flush, *self.args)
+
+    def classify(self, cards):
+        """hand_type() for this round."""
+        if not cards:
+            return None
+        try:
+            ids = encode_cards(cards)
+        except ValueError:
+            return None
+        return self.classify_ids(ids)
+
+    def classify_play(self, player, cards):
+        hand_info = self.classify(cards)
+        if hand_info is None:
+            return None
+        return Play(player, cards, hand_info)
+
+    def beats(self, prev, curr):
+        """beats() for two {'cards': [...]} plays, through the cache."""
+        if prev is None or not prev.get('cards'):
+            return True
+        prev_play = self.classify_play(prev.get('player'), prev['cards'])
+        curr_play = self.classify_play(curr.get('player'), curr['cards'])
+        if prev_play is None or curr_play is None:
+            return False
+        return beats_classified(prev_play, curr_play)
+
+    # --- hands
+    def take(self, hand, cards):
+        """Hand.take() with this round's wild."""
+        return hand.take(cards, self.wild_card)
+
+    def enumerate_plays(self, hand, prev_play=None):
+        return enumerate_plays(hand, prev_play, *self.args)
+
+    def bomb_index(self, hand):
+        return BombIndex(hand, *self.args)
+
+
+@lru_cache(maxsize=None)
+def round_context(level_rank, trump_suit, wild_cards_enabled):
+    """Shared RoundContext for these settings (there are only a few hundred)."""
+    return RoundContext(level_rank, trump_suit, bool(wild_cards_enabled))
+
+
+def game_context(game):
+    """The RoundContext for a game dict, built on first use."""
+    ctx = game.get('context')
+    if ctx is None:
+        ctx = round_context(game.get('levelRank'), game.get('trumpSuit'), game.get('wildCards'))
+        game['context'] = ctx
+    return ctx
@@ -5,10 +5,12 @@ SUITS = ['S', 'H', 'D', 'C']
 RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 JOKERS = ['JoR', 'JoB']  # Red Joker, Black Joker
 
+_SINGLE_DECK = [rank + suit for suit in SUITS for rank in RANKS]
+_SINGLE_DECK += JOKERS  # 1 red joker and 1 black joker per deck
+
 def create_deck():
-    single_deck = [rank + suit for suit in SUITS for rank in RANKS]
-    single_deck += JOKERS  # 1 red joker and 1 black joker per deck
-    return single_deck * 2  # Two full decks
+    # Every deck shares the same 54 card strings, so dealt hands in many rooms don't copy them
+    return _SINGLE_DECK * 2  # Two full decks
 
 def shuffle_deck(deck):
     random.shuffle(deck)
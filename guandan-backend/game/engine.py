@@ -0,0 +1,877 @@
+# guandan-backend/game/engine.py
+
+"""Headless game engine.
+
+GameState runs the turn, trick, round and tribute rules on a room dict (the
+same dicts kept in rooms.rooms) and returns the resulting Socket.IO traffic as
+a list of Events instead of emitting it.  app.py forwards the events; a
+simulator can drive a GameState directly.  Nothing here imports Flask or
+eventlet.
+"""
+
+import logging
+
+from .context import game_context, round_context
+from .deck import create_deck, deal_cards, shuffle_deck
+from .events import Event
+from .models import Game, Room, Settings, TributeState, wire
+from .multiset import Hand, hand_to_wire, swap_cards
+from .outbox import coalesce
+from .plays import beats_classified
+from .rooms import get_teams_from_slots
+from .updates import delta_events, snapshot_event
+from .wire import wire_payloads
+
+log = logging.getLogger(__name__)
+
+LEVEL_SEQUENCE = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUIT_OPTIONS = ['hearts', 'spades', 'diamonds', 'clubs']
+CARD_RANK_ORDER = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2', 'JoB', 'JoR']
+DEFAULT_SETTINGS = {
+    "cardBack": "red",
+    "wildCards": True,
+    "trumpSuit": "hearts",
+    "startingLevels": ["2", "2", "2", "2"],
+    "privateHands": True,
+    "deltaUpdates": False,
+    "batchEvents": False
+}
+# Room-wide events that carry every player's hand; in privateHands mode each
+# player gets a copy with only their own hand plus everyone's card counts.
+HAND_EVENTS = ('game_started', 'all_hands', 'game_update', 'tribute_complete')
+
+
+def level_index(lv):
+    try:
+        return LEVEL_SEQUENCE.index(lv)
+    except Exception:
+        return 0
+
+def get_next_level(current, up):
+    idx = min(level_index(current) + up, len(LEVEL_SEQUENCE) - 1)
+    return LEVEL_SEQUENCE[idx]
+
+def getCardRank(card):
+    if card in ("JoB", "JoR"):
+        return card
+    if len(card) == 3:
+        return card[:2]
+    return card[0]
+
+def partner_of(teams, player):
+    for team in teams:
+        if player in team:
+            return next(p for p in team if p != player)
+    return None
+
+def hands_payload(room, players=None):
+    hands = room.get('hands', {})
+    if players is None:
+        players = list(hands)
+    return {p: hand_to_wire(hands[p]) for p in players}
+
+def private_events(room, events):
+    """Split hand-bearing broadcasts into per-player events when the room deals hands privately."""
+    if not room.get('settings', {}).get('privateHands'):
+        return events
+    out = []
+    for event in events:
+        if event.name == 'deal_hand' and event.to is None:
+            out.append(Event(event.name, event.data, event.data['username']))
+        elif event.name in HAND_EVENTS and event.to is None and 'hands' in event.data:
+            hands = event.data['hands']
+            counts = {p: len(h) for p, h in hands.items()}
+            for player, hand in hands.items():
+                data = dict(event.data, hands={player: hand}, hand_counts=counts)
+                out.append(Event(event.name, data, player))
+        else:
+            out.append(event)
+    return out
+
+def room_update_payload(room_id, room):
+    return {
+        "roomId": room_id,
+        "players": room.get("players", []),
+        "slots": room.get("slots", [None, None, None, None]),
+        "readyStates": room.get("ready", {}),
+        "settings": wire(room.get("settings", {})),
+        "teams": room.get("teams", [[], []]),
+        "levels": room.get("levels", {}),
+        "startingLevels": room["settings"].get("startingLevels", ["2","2","2","2"])
+    }
+
+def new_room(players, settings=None):
+    """A Room for up to four seated players, as the lobby would build it."""
+    slots = (list(players) + [None] * 4)[:4]
+    return Room(
+        settings=Settings(**dict(DEFAULT_SETTINGS, **(settings or {}))),
+        players=[p for p in slots if p],
+        slots=slots,
+        ready={p: True for p in slots if p},
+        hands={},
+    )
+
+def handle_end_of_trick(room):
+    levels = room['levels']
+    teams = room['teams']  # [teamA, teamB]
+    finish_order = room['game']['finish_order']
+    ace_attempts = room.setdefault('ace_attempts', {0: 0, 1: 0})
+    teamA, teamB = teams
+
+    first = finish_order[0] if len(finish_order) > 0 else None
+    second = finish_order[1] if len(finish_order) > 1 else None
+
+    log.info("[ROUND END] Finish order: %s", finish_order)
+
+    if not first or not second:
+        log.error("[ERROR] Not enough players finished to evaluate end-of-round rules.")
+        return {
+            "game_over": False,
+            "error": "Not enough players finished to determine round outcome.",
+            "levels": dict(levels)
+        }
+
+    first_team = teamA if first in teamA else teamB
+    second_team = teamA if second in teamA else teamB
+    same_team_win = first_team == second_team
+    winners_team = first_team if same_team_win else first_team
+    losers_team = teamB if winners_team == teamA else teamA
+
+    win_indices = [finish_order.index(p) for p in winners_team if p in finish_order]
+    win_indices.sort()
+    win_type = None
+    level_up = 1
+
+    if win_indices == [0, 1]:
+        win_type = "1-2"
+        level_up = 4
+    elif win_indices == [0, 2]:
+        win_type = "1-3"
+        level_up = 2
+    else:
+        win_type = "1-4"
+        level_up = 1
+
+    ace_level = LEVEL_SEQUENCE[-1]
+    declarer_team = winners_team
+    declarer_at_ace = all(levels.get(p) == ace_level for p in declarer_team)
+    game_just_won = False
+    ace_reset = False
+    ace_loser_ace_bomb = False
+
+    if declarer_at_ace:
+        team_id = 0 if declarer_team == teamA else 1
+        if win_type in ("1-2", "1-3"):
+            game_just_won = True
+            ace_attempts[team_id] = 0
+        elif win_type == "1-4":
+            ace_attempts[team_id] += 1
+            if ace_attempts[team_id] >= 3:
+                for p in declarer_team:
+                    levels[p] = LEVEL_SEQUENCE[0]
+                ace_reset = True
+                ace_attempts[team_id] = 0
+        elif losers_team == declarer_team:
+            ace_attempts[team_id] += 1
+            last_play = room['game'].get('last_play_cards', [])
+            if last_play and all(card[0] == 'A' for card in last_play):
+                for p in declarer_team:
+                    levels[p] = LEVEL_SEQUENCE[0]
+                ace_loser_ace_bomb = True
+                ace_attempts[team_id] = 0
+
+    if not (declarer_at_ace and (game_just_won or ace_reset or ace_loser_ace_bomb)):
+        for p in declarer_team:
+            levels[p] = get_next_level(levels[p], level_up)
+            if levels[p] not in LEVEL_SEQUENCE:
+                levels[p] = ace_level
+
+    if first in losers_team:
+        for p in losers_team:
+            levels[p] = get_next_level(levels[p], level_up)
+            if levels[p] not in LEVEL_SEQUENCE:
+                levels[p] = ace_level
+        declarer_team = losers_team
+        if all(levels[p] == ace_level for p in declarer_team):
+            team_id = 0 if declarer_team == teamA else 1
+            ace_attempts[team_id] = 0
+
+    room['levels'] = levels
+    room['ace_attempts'] = ace_attempts
+    room['winning_team'] = declarer_team
+    room['win_type'] = win_type
+    room['level_up'] = level_up
+
+    log.info("[ROUND RESULT] Win type: %s, Declarer team: %s, Levels: %s", win_type, declarer_team, levels)
+
+    return {
+        "game_over": game_just_won,
+        "winning_team": declarer_team,
+        "win_type": win_type,
+        "levels": dict(levels),
+        "ace_attempts": dict(ace_attempts)
+    }
+
+def determine_tributes(room):
+    finish_order = room.get('game', {}).get('finish_order', [])
+    teams = room.get('teams', [[], []])
+    if len(finish_order) < 2:
+        return None
+
+    first = finish_order[0]
+    second = finish_order[1] if len(finish_order) > 1 else None
+    last = finish_order[-1]
+    second_last = finish_order[-2] if len(finish_order) > 2 else None
+
+    teamA = set(teams[0])
+    teamB = set(teams[1])
+
+    tribute_info = []
+    blockable = False
+
+    if first in teamA and second in teamA:
+        tribute_info.append({'from': last, 'to': first})
+        tribute_info.append({'from': second_last, 'to': second})
+        blockable = True
+    elif first in teamA and last in teamB:
+        tribute_info.append({'from': last, 'to': first})
+        blockable = True
+    elif first in teamA and last in teamA:
+        tribute_info.append({'from': last, 'to': first})
+        blockable = True
+
+    return {
+        'tributes': tribute_info,
+        'blockable': blockable,
+        'step': 'pay',
+        'tribute_cards': {},
+        'exchange_cards': {}
+    }
+
+def determine_starting_player(room):
+    tribute_state = room.get('tribute_state')
+    finish_order = room.get('last_finish_order', [])
+    players = room.get('players', [])
+
+    if tribute_state and not tribute_state.get('blocked'):
+        tribute_cards = tribute_state.get('tribute_cards', {})
+        tributes = tribute_state.get('tributes', [])
+
+        if len(tributes) == 2:
+            # 1-2 win: compare the two tribute cards
+            from1 = tributes[0]['from']
+            from2 = tributes[1]['from']
+            card1 = tribute_cards.get(from1)
+            card2 = tribute_cards.get(from2)
+            if card1 and card2:
+                r1 = CARD_RANK_ORDER.index(getCardRank(card1))
+                r2 = CARD_RANK_ORDER.index(getCardRank(card2))
+                if r1 > r2:
+                    return from1
+                elif r2 > r1:
+                    return from2
+                else:
+                    # Tie: let them decide — fallback to first
+                    return from1
+        elif len(tributes) == 1:
+            # 1-3 or 1-4: only one payer
+            return tributes[0]['from']
+
+    # Tribute blocked or no tribute — fallback to first finisher
+    if finish_order:
+        return finish_order[0]
+    return players[0] if players else None
+
+
+class GameState:
+    """Rules engine for one room.  Every command returns a list of Events."""
+    __slots__ = ('room_id', 'room')
+
+    def __init__(self, room_id, room):
+        self.room_id = room_id
+        self.room = room
+
+    @classmethod
+    def new(cls, players, settings=None, room_id="local"):
+        return cls(room_id, new_room(players, settings))
+
+    def deliver(self, events):
+        """Events as they should go out: per player for the hand events in privateHands rooms,
+        game_update as deltas in deltaUpdates rooms, one frame per player in batchEvents rooms."""
+        room = self.room
+        return coalesce(room, delta_events(room, private_events(room, events)))
+
+    def run(self, method, *args):
+        """Events from the command `method` by name; single-event queries come back as a list too."""
+        result = getattr(self, method)(*args)
+        return result if isinstance(result, list) else [result] if result else []
+
+    def emits(self, events, sender=None, sender_sid=None):
+        """Delivered events as (name, payload, to) for socketio.emit: to is the room id for
+        broadcasts, else the player's sid (sender_sid, when given, for replies to the sender)."""
+        room = self.room
+        sids = room.get('sids', {})
+        out = []
+        for event in self.deliver(events):
+            # Binary clients get MessagePack for the hand/update events (game/wire.py)
+            for to, payload in wire_payloads(room, event):
+                if to is None:
+                    out.append((event.name, payload, self.room_id))
+                    continue
+                sid = sender_sid if to == sender and sender_sid else sids.get(to)
+                if sid:
+                    out.append((event.name, payload, sid))
+        return out
+
+    def snapshot_event(self, username):
+        """Full game_snapshot for a player that missed deltas (deltaUpdates rooms)."""
+        return snapshot_event(self.room, username)
+
+    @property
+    def game(self):
+        return self.room.get('game')
+
+    @property
+    def hands(self):
+        return self.room.get('hands', {})
+
+    # --- queries
+    def player_is_finished(self, player):
+        return len(self.room['hands'][player]) == 0
+
+    def finished_players(self):
+        return [p for p in self.room['game']['players'] if self.player_is_finished(p)]
+
+    def next_player_with_cards(self, start_idx):
+        players = self.room['game']['players']
+        num_players = len(players)
+        for offset in range(1, num_players+1):
+            idx = (start_idx + offset) % num_players
+            if len(self.room['hands'][players[idx]]) > 0:
+                return idx
+        return None
+
+    def bombs(self, player):
+        """Every bomb in player's hand, weakest first (indexed on demand, not kept on the room)."""
+        return game_context(self.game).bomb_index(self.hands[player]).bombs()
+
+    def current_player(self):
+        game = self.game
+        return game['players'][game['turn_index']] if game else None
+
+    def last_play_type(self):
+        game = self.game
+        classified = game.get('classified_play')
+        if classified:
+            return classified.type
+        last_play = game.get('current_play')
+        if last_play and last_play.get('cards'):
+            hand_info = game_context(game).classify(last_play['cards'])
+            if hand_info:
+                return hand_info[0]
+        return None
+
+    # --- event builders
+    def all_hands_event(self):
+        return Event("all_hands", {"hands": hands_payload(self.room, self.room['players'])})
+
+    def room_update_event(self):
+        return Event('room_update', room_update_payload(self.room_id, self.room))
+
+    def game_update_event(self, current_player, play_type=None, can_end_round=False):
+        room = self.room
+        game = room['game']
+        return Event('game_update', {
+            'current_play': game['current_play'],
+            'last_play_type': play_type,
+            'hands': hands_payload(room),
+            'current_player': current_player,
+            'can_end_round': can_end_round,
+            'passed_players': list(game.get('passes', [])),
+            'levels': room["levels"],
+            'teams': room["teams"],
+            'slots': room["slots"],
+            'trumpSuit': game.get("trumpSuit"),
+            'levelRank': game.get("levelRank"),
+            'wildCards': game.get("wildCards"),
+            'startingLevels': game.get("startingLevels"),
+            'finished_players': self.finished_players(),
+            'finish_order': game.get('finish_order', [])
+        })
+
+    # --- round flow
+    def start_round(self, deck=None):
+        """Deal a new round (start_new_game_round).  deck defaults to a fresh shuffle."""
+        room = self.room
+        slots = room["slots"]
+        players = [u for u in slots if u]
+        room["players"] = players
+        if deck is None:
+            deck = create_deck()
+            shuffle_deck(deck)
+        hands = deal_cards(deck, num_players=len(players))
+
+        room.setdefault('hands', {})
+        for player, hand in zip(players, hands):
+            room['hands'][player] = Hand(hand)
+
+        starting_levels = room["settings"].get("startingLevels", ["2", "2", "2", "2"])
+        levels = room.get("levels", {})
+        if not levels or any(lv not in LEVEL_SEQUENCE for lv in levels.values()):
+            levels = {}
+            for i, player in enumerate(slots):
+                if player:
+                    levels[player] = starting_levels[i]
+        room["levels"] = levels
+        teams = get_teams_from_slots(slots)
+        room["teams"] = teams
+
+        winning_team = room.get("winning_team", teams[0])
+        team_lvls = [levels[p] for p in winning_team]
+        current_level = min(team_lvls, key=lambda lv: LEVEL_SEQUENCE.index(lv))
+        trump_suit = room["settings"].get("trumpSuit", "hearts")
+        wild_cards = room["settings"].get("wildCards", True)
+        room['round_number'] = room.get('round_number', 0) + 1
+        turn_index = 0
+
+        game = Game(
+            players=players,
+            turn_index=turn_index,
+            current_play=None,
+            classified_play=None,
+            round_active=True,
+            passes=[],
+            current_winner=None,
+            finish_order=room.get("finish_order", []),
+            trumpSuit=trump_suit,
+            levelRank=current_level,
+            wildCards=wild_cards,
+            startingLevels=starting_levels,
+            round_number=room['round_number'],
+            context=round_context(current_level, trump_suit, wild_cards)
+        )
+        room['game'] = game
+        room['ace_attempts'] = {0: 0, 1: 0}
+        room.pop('tribute_state', None)
+
+        events = [Event('game_started', {
+            "roomId": self.room_id,
+            "current_player": players[turn_index],
+            "levels": levels,
+            "teams": teams,
+            "slots": slots,
+            "settings": wire(room["settings"]),
+            "trumpSuit": trump_suit,
+            "levelRank": current_level,
+            "wildCards": wild_cards,
+            "startingLevels": starting_levels,
+            "hands": hands_payload(room, players)
+        }), self.room_update_event(), self.all_hands_event()]
+
+        # Only trigger tribute phase after the first round
+        log.debug("[DEBUG] round_number: %s (should call tribute phase if >1)", room['round_number'])
+        if room['round_number'] > 1:
+            events.extend(self.start_tribute())
+        return events
+
+    def deal_hand(self, username):
+        """A client asking for its hand (deal_hand)."""
+        room = self.room
+        events = []
+        if room.get('hands', {}).get(username):
+            events.append(Event('deal_hand', {
+                'username': username,
+                'hand': hand_to_wire(room['hands'][username])
+            }))
+        dealt = room.setdefault('dealt_players', [])
+        if username not in dealt:
+            dealt.append(username)
+        return events
+
+    def start_trick(self, winner_username):
+        """Clear the table and give the lead to winner (or the next player holding cards)."""
+        room = self.room
+        game = room['game']
+        players = game['players']
+        idx = players.index(winner_username)
+        num_players = len(players)
+        next_player = None
+        for i in range(num_players):
+            candidate = players[(idx + i) % num_players]
+            if len(room['hands'][candidate]) > 0:
+                next_player = candidate
+                break
+        game['turn_index'] = players.index(next_player) if next_player else 0
+        game['current_play'] = None
+        game['classified_play'] = None
+        game['passes'] = []
+        game['current_winner'] = next_player
+
+        log.debug("[EMIT game_update] Called from start_new_trick, next_player: %s", next_player)
+        return [Event('game_update', {
+            'current_play': None,
+            'last_play_type': None,
+            'hands': hands_payload(room),
+            'current_player': next_player,
+            'can_end_round': False,
+            'passed_players': [],
+            'levels': room["levels"],
+            'teams': room["teams"],
+            'slots': room["slots"],
+            'trumpSuit': game.get("trumpSuit"),
+            'levelRank': game.get("levelRank"),
+            'wildCards': game.get("wildCards"),
+            'startingLevels': game.get("startingLevels")
+        })]
+
+    def play(self, username, cards):
+        room = self.room
+        game = room.get('game')
+        if not game:
+            return [Event('error_msg', "Game not active.", username)]
+
+        if username != game['players'][game['turn_index']]:
+            return [Event('error_msg', "Not your turn!", username)]
+
+        player_hand = room['hands'][username]
+
+        # --- VALIDATE HAND TYPE FIRST ---
+        ctx = game_context(game)
+        this_play = ctx.classify_play(username, cards)
+        if not this_play:
+            return [Event('error_msg', "Invalid hand type!", username)]
+
+        prev_play = game['current_play']
+        if prev_play and prev_play['cards']:
+            prev_classified = game.get('classified_play') or ctx.classify_play(prev_play['player'], prev_play['cards'])
+
+            # Bombs beat any non-bomb; otherwise type, length and rank must line up
+            if not prev_classified or not beats_classified(prev_classified, this_play):
+                return [Event('error_msg', "Your play must beat the previous hand.", username)]
+
+        # --- Take the cards from the hand, covering missing ones with wilds ---
+        removed_cards = ctx.take(player_hand, cards)
+        if removed_cards is None:
+            return [Event('error_msg', "You do not have the cards you're trying to play.", username)]
+
+        log.info("[PLAY_CARDS] %s played: %s | Type: %s", username, cards, this_play.type)
+        events = [self.all_hands_event()]
+
+        game['current_play'] = this_play.to_dict()
+        game['classified_play'] = this_play
+        game['passes'] = []
+        game['current_winner'] = username
+        play_type_label = this_play.type
+
+        if len(player_hand) == 0 and username not in game['finish_order']:
+            game['finish_order'].append(username)
+            partner = partner_of(room["teams"], username)
+            log.info("[FINISH] %s has finished. New current_winner is %s", username, partner)
+            game['current_winner'] = partner
+
+        teams = room['teams']
+        finished = self.finished_players()
+        team_a_done = all(p in finished for p in teams[0])
+        team_b_done = all(p in finished for p in teams[1])
+
+        if team_a_done or team_b_done:
+            log.info("[END OF HAND] %s ended the hand.", username)
+            events.append(self.game_update_event(None, play_type_label))
+            events.extend(self.end_hand())
+            return events
+
+        next_idx = self.next_player_with_cards(game['turn_index'])
+        if next_idx is not None:
+            game['turn_index'] = next_idx
+            log.debug("[NEXT TURN] current_player: %s, current_winner: %s",
+                      game['players'][next_idx], game.get('current_winner'))
+            events.append(self.game_update_event(game['players'][next_idx], play_type_label))
+        else:
+            log.debug("[NEXT TURN] No next player found, emitting null update")
+            events.append(self.game_update_event(None, play_type_label))
+        return events
+
+    def pass_(self, username):
+        room = self.room
+        game = room.get('game')
+        if not game or username != game['players'][game['turn_index']]:
+            return [Event('error_msg', "Invalid pass action", username)]
+
+        if username not in game.setdefault('passes', []):
+            game['passes'].append(username)
+
+        winner = game.get('current_winner')
+        players_in = set(p for p in game['players'] if not self.player_is_finished(p))
+        non_passed = players_in - set(game['passes'])
+        log.debug("[PASS] %s passed; winner %s, passes %s, still in %s",
+                  username, winner, game['passes'], non_passed)
+
+        # Nobody has played yet (winner None): passing just moves the lead on
+        if winner is not None and (len(non_passed) == 0 or (len(non_passed) == 1 and winner in non_passed)):
+            # Trick is over: the winner (or their partner if the winner is out) may end it
+            if self.player_is_finished(winner):
+                current = partner_of(room["teams"], winner)
+            else:
+                current = winner
+            log.debug("[TRICK ENDS] %s may end the round.", current)
+            return [self.game_update_event(current, self.last_play_type(), can_end_round=True)]
+
+        next_idx = self.next_player_with_cards(game['turn_index'])
+        if next_idx is not None:
+            game['turn_index'] = next_idx
+            return [self.game_update_event(game['players'][next_idx], self.last_play_type())]
+        log.debug("[FALLBACK] No next player found.")
+        return [self.game_update_event(None)]
+
+    def end_trick(self, username):
+        """The trick winner (or their partner once the winner is out) clears the table."""
+        game = self.game
+        winner = game.get('current_winner') if game else None
+        if not game or not game.get('can_end_round', True) or winner is None:
+            return [Event('error_msg', "You can't end the round", username)]
+
+        if username == winner:
+            return self.start_trick(username)
+
+        if self.player_is_finished(winner):
+            for team in self.room["teams"]:
+                if winner in team and username in team and username != winner:
+                    return self.start_trick(username)
+
+        return [Event('error_msg', "Only the current winner or their partner (if finished) can end the round", username)]
+
+    def end_hand(self):
+        """Score the finished hand (handle_end_of_hand) and drop the game."""
+        room = self.room
+        game = room['game']
+        finish_order = game.get("finish_order", [])
+
+        result = handle_end_of_trick(room)
+        result["slots"] = room.get("slots", [None, None, None, None])
+        log.info("[ROUND SUMMARY] Sending to frontend: %s", result)
+
+        # Face-card levels (J, Q, K, A) are ordered by LEVEL_SEQUENCE, not int()
+        team_levels = [room["levels"].get(p, "2") for p in room["teams"][0]]
+        result["round_number"] = room["round_number"]
+        result["level_rank"] = min(team_levels, key=level_index)
+
+        events = [Event("round_summary", {
+            "roomId": self.room_id,
+            "finishOrder": finish_order,
+            "result": result
+        })]
+
+        room['last_finish_order'] = list(game.get('finish_order', []))
+        del room["game"]
+        return events
+
+    # --- tribute
+    def start_tribute(self):
+        """Open the tribute phase after a round (initiate_tribute_phase)."""
+        room = self.room
+        last_finish_order = room.get("last_finish_order") or room.get("game", {}).get("finish_order", [])
+        if not last_finish_order or len(last_finish_order) < 2:
+            log.info("[TRIBUTE] No valid finish order; skipping tribute phase.")
+            return []
+
+        teams = room["teams"]
+        teamA = set(teams[0])
+        teamB = set(teams[1])
+        players = room["players"]
+        hands = room.get("hands", {})
+
+        tribute_state = TributeState(
+            step="pay",
+            payers=[],
+            recipients=[],
+            tributes=[],
+            tribute_cards={},
+            exchange_cards={},
+            return_cards={},
+            blockable=False,
+            blocked=False,
+            type="",
+            info="",
+        )
+
+        first, second = last_finish_order[0], last_finish_order[1]
+        same_team_win = (first in teamA and second in teamA) or (first in teamB and second in teamB)
+
+        if same_team_win:
+            # 1-2 WIN: Both losers pay tribute
+            winners = [first, second]
+            losers = [p for p in players if p not in winners]
+
+            if len(losers) != 2:
+                log.error("[TRIBUTE ERROR] Expected exactly 2 losers, got: %s", losers)
+                return []
+
+            tribute_state["payers"] = losers
+            tribute_state["recipients"] = winners
+            tribute_state["tributes"] = [
+                {"from": losers[0], "to": winners[0]},
+                {"from": losers[1], "to": winners[1]}
+            ]
+            tribute_state["blockable"] = True
+            tribute_state["type"] = "1-2"
+            tribute_state["info"] = "Both losers must pay tribute to 1st and 2nd place players."
+
+            # Block tribute if each loser has one red joker
+            red_joker_holders = [p for p in losers if "JoR" in hands.get(p, [])]
+            blocked = len(red_joker_holders) == 2
+        else:
+            # 1-3 or 1-4 WIN: Only last-place loser pays tribute
+            last = last_finish_order[-1]
+            tribute_state["payers"] = [last]
+            tribute_state["recipients"] = [first]
+            tribute_state["tributes"] = [{"from": last, "to": first}]
+            tribute_state["blockable"] = True
+
+            tribute_type = "1-3" if len(set(last_finish_order[:3])) == 3 else "1-4"
+            tribute_state["type"] = tribute_type
+            tribute_state["info"] = "Last place must pay tribute to 1st place player."
+
+            # Block tribute if last player has TWO red jokers
+            blocked = hands.get(last, []).count("JoR") >= 2
+
+        if blocked:
+            log.info("[TRIBUTE BLOCKED] Red jokers held. Tribute canceled.")
+            tribute_state["step"] = "blocked"
+            tribute_state["blocked"] = True
+
+        room["tribute_state"] = tribute_state
+        log.info("[TRIBUTE] Tribute phase started. State: %s", tribute_state)
+        return [Event("tribute_start", tribute_state.to_wire())]
+
+    def pay_tribute(self, from_player, card):
+        tribute_state = self.room.get('tribute_state')
+        if not tribute_state:
+            return []
+
+        tribute_state['tribute_cards'][from_player] = card
+        log.info("[TRIBUTE PAY] %s paid tribute with %s", from_player, card)
+
+        tribute_givers = [t['from'] for t in tribute_state['tributes']]
+        if all(p in tribute_state['tribute_cards'] for p in tribute_givers):
+            tribute_state['step'] = 'return'
+            return [Event('tribute_prompt_return', {'tribute_state': wire(tribute_state)})]
+        return [Event('tribute_update', {'tribute_state': wire(tribute_state)})]
+
+    def return_tribute(self, from_player, to_player, card):
+        room = self.room
+        tribute_state = room.get('tribute_state')
+        if not tribute_state:
+            log.error("[RETURN ERROR] No tribute state found for room %s", self.room_id)
+            return []
+
+        # Store the card returned by recipient
+        tribute_state['exchange_cards'][from_player] = {'to': to_player, 'card': card}
+        log.info("[RETURN TRIBUTE] Stored return: %s -> %s: %s", from_player, to_player, card)
+
+        # Wait until all tribute recipients (the 'to' players) have returned cards
+        tribute_recipients = [t['to'] for t in tribute_state['tributes']]
+        if not all(r in tribute_state['exchange_cards'] for r in tribute_recipients):
+            return [Event('tribute_update', {'tribute_state': wire(tribute_state)})]
+
+        tribute_state['step'] = 'done'
+        hands = room['hands']
+
+        # --- Check for 1-2 tribute tie and trigger choice flow ---
+        if tribute_state['type'] == "1-2" and len(tribute_state['tributes']) == 2:
+            t1 = tribute_state['tributes'][0]
+            t2 = tribute_state['tributes'][1]
+            card1 = tribute_state['tribute_cards'].get(t1['from'])
+            card2 = tribute_state['tribute_cards'].get(t2['from'])
+
+            if card1 and card2 and getCardRank(card1) == getCardRank(card2):
+                # Tie detected — the 1st place player chooses which tribute to keep
+                tribute_state['step'] = 'choose'
+                tribute_state['tie_cards'] = [
+                    {'from': t1['from'], 'to': t1['to'], 'card': card1},
+                    {'from': t2['from'], 'to': t2['to'], 'card': card2}
+                ]
+                tribute_state['chooser'] = t1['to']
+                log.info("[TRIBUTE CHOICE] Tie detected. Prompting %s to choose tribute.", t1['to'])
+                return [Event('tribute_prompt_choice', {'tribute_state': wire(tribute_state)})]
+
+        events = []
+        for t in tribute_state['tributes']:
+            payer = t['from']
+            recipient = t['to']
+            tribute_card = tribute_state['tribute_cards'].get(payer)
+            return_entry = tribute_state['exchange_cards'].get(recipient)
+
+            if not tribute_card or not return_entry:
+                log.error("[TRIBUTE ERROR] Missing tribute or return for: %s", payer)
+                continue
+
+            return_card = return_entry['card']
+            if tribute_card == return_card:
+                continue
+
+            try:
+                swap_cards(hands, payer, tribute_card, recipient, return_card)
+            except Exception as e:
+                log.error("[TRIBUTE ERROR] Card transfer failed: %s", e)
+                events.append(Event("error_msg", f"Card transfer failed: {e}"))
+
+        # Set starting player AFTER tribute
+        starting_player = determine_starting_player(room)
+        log.info("[STARTING PLAYER] After tribute: %s", starting_player)
+        room['game']['turn_index'] = room['players'].index(starting_player)
+
+        events.append(Event('tribute_complete', {
+            'tribute_state': wire(tribute_state),
+            'hands': hands_payload(room)
+        }))
+        events.append(self.game_update_event(starting_player))
+        room['tribute_state'] = None
+        return events
+
+    def choose_tribute(self, chosen_card):
+        """The 1st place player picks a tribute card after a 1-2 tie."""
+        room = self.room
+        tribute_state = room.get('tribute_state')
+        if not tribute_state:
+            log.error("[CHOICE ERROR] No tribute state found for room %s", self.room_id)
+            return []
+
+        chooser = tribute_state.get('chooser')
+        tie_cards = tribute_state.get('tie_cards', [])
+
+        if not chooser or not tie_cards or not chosen_card:
+            log.error("[CHOICE ERROR] Invalid tribute choice state.")
+            return []
+
+        chosen_entry = next((t for t in tie_cards if t['card'] == chosen_card), None)
+        # Both payers may have given the same card, so pick "the other" by entry
+        other_entry = next((t for t in tie_cards if t is not chosen_entry), None)
+        if not chosen_entry or not other_entry:
+            log.error("[CHOICE ERROR] Could not match chosen card.")
+            return []
+
+        hands = room['hands']
+        second_place = other_entry['to']
+        return_card_1 = tribute_state['exchange_cards'].get(chooser, {}).get('card')
+        return_card_2 = tribute_state['exchange_cards'].get(second_place, {}).get('card')
+        try:
+            swap_cards(hands, chosen_entry['from'], chosen_entry['card'], chooser, return_card_1)
+        except ValueError as e:
+            log.error("[CHOICE ERROR] Card transfer failed: %s", e)
+            return [Event("error_msg", f"Card swap failed: {e}")]
+        try:
+            swap_cards(hands, other_entry['from'], other_entry['card'], second_place, return_card_2)
+        except ValueError as e:
+            # Both exchanges happen or neither: give the first one back
+            swap_cards(hands, chosen_entry['from'], return_card_1, chooser, chosen_entry['card'])
+            log.error("[CHOICE ERROR] Card transfer failed: %s", e)
+            return [Event("error_msg", f"Card swap failed: {e}")]
+
+        tribute_state['step'] = 'done'
+        log.info("[TRIBUTE FINALIZED] %s chose %s. Tribute complete.", chooser, chosen_card)
+        room['tribute_state'] = None
+
+        return [Event('tribute_complete', {
+            'tribute_state': wire(tribute_state),
+            'hands': hands_payload(room)
+        }), self.game_update_event(chooser)]
@@ -0,0 +1,17 @@
+# guandan-backend/game/events.py
+
+"""Outgoing message type shared by the engine and the delivery layers."""
+
+
+class Event:
+    """One outgoing message.  to=None goes to the whole room, otherwise to that player."""
+    __slots__ = ('name', 'data', 'to')
+
+    def __init__(self, name, data, to=None):
+        self.name = name
+        self.data = data
+        self.to = to
+
+    def __repr__(self):
+        target = "room" if self.to is None else self.to
+        return f"Event({self.name!r} -> {target})"
@@ -1,45 +1,92 @@
-from collections import Counter
+from .cards import (
+    CARD_FACE,
+    CARD_IS_JOKER,
+    CARD_RANK,
+    CARD_SUIT,
+    JOKER_B,
+    JOKER_R,
+    NUM_RANKS,
+    RANK_INDEX,
+    RANK_NAMES,
+    SUIT_INDEX,
+    SUIT_NAMES,
+    encode_card,
+    encode_cards,
+    wild_face,
+)
 
 RANK_ORDER = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2']
 SUIT_ORDER = ['clubs', 'diamonds', 'hearts', 'spades']
 JOKERS = ['JoB', 'JoR']
 
+# rank_index() keeps its historical joker values (100, 101)
+_RANK_POSITION = {r: i for i, r in enumerate(RANK_ORDER)}
+_RANK_POSITION.update({j: 100 + i for i, j in enumerate(JOKERS)})
+
+BOMB_PRIORITY = {
+    'bomb': 1,
+    'straight_flush': 2,
+    'joker_bomb': 3
+}
+
+# Comparison keys (see hand_key) pack three fields into one int:
+#   bits 16+   bomb tier    0 = not a bomb, then BOMB_PRIORITY
+#   bits 8-15  group        TYPE_CODES[type] << 4 | length, 0 for bombs
+#   bits 0-7   strength     rank, lifted for wild and joker plays
+# Bombs are ordered by tier then rank only; bomb size does not outrank.
+TYPE_CODES = {
+    'single': 1,
+    'pair': 2,
+    'triple': 3,
+    'full_house': 4,
+    'straight': 5,
+    'tube': 6,
+    'plate': 7,
+}
+KEY_TIER_SHIFT = 16
+KEY_GROUP_SHIFT = 8
+WILD_STRENGTH = NUM_RANKS                   # wild plays rank above natural ones...
+JOKER_STRENGTH = NUM_RANKS + len(RANK_NAMES)  # ...and below plain joker plays
+
 def parse_card(card):
-    if card in JOKERS:
-        return {'rank': card, 'suit': None}
-    if len(card) == 2:
-        rank, suit = card[0], card[1]
-    elif len(card) == 3:
-        rank, suit = card[:2], card[2]
-    else:
-        raise ValueError("Bad card: " + card)
-    suit_map = {'C':'clubs','D':'diamonds','H':'hearts','S':'spades'}
-    return {'rank': rank, 'suit': suit_map[suit.upper()]}
+    cid = encode_card(card)
+    suit = CARD_SUIT[cid]
+    return {'rank': RANK_NAMES[CARD_RANK[cid]], 'suit': SUIT_NAMES[suit] if suit >= 0 else None}
 
 def card_rank(card):  # Returns rank str
-    return parse_card(card)['rank']
+    return RANK_NAMES[CARD_RANK[encode_card(card)]]
 
 def card_suit(card):  # Returns suit str or None
-    return parse_card(card)['suit']
+    suit = CARD_SUIT[encode_card(card)]
+    return SUIT_NAMES[suit] if suit >= 0 else None
 
 def rank_index(rank):
-    if rank in JOKERS:
-        return 100 + JOKERS.index(rank)
-    return RANK_ORDER.index(rank)
+    try:
+        return _RANK_POSITION[rank]
+    except KeyError:
+        raise ValueError(f"{rank!r} is not a rank")
 
 def is_consecutive(ranks):
     idxs = [rank_index(r) for r in ranks]
     return all(b == a + 1 for a, b in zip(idxs, idxs[1:]))
 
 def is_wild(card, level_rank=None, trump_suit=None, wild_cards_enabled=False):
-    if not wild_cards_enabled or not level_rank or not trump_suit:
-        return False
-    parsed = parse_card(card)
-    return parsed['rank'] == level_rank and parsed['suit'] == trump_suit
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    return wf is not None and CARD_FACE[encode_card(card)] == wf
 
 def find_wilds(hand, level_rank, trump_suit, wild_cards_enabled):
     """Return a list of cards in hand that are wilds for this level/trump/wild setting."""
-    return [c for c in hand if is_wild(c, level_rank, trump_suit, wild_cards_enabled)]
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    if wf is None:
+        return []
+    return [c for c in hand if encode_card(c) == wf]
+
+def find_wild_ids(ids, level_rank, trump_suit, wild_cards_enabled):
+    """find_wilds() for a list of card ids."""
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    if wf is None:
+        return []
+    return [c for c in ids if CARD_FACE[c] == wf]
 
 def card_is_trump(card, level_rank, trump_suit, wild_cards_enabled):
     """A card is trump if:
@@ -48,16 +95,15 @@ def card_is_trump(card, level_rank, trump_suit, wild_cards_enabled):
       - OR its rank is the level rank
       - OR it is a wild (which means trump_suit + level_rank)
     """
-    if card in JOKERS:
-        return True
-    parsed = parse_card(card)
-    if parsed['suit'] == trump_suit:
-        return True
-    if parsed['rank'] == level_rank:
+    return card_is_trump_id(encode_card(card), level_rank, trump_suit, wild_cards_enabled)
+
+def card_is_trump_id(cid, level_rank, trump_suit, wild_cards_enabled):
+    """card_is_trump() for a card id. A wild is always trump suit, so it needs no extra check."""
+    if CARD_IS_JOKER[cid]:
         return True
-    if is_wild(card, level_rank, trump_suit, wild_cards_enabled):
+    if CARD_SUIT[cid] == SUIT_INDEX.get(trump_suit):
         return True
-    return False
+    return CARD_RANK[cid] == RANK_INDEX.get(level_rank)
 
 def normalize_hand(cards, level_rank=None, trump_suit=None, wild_cards_enabled=False):
     """For move validation, treat wilds as any needed rank/suit except joker."""
@@ -74,109 +120,107 @@ def hand_type(cards, level_rank=None, trump_suit=None, wild_cards_enabled=False)
     """Return (type_string, main_rank, extra) or None if invalid"""
     if not cards or len(cards) == 0:
         return None
+    try:
+        ids = encode_cards(cards)
+    except ValueError:
+        return None
+    return hand_type_ids(ids, level_rank, trump_suit, wild_cards_enabled)
 
-    ranks = []
-    wilds = []
-    normal_cards = []
-    for c in cards:
-        if is_wild(c, level_rank, trump_suit, wild_cards_enabled):
-            wilds.append(c)
-        else:
-            normal_cards.append(c)
-            ranks.append(card_rank(c))
+def hand_type_ids(ids, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """hand_type() for a list of card ids (see game/cards.py)."""
+    n = len(ids)
+    if n == 0:
+        return None
 
-    counter = Counter(ranks)
-    unique = list(counter.keys())
+    wf = wild_face(level_rank, trump_suit, wild_cards_enabled)
+    counts = [0] * len(RANK_NAMES)
+    wilds = 0
+    suits = set()  # suits of the non-wild, non-joker cards
+    for c in ids:
+        if CARD_FACE[c] == wf:
+            wilds += 1
+            continue
+        r = CARD_RANK[c]
+        counts[r] += 1
+        if r < NUM_RANKS:
+            suits.add(CARD_SUIT[c])
 
     # --- Joker Bomb (exactly 2 JoB + 2 JoR)
-    if sorted(cards) == ["JoB", "JoB", "JoR", "JoR"]:
+    if n == 4 and counts[JOKER_B] == 2 and counts[JOKER_R] == 2:
         return ("joker_bomb", "JoR", None)
 
     # --- Bombs (4–10 of a kind, wilds allowed)
-    if 4 <= len(cards) <= 10:
-        for r in RANK_ORDER[::-1]:
-            existing = counter.get(r, 0)
-            needed = len(cards) - existing
-            if 0 <= needed <= len(wilds):
-                return ("bomb", r, "wild" if needed > 0 else None)
+    if 4 <= n <= 10:
+        for r in range(NUM_RANKS - 1, -1, -1):
+            needed = n - counts[r]
+            if needed <= wilds:
+                return ("bomb", RANK_NAMES[r], "wild" if needed > 0 else None)
+
+    present = [r for r in range(len(RANK_NAMES)) if counts[r]]
 
     # --- Single
-    if len(cards) == 1:
-        if len(wilds) == 1:
+    if n == 1:
+        if wilds == 1:
             return ("single", level_rank, "wild")
-        return ("single", ranks[0], None)
+        return ("single", RANK_NAMES[present[0]], None)
 
     # --- Pair
-    if len(cards) == 2:
-        if len(wilds) == 2:
+    if n == 2:
+        if wilds == 2:
             return ("pair", level_rank, "wild")
-        elif len(wilds) == 1:
-            other_rank = card_rank(normal_cards[0])
-            if other_rank == level_rank:
+        elif wilds == 1:
+            if RANK_NAMES[present[0]] == level_rank:
                 return ("pair", level_rank, "wild")
-        elif len(unique) == 1:
-            return ("pair", ranks[0], None)
+        elif len(present) == 1:
+            return ("pair", RANK_NAMES[present[0]], None)
 
     # --- Triple
-    if len(cards) == 3:
-        if len(wilds) > 0 and len(unique) == 1:
-            return ("triple", unique[0], "wild")
-        elif len(wilds) > 0 and len(unique) == 0:
+    if n == 3:
+        if wilds > 0 and len(present) == 1:
+            return ("triple", RANK_NAMES[present[0]], "wild")
+        elif wilds > 0 and len(present) == 0:
             return ("triple", level_rank, "wild")
-        elif len(unique) == 1 and sum(counter.values()) == 3:
-            return ("triple", unique[0], None)
-
-    # --- Full House
-    if len(cards) == 5:
-        for triple_candidate in RANK_ORDER[::-1]:
-            need_triple = 3 - counter.get(triple_candidate, 0)
-            if 0 <= need_triple <= len(wilds):
-                remaining_wilds = len(wilds) - need_triple
-                for pair_candidate in RANK_ORDER:
-                    if pair_candidate == triple_candidate:
+        elif len(present) == 1:
+            return ("triple", RANK_NAMES[present[0]], None)
+
+    if n == 5:
+        # --- Full House
+        for t in range(NUM_RANKS - 1, -1, -1):
+            need_triple = 3 - counts[t]
+            if 0 <= need_triple <= wilds:
+                remaining_wilds = wilds - need_triple
+                for p in range(NUM_RANKS):
+                    if p == t:
                         continue
-                    need_pair = 2 - counter.get(pair_candidate, 0)
+                    need_pair = 2 - counts[p]
                     if 0 <= need_pair <= remaining_wilds:
-                        return ("full_house", triple_candidate, pair_candidate)
-    
-    # --- Straight Flush
-    if len(cards) == 5:
-        suits = [card_suit(c) for c in normal_cards if card_rank(c) in RANK_ORDER]
-        ranks = [card_rank(c) for c in normal_cards if card_rank(c) in RANK_ORDER]
-        wild_count = len(wilds)
-        if len(set(suits)) == 1:  # same suit
-            for i in range(len(RANK_ORDER) - 4):
-                seq = RANK_ORDER[i:i+5]
-                missing = [r for r in seq if r not in ranks]
-                if len(missing) <= wild_count:
-                    return ("straight_flush", seq[-1], None)
-
-    # --- Straight (natural order, 5 cards, wilds can fill gaps)
-    if len(cards) == 5:
-        candidates = [card_rank(c) for c in normal_cards if c not in JOKERS and card_rank(c) in RANK_ORDER]
-        for i in range(len(RANK_ORDER) - 4):
-            seq = RANK_ORDER[i:i + 5]
-            missing = [r for r in seq if r not in candidates]
-            if len(missing) <= len(wilds):
-                return ("straight", seq[-1], None)
-
-    # --- Tube: 3 consecutive pairs (6 cards)
-    if len(cards) == 6:
-        counts = Counter([card_rank(c) for c in normal_cards])
-        for i in range(len(RANK_ORDER) - 2):
-            seq = RANK_ORDER[i:i + 3]
-            needed = sum(max(0, 2 - counts.get(r, 0)) for r in seq)
-            if needed <= len(wilds):
-                return ("tube", seq[-1], None)
-
-    # --- Plate: 2 consecutive triples (6 cards)
-    if len(cards) == 6:
-        counts = Counter([card_rank(c) for c in normal_cards])
-        for i in range(len(RANK_ORDER) - 1):
-            seq = RANK_ORDER[i:i + 2]
-            needed = sum(max(0, 3 - counts.get(r, 0)) for r in seq)
-            if needed <= len(wilds):
-                return ("plate", seq[-1], None)
+                        return ("full_house", RANK_NAMES[t], RANK_NAMES[p])
+
+        # --- Straight Flush
+        if len(suits) == 1:
+            for i in range(NUM_RANKS - 4):
+                missing = sum(1 for r in range(i, i + 5) if not counts[r])
+                if missing <= wilds:
+                    return ("straight_flush", RANK_NAMES[i + 4], None)
+
+        # --- Straight (natural order, 5 cards, wilds can fill gaps)
+        for i in range(NUM_RANKS - 4):
+            missing = sum(1 for r in range(i, i + 5) if not counts[r])
+            if missing <= wilds:
+                return ("straight", RANK_NAMES[i + 4], None)
+
+    if n == 6:
+        # --- Tube: 3 consecutive pairs (6 cards)
+        for i in range(NUM_RANKS - 2):
+            needed = sum(max(0, 2 - counts[r]) for r in range(i, i + 3))
+            if needed <= wilds:
+                return ("tube", RANK_NAMES[i + 2], None)
+
+        # --- Plate: 2 consecutive triples (6 cards)
+        for i in range(NUM_RANKS - 1):
+            needed = sum(max(0, 3 - counts[r]) for r in range(i, i + 2))
+            if needed <= wilds:
+                return ("plate", RANK_NAMES[i + 1], None)
 
     return None
 
@@ -186,60 +230,57 @@ def beats(prev, curr, level_rank=None, trump_suit=None, wild_cards_enabled=False
     if prev is None or prev.get('cards') is None or not prev['cards']:
         return True  # anything can start
 
-    prev_type = hand_type(prev['cards'], level_rank, trump_suit, wild_cards_enabled)
-    curr_type = hand_type(curr['cards'], level_rank, trump_suit, wild_cards_enabled)
-
-    if prev_type is None or curr_type is None:
+    try:
+        prev_ids = encode_cards(prev['cards'])
+        curr_ids = encode_cards(curr['cards'])
+    except ValueError:
         return False
+    return beats_ids(prev_ids, curr_ids, level_rank, trump_suit, wild_cards_enabled)
 
-    bomb_priority = {
-        'bomb': 1,
-        'straight_flush': 2,
-        'joker_bomb': 3
-    }
-
-    prev_is_bomb = prev_type[0] in bomb_priority
-    curr_is_bomb = curr_type[0] in bomb_priority
-
-    # Joker bomb beats everything
-    if curr_type[0] == 'joker_bomb' and prev_type[0] != 'joker_bomb':
+def beats_ids(prev_ids, curr_ids, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """beats() for two lists of card ids."""
+    if not prev_ids:
         return True
 
-    # Bomb vs non-bomb
-    if curr_is_bomb and not prev_is_bomb:
-        return True
-    if not curr_is_bomb and prev_is_bomb:
-        return False
+    prev_type = hand_type_ids(prev_ids, level_rank, trump_suit, wild_cards_enabled)
+    curr_type = hand_type_ids(curr_ids, level_rank, trump_suit, wild_cards_enabled)
 
-    # Bomb vs bomb: compare type and rank
-    if curr_is_bomb and prev_is_bomb:
-        prev_rank = bomb_priority[prev_type[0]]
-        curr_rank = bomb_priority[curr_type[0]]
-        if curr_rank != prev_rank:
-            return curr_rank > prev_rank
-        else:
-            return rank_index(curr_type[1]) > rank_index(prev_type[1])
-
-    # Type mismatch (e.g. straight vs triple)
-    if prev_type[0] != curr_type[0] or len(prev['cards']) != len(curr['cards']):
+    if prev_type is None or curr_type is None:
         return False
+    return type_beats(prev_type, len(prev_ids), curr_type, len(curr_ids))
 
-    # Otherwise compare ranks (including wild handling)
-    prev_rank = prev_type[1]
-    curr_rank = curr_type[1]
-    prev_is_wild = prev_type[-1] == 'wild'
-    curr_is_wild = curr_type[-1] == 'wild'
+def type_beats(prev_type, prev_len, curr_type, curr_len):
+    """Compare two already-classified hands."""
+    return key_beats(hand_key(prev_type, prev_len), hand_key(curr_type, curr_len))
 
-    # Wild beats non-wild, unless opponent is a joker
-    if curr_is_wild and not prev_is_wild:
-        if prev_rank in ('JoB', 'JoR'):
-            return False
-        return True
-    if not curr_is_wild and prev_is_wild:
-        if curr_rank in ('JoB', 'JoR'):
-            return True
-        return False
-
-    # Compare by natural rank
-    return rank_index(curr_rank) > rank_index(prev_rank)
+def hand_key(hand_info, length):
+    """Single integer comparison key for a classified hand.
 
+    For two bombs, or a bomb and a non-bomb, curr beats prev exactly when its
+    key is larger.  Two non-bombs only compare when they share a group (same
+    type and length), i.e. key >> KEY_GROUP_SHIFT is equal.
+    """
+    kind, rank, extra = hand_info
+    tier = BOMB_PRIORITY.get(kind, 0)
+    if tier:
+        return (tier << KEY_TIER_SHIFT) | RANK_INDEX[rank]
+    group = (TYPE_CODES[kind] << 4) | length
+    r = RANK_INDEX[rank]
+    if extra == 'wild':
+        strength = WILD_STRENGTH + r
+    elif r >= NUM_RANKS:
+        strength = JOKER_STRENGTH + r - NUM_RANKS
+    else:
+        strength = r
+    return (group << KEY_GROUP_SHIFT) | strength
+
+def key_parts(key):
+    """Split a hand_key() into (tier, type_code, length, strength)."""
+    group = (key >> KEY_GROUP_SHIFT) & 0xFF
+    return (key >> KEY_TIER_SHIFT, group >> 4, group & 0xF, key & 0xFF)
+
+def key_beats(prev_key, curr_key):
+    """type_beats() for two hand_key() values."""
+    if (prev_key | curr_key) >> KEY_TIER_SHIFT:
+        return curr_key > prev_key
+    return prev_key >> KEY_GROUP_SHIFT == curr_key >> KEY_GROUP_SHIFT and curr_key > prev_key
@@ -0,0 +1,128 @@
+# guandan-backend/game/models.py
+
+"""Typed __slots__ records for room state.
+
+Room, Game, TributeState and Settings replace the nested dicts kept in
+rooms.rooms.  Each has a fixed set of fields (its __slots__) and no per-object
+__dict__ or hash table (benchmarks/mem_rooms.py reports bytes per room for
+both layouts).  They keep the mapping interface the engine was written
+against (room['hands'], game.get('passes'), 'game' in room, del room['game'],
+setdefault, pop), so rule code reads the same, but assigning a key that is
+not a declared field raises KeyError instead of silently growing the room.
+
+An unset field behaves like a missing dict key.  to_wire() gives the
+JSON-ready dict for emits; to_dict() gives the old nested-dict layout.
+"""
+
+from collections.abc import MutableMapping
+
+from .multiset import Hand, hand_to_wire
+
+
+class Model(MutableMapping):
+    """Base record: fields are the __slots__ of the subclass chain."""
+    __slots__ = ()
+    FIELDS = ()
+    WIRE_FIELDS = None   # fields sent by to_wire(); None means all of them
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(f for klass in reversed(cls.__mro__) for f in klass.__dict__.get('__slots__', ()))
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._FIELD_SET:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self._FIELD_SET and hasattr(self, key)
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        return default
+
+    def __iter__(self):
+        return (f for f in self.FIELDS if hasattr(self, f))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.items())
+        return f"{type(self).__name__}({fields})"
+
+    def to_wire(self):
+        """JSON-ready dict of the wire fields that are set."""
+        fields = self.FIELDS if self.WIRE_FIELDS is None else self.WIRE_FIELDS
+        return {f: wire(getattr(self, f)) for f in fields if hasattr(self, f)}
+
+    def to_dict(self):
+        """The nested-dict layout this record replaces (values are not copied)."""
+        return {k: v.to_dict() if isinstance(v, Model) else v for k, v in self.items()}
+
+
+def wire(value):
+    """JSON-ready form of a payload value: records via to_wire(), hands as card lists."""
+    if isinstance(value, Model):
+        return value.to_wire()
+    if isinstance(value, Hand):
+        return hand_to_wire(value)
+    if isinstance(value, dict):
+        return {k: wire(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [wire(v) for v in value]
+    return value
+
+
+class Settings(Model):
+    """Room options chosen at create_room (camelCase, as the client sends them)."""
+    __slots__ = ('cardBack', 'wildCards', 'trumpSuit', 'startingLevels', 'showCardCount',
+                 'privateHands', 'deltaUpdates', 'batchEvents')
+
+
+class TributeState(Model):
+    """Tribute phase between rounds: who pays whom, and the cards paid and returned so far."""
+    __slots__ = ('step', 'payers', 'recipients', 'tributes', 'tribute_cards', 'exchange_cards',
+                 'return_cards', 'blockable', 'blocked', 'type', 'info', 'tie_cards', 'chooser')
+
+
+class Game(Model):
+    """One round in progress."""
+    __slots__ = ('players', 'turn_index', 'current_play', 'classified_play', 'round_active', 'passes',
+                 'current_winner', 'finish_order', 'last_play_cards', 'trumpSuit', 'levelRank',
+                 'wildCards', 'startingLevels', 'round_number', 'context')
+    # classified_play and context are server-side rule objects
+    WIRE_FIELDS = ('players', 'turn_index', 'current_play', 'round_active', 'passes', 'current_winner',
+                   'finish_order', 'trumpSuit', 'levelRank', 'wildCards', 'startingLevels', 'round_number')
+
+
+class Room(Model):
+    """A lobby and, once started, its game.  Keyed by room id in rooms.rooms."""
+    __slots__ = ('settings', 'players', 'slots', 'ready', 'hands', 'levels', 'teams',
+                 'players_data', 'sids', 'connected_sids', 'encodings', 'dealt_players',
+                 'game', 'tribute_state', 'round_number', 'finish_order', 'last_finish_order',
+                 'winning_team', 'win_type', 'level_up', 'ace_attempts', 'update_streams')
+    # Hands and socket ids are private; game state goes out through game_update
+    WIRE_FIELDS = ('settings', 'players', 'slots', 'ready', 'levels', 'teams')
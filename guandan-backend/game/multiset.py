@@ -0,0 +1,143 @@
+# guandan-backend/game/multiset.py
+
+"""Player hand container.
+
+Hand is a multiset of card strings that keeps the order cards were dealt in
+(what clients display).  Cards live in a slot list; removing one blanks its
+slot, so contains/count/remove are O(1) instead of list.index scans.  The
+blanks are squeezed out lazily.  Where each card sits is kept in one
+108-byte table - two entries per face (cards.py), one per copy - rather than
+a dict per hand, which keeps thousands of dealt hands small.  A hand can
+only hold the 54 faces of the two decks, at most two copies of each.
+"""
+
+from .cards import CARD_NAME, NUM_FACES
+
+# Card string -> index of its first copy in a Hand's position table
+_FIRST = {name: 2 * i for i, name in enumerate(CARD_NAME[:NUM_FACES])}
+_MAX_SLOTS = 255   # slot index + 1 has to fit a byte
+
+
+class Hand:
+    __slots__ = ('_slots', '_positions', '_size', '_wire')
+
+    def __init__(self, cards=()):
+        self._slots = []
+        self._positions = bytearray(2 * NUM_FACES)   # slot index + 1 per copy, 0 when not held
+        self._size = 0
+        self._wire = None
+        for card in cards:
+            self.append(card)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return (c for c in self._slots if c is not None)
+
+    def __contains__(self, card):
+        i = _FIRST.get(card)
+        return i is not None and self._positions[i] != 0
+
+    def __eq__(self, other):
+        if isinstance(other, Hand):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Hand({self.to_list()!r})"
+
+    def count(self, card):
+        i = _FIRST.get(card)
+        if i is None or not self._positions[i]:
+            return 0
+        return 2 if self._positions[i + 1] else 1
+
+    def append(self, card):
+        i = _FIRST.get(card)
+        if i is None:
+            raise ValueError(f"{card!r} is not a card")
+        slots = self._slots
+        if len(slots) >= _MAX_SLOTS:
+            self._compact()
+            slots = self._slots
+        positions = self._positions
+        if positions[i]:
+            i += 1
+            if positions[i]:
+                raise ValueError(f"hand already holds both {card}")
+        slots.append(card)
+        positions[i] = len(slots)
+        self._size += 1
+        self._wire = None
+
+    def remove(self, card):
+        """Remove one copy of card; ValueError if it is not held (like list.remove)."""
+        i = _FIRST.get(card)
+        positions = self._positions
+        if i is None or not positions[i]:
+            raise ValueError(f"{card} not in hand")
+        if positions[i + 1]:
+            i += 1
+        self._slots[positions[i] - 1] = None
+        positions[i] = 0
+        self._size -= 1
+        self._wire = None
+        if len(self._slots) > 2 * self._size + 16:
+            self._compact()
+
+    def take(self, cards, wild=None):
+        """Remove cards, using a wild for any card not held.
+
+        Returns the cards actually removed, or None (hand untouched) if the
+        hand cannot cover the play.
+        """
+        used = {}
+        taken = []
+        for card in cards:
+            if self.count(card) > used.get(card, 0):
+                pick = card
+            elif wild is not None and self.count(wild) > used.get(wild, 0):
+                pick = wild
+            else:
+                return None
+            used[pick] = used.get(pick, 0) + 1
+            taken.append(pick)
+        for card in taken:
+            self.remove(card)
+        return taken
+
+    def to_list(self):
+        """Cards in display order. The list is cached until the hand changes; don't mutate it."""
+        if self._wire is None:
+            self._wire = [c for c in self._slots if c is not None]
+        return self._wire
+
+    def _compact(self):
+        cards = self.to_list()
+        self._slots = []
+        self._positions = bytearray(2 * NUM_FACES)
+        self._size = 0
+        for card in cards:
+            self.append(card)
+
+
+def hand_to_wire(hand):
+    """JSON-ready list for a Hand (or a plain list of cards)."""
+    if isinstance(hand, Hand):
+        return hand.to_list()
+    return list(hand)
+
+
+def swap_cards(hands, a, card_a, b, card_b):
+    """a gives card_a to b and b gives card_b to a, or nothing moves (ValueError)."""
+    if card_a not in hands[a]:
+        raise ValueError(f"{a} does not hold {card_a}")
+    if card_b not in hands[b]:
+        raise ValueError(f"{b} does not hold {card_b}")
+    hands[a].remove(card_a)
+    hands[b].remove(card_b)
+    hands[a].append(card_b)
+    hands[b].append(card_a)
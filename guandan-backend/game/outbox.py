@@ -0,0 +1,74 @@
+# guandan-backend/game/outbox.py
+
+"""Coalescing of the events one inbound message produces.
+
+A single command usually fans out into several emits (start_round sends
+game_started, room_update, all_hands and maybe tribute_start; a play can send
+game_update plus round_summary).  In rooms created with the batchEvents
+setting, coalesce() turns them into one 'batch' frame per player, holding
+that player's events (room-wide and private) in their original order as
+[name, data] pairs.  A player with a single event gets it unwrapped.
+
+Frames go to each player's registered socket, so batching only applies once
+every player has a sid; until then the events pass through unchanged.
+BATCH_STATS counts events in, frames out and merged emits per event name;
+rooms run on parallel worker threads, so it is only touched under _STATS_LOCK.
+"""
+
+import threading
+from collections import Counter
+
+from .events import Event
+
+BATCH_STATS = Counter()
+_STATS_LOCK = threading.Lock()
+
+
+def coalesce(room, events):
+    """Per-player 'batch' frames for events in batchEvents rooms."""
+    if not room.get('settings', {}).get('batchEvents') or len(events) < 2:
+        return events
+    players = room.get('players', [])
+    sids = room.get('sids', {})
+    if not players or any(p not in sids for p in players):
+        return events
+
+    frames = {p: [] for p in players}
+    others = []
+    for event in events:
+        if event.to is None:
+            for frame in frames.values():
+                frame.append(event)
+        elif event.to in frames:
+            frames[event.to].append(event)
+        else:
+            others.append(event)
+
+    out = []
+    merged = Counter()
+    for player, frame in frames.items():
+        if len(frame) == 1:
+            out.append(Event(frame[0].name, frame[0].data, player))
+        elif frame:
+            out.append(Event('batch', {'events': [[e.name, e.data] for e in frame]}, player))
+            for e in frame:
+                merged['merged:' + e.name] += 1
+    out.extend(others)
+
+    merged['events_in'] = len(events)
+    merged['frames_out'] = len(out)
+    with _STATS_LOCK:
+        BATCH_STATS.update(merged)
+    return out
+
+
+def batch_stats():
+    """Counters as a plain dict, merged counts grouped by event name."""
+    with _STATS_LOCK:
+        stats = dict(BATCH_STATS)
+    merged = {k.split(':', 1)[1]: v for k, v in stats.items() if k.startswith('merged:')}
+    return {
+        'events_in': stats.get('events_in', 0),
+        'frames_out': stats.get('frames_out', 0),
+        'merged': merged,
+    }
@@ -0,0 +1,65 @@
+# guandan-backend/game/plays.py
+
+"""Classified plays.
+
+A Play is built once when a play is accepted and kept on the game as
+game['classified_play'], so later comparisons and passes never have to
+classify the previous hand again.
+"""
+
+from .classify import hand_cache
+from .hands import KEY_GROUP_SHIFT, hand_key, key_beats
+
+
+class Play:
+    __slots__ = ('player', 'cards', 'type', 'rank', 'extra', 'wild', 'key')
+
+    def __init__(self, player, cards, hand_info, key=None):
+        self.player = player
+        self.cards = list(cards)
+        self.type, self.rank, self.extra = hand_info
+        self.wild = self.extra == 'wild'
+        self.key = hand_key(hand_info, len(self.cards)) if key is None else key
+
+    @property
+    def hand_info(self):
+        return (self.type, self.rank, self.extra)
+
+    def to_dict(self):
+        """The {'player', 'cards'} shape stored in game['current_play']."""
+        return {'player': self.player, 'cards': list(self.cards)}
+
+    def __repr__(self):
+        return f"Play({self.player!r}, {self.cards!r}, {self.hand_info!r})"
+
+
+def classify_play(player, cards, level_rank=None, trump_suit=None, wild_cards_enabled=False):
+    """Return a Play for cards, or None if they are not a valid hand."""
+    hand_info = hand_cache.classify(cards, level_rank, trump_suit, wild_cards_enabled)
+    if hand_info is None:
+        return None
+    return Play(player, cards, hand_info)
+
+
+def beats_classified(prev, curr):
+    """True if Play curr beats Play prev (None means curr leads)."""
+    if prev is None:
+        return True
+    return key_beats(prev.key, curr.key)
+
+
+def sort_plays(plays, reverse=False):
+    """Order Plays weakest first (bombs after everything else)."""
+    return sorted(plays, key=lambda p: p.key, reverse=reverse)
+
+
+def bucket_plays(plays):
+    """Group Plays that can be compared with each other.
+
+    Non-bombs are bucketed by type and length, bombs by tier; each bucket is
+    sorted weakest first.
+    """
+    buckets = {}
+    for p in sort_plays(plays):
+        buckets.setdefault(p.key >> KEY_GROUP_SHIFT, []).append(p)
+    return buckets
@@ -3,9 +3,18 @@
 import random
 import string
 from .words import WORDS  # If you use word-based room IDs
+from .models import Room, Settings
+from .multiset import Hand
 
 rooms = {}
 
+# Secondary indexes over rooms, kept in step by the helpers below so lookups
+# by username or socket never scan every room:
+#   user_index[username] = {room_id: seat}   (a name may be seated in several rooms)
+#   sid_index[sid] = room_id   (sids in a room's connected_sids or sids map)
+user_index = {}
+sid_index = {}
+
 def generate_room_id():
     # Try to find a unique ID with no repeated words
     for _ in range(10):
@@ -27,21 +36,22 @@ def create_room(username, card_back, wild_cards):
         room_id = generate_room_id()
     slots = initial_slots()
     slots[0] = username  # host always gets slot 0 by default
-    rooms[room_id] = {
-        "settings": {
-            "cardBack": card_back,
-            "wildCards": wild_cards,
-            "trumpSuit": "hearts",
-            "startingLevels": ["2", "2", "2", "2"],
-            "showCardCount": False
-        },
-        "slots": slots,
-        "ready": {username: False},
-        "hands": {},
-        "levels": {},
-        "teams": get_teams_from_slots(slots),
-        "sids": {}  # ✅ Track session IDs for tribute handling
-    }
+    rooms[room_id] = Room(
+        settings=Settings(
+            cardBack=card_back,
+            wildCards=wild_cards,
+            trumpSuit="hearts",
+            startingLevels=["2", "2", "2", "2"],
+            showCardCount=False
+        ),
+        slots=slots,
+        ready={username: False},
+        hands={},
+        levels={},
+        teams=get_teams_from_slots(slots),
+        sids={}  # ✅ Track session IDs for tribute handling
+    )
+    seat_user(room_id, username, 0)
     print(f"[rooms.py] Room {room_id} created with slots {slots} and settings {rooms[room_id]['settings']}")
     return room_id
 
@@ -55,6 +65,7 @@ def join_room(username, room_id):
     for i in range(4):
         if not slots[i]:
             slots[i] = username
+            seat_user(room_id, username, i)
             rooms[room_id]["ready"][username] = False
             rooms[room_id]["teams"] = get_teams_from_slots(slots)
             print(f"[rooms.py] {username} joined room {room_id} at slot {i}")
@@ -93,7 +104,7 @@ def get_ready_states(room_id):
 def set_player_hand(room_id, username, hand):
     if room_id in rooms:
         rooms[room_id].setdefault('hands', {})
-        rooms[room_id]['hands'][username] = hand
+        rooms[room_id]['hands'][username] = Hand(hand)
 
 def get_player_hand(room_id, username):
     if room_id in rooms and 'hands' in rooms[room_id]:
@@ -110,14 +121,104 @@ def move_seat(room_id, username, slot_idx):
         if slots[i] == username:
             slots[i] = None
     slots[slot_idx] = username
+    seat_user(room_id, username, slot_idx)
     rooms[room_id]["teams"] = get_teams_from_slots(slots)
     return True
 
 # ✅ Register a user's Socket.IO session ID for direct messaging
 def register_sid(room_id, username, sid):
     if room_id in rooms:
-        rooms[room_id].setdefault("sids", {})[username] = sid
+        old = rooms[room_id].setdefault("sids", {}).get(username)
+        rooms[room_id]["sids"][username] = sid
+        if old and old != sid:
+            _forget_sid(room_id, old)
+        attach_sid(room_id, sid)
 
 # ✅ Optional: retrieve a sid
 def get_sid(room_id, username):
     return rooms.get(room_id, {}).get("sids", {}).get(username)
+
+
+# --- username / sid indexes
+
+def seat_user(room_id, username, seat):
+    user_index.setdefault(username, {})[room_id] = seat
+
+def find_user(username):
+    """(room_id, seat) of the room the user was last seated in, or None."""
+    seats = user_index.get(username)
+    if not seats:
+        return None
+    return next(reversed(seats.items()))
+
+def user_rooms(username):
+    """{room_id: seat} for every room the user is seated in."""
+    return dict(user_index.get(username, {}))
+
+def attach_sid(room_id, sid):
+    """Record a socket as connected to room_id (moving it off any other room)."""
+    current = sid_index.get(sid)
+    if current is not None and current != room_id:
+        detach_sid(sid)
+    connected = rooms[room_id].setdefault("connected_sids", [])
+    if sid not in connected:
+        connected.append(sid)
+    sid_index[sid] = room_id
+
+def _forget_sid(room_id, sid):
+    # An sid is indexed while the room still lists it anywhere
+    room = rooms.get(room_id)
+    if room is None or (sid not in room.get("connected_sids", []) and sid not in room.get("sids", {}).values()):
+        if sid_index.get(sid) == room_id:
+            del sid_index[sid]
+
+def detach_sid(sid):
+    """Forget a disconnected socket; returns its room_id (or None) and whether the room is now empty."""
+    room_id = sid_index.pop(sid, None)
+    room = rooms.get(room_id)
+    if room is None:
+        return room_id, False
+    connected = room.get("connected_sids", [])
+    while sid in connected:
+        connected.remove(sid)
+    sids = room.get("sids", {})
+    for username in [u for u, s in sids.items() if s == sid]:
+        del sids[username]
+    return room_id, not connected
+
+def drop_room(room_id):
+    """Delete a room and every index entry pointing at it."""
+    room = rooms.pop(room_id, None)
+    if room is None:
+        return
+    for username in room.get("slots", []):
+        seats = user_index.get(username) if username else None
+        if seats and seats.pop(room_id, None) is not None and not seats:
+            del user_index[username]
+    for sid in list(room.get("connected_sids", [])) + list(room.get("sids", {}).values()):
+        if sid_index.get(sid) == room_id:
+            del sid_index[sid]
+
+def check_indexes():
+    """List of inconsistencies between rooms and the indexes (empty when they agree)."""
+    problems = []
+    for room_id, room in rooms.items():
+        for seat, username in enumerate(room.get("slots", [])):
+            indexed = user_index.get(username, {}).get(room_id) if username else None
+            if username and indexed != seat:
+                problems.append(f"{username} at {room_id}[{seat}] indexed at seat {indexed}")
+        for sid in list(room.get("connected_sids", [])) + list(room.get("sids", {}).values()):
+            if sid_index.get(sid) != room_id:
+                problems.append(f"sid {sid} of {room_id} indexed as {sid_index.get(sid)}")
+    for username, seats in user_index.items():
+        if not seats:
+            problems.append(f"index keeps {username} with no rooms")
+        for room_id, seat in seats.items():
+            slots = rooms.get(room_id, {}).get("slots", [])
+            if seat >= len(slots) or slots[seat] != username:
+                problems.append(f"index puts {username} at {room_id}[{seat}], which is {slots[seat] if seat < len(slots) else None}")
+    for sid, room_id in sid_index.items():
+        room = rooms.get(room_id)
+        if room is None or (sid not in room.get("connected_sids", []) and sid not in room.get("sids", {}).values()):
+            problems.append(f"index puts sid {sid} in {room_id}, which does not list it")
+    return problems
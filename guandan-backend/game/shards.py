@@ -0,0 +1,401 @@
+# guandan-backend/game/shards.py
+
+"""Rooms owned by worker processes, placed by consistent hashing.
+
+The other way to scale out (game/store.py) shares every room through Redis
+and pays a lock/load/save round trip per command.  Here each room has one
+owner instead: a ShardWorker that keeps it in plain memory, runs its
+GameState commands and hands back the finished emits.  The front process
+(app.py with SHARDS set) keeps the sockets and acts as the router: a
+ShardRouter hashes the room id onto a HashRing, forwards the command to the
+owning shard and emits what comes back.
+
+    router = ShardRouter.spawn(4)            # four worker processes
+    router.adopt(room_id, room)              # hand a room to its owner
+    for name, payload, to in router.dispatch(room_id, 'play', (username, cards), username, sid):
+        socketio.emit(name, payload, room=to)
+
+The front keeps its lobby copy of an adopted room for the lobby handlers.
+Each side writes only its own fields, and the two are synced per field:
+update() pushes what the front changes (ready states, seats, socket ids),
+and game_fields() fetches what games change (GAME_FIELDS: players, teams,
+levels), so lobby messages never show a stale copy.
+
+Adding or removing a shard (in app.py, POST /shards and DELETE
+/shards/<name>) changes the owner of about 1/N of the rooms;
+those (and only those) are migrated, pickled out of the old owner and into
+the new one, while the router lock holds back dispatches to them.  A shard
+handles one request at a time, so a command that reached the old owner just
+before the move is included in what gets moved; one that finds its room gone
+is retried on the new owner.
+
+stats() gives rooms and events per shard, with events/sec over the last
+RATE_WINDOW seconds.
+"""
+
+import bisect
+import hashlib
+import itertools
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Connection
+
+from .engine import GameState
+
+VNODES = 128          # ring points per shard; more points, more even spread
+RATE_WINDOW = 10.0    # seconds of history behind events_per_sec
+
+# GameState methods a shard will run for the router
+COMMANDS = frozenset(('start_round', 'deal_hand', 'all_hands_event', 'snapshot_event', 'play', 'pass_',
+                      'end_trick', 'pay_tribute', 'return_tribute', 'choose_tribute'))
+# Requests that return None when the room is not on the shard
+RETRIED = frozenset(('command', 'update', 'game_fields', 'in_game'))
+# Room fields games change that the front's lobby copy reads
+GAME_FIELDS = ('players', 'teams', 'levels', 'dealt_players')
+
+
+def _point(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hashing of room ids onto shard names."""
+
+    def __init__(self, nodes=(), vnodes=VNODES):
+        self.vnodes = vnodes
+        self.nodes = []
+        self._points = []     # sorted hash points
+        self._owners = []     # shard name at each point
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            raise ValueError(f"shard {node!r} is already on the ring")
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = _point(f"{node}#{i}")
+            at = bisect.bisect(self._points, point)
+            self._points.insert(at, point)
+            self._owners.insert(at, node)
+
+    def remove(self, node):
+        self.nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def owner(self, room_id):
+        if not self._points:
+            raise LookupError("no shards on the ring")
+        at = bisect.bisect(self._points, _point(room_id)) % len(self._points)
+        return self._owners[at]
+
+    def copy(self):
+        ring = HashRing(vnodes=self.vnodes)
+        ring.nodes = list(self.nodes)
+        ring._points = list(self._points)
+        ring._owners = list(self._owners)
+        return ring
+
+
+class ShardWorker:
+    """The rooms one shard owns, and the requests the router sends it."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.events = 0
+
+    def handle(self, op, args):
+        return getattr(self, 'op_' + op)(*args)
+
+    def op_adopt(self, room_id, data):
+        self.rooms[room_id] = pickle.loads(data)
+
+    def op_release(self, room_id):
+        """Pickled room, removed from this shard (None if it is not here)."""
+        room = self.rooms.pop(room_id, None)
+        return None if room is None else pickle.dumps(room, pickle.HIGHEST_PROTOCOL)
+
+    def op_drop(self, room_id):
+        self.rooms.pop(room_id, None)
+
+    def op_update(self, room_id, fields):
+        """True once set, or None if the room is not on this shard."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+        for name, value in fields.items():
+            room[name] = value
+        return True
+
+    def op_game_fields(self, room_id):
+        """GAME_FIELDS the room has, or None if it is not on this shard."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+        return {name: room[name] for name in GAME_FIELDS if name in room}
+
+    def op_in_game(self, room_id):
+        """Whether the room has a hand in progress, or None if it is not on this shard."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+        return 'game' in room
+
+    def op_command(self, room_id, method, args, sender=None, sender_sid=None):
+        """Emits for one GameState command, or None if the room is not on this shard."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+        if method not in COMMANDS:
+            raise ValueError(f"unknown room command {method!r}")
+        state = GameState(room_id, room)
+        emits = state.emits(state.run(method, *args), sender, sender_sid)
+        self.events += len(emits)
+        return emits
+
+    def op_stats(self):
+        return {'rooms': len(self.rooms), 'events': self.events}
+
+
+class LocalShard:
+    """A ShardWorker in this process (for tests and single-process runs)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.worker = ShardWorker()
+        self._lock = threading.Lock()
+
+    def request(self, op, *args):
+        with self._lock:
+            return self.worker.handle(op, args)
+
+    def close(self):
+        pass
+
+
+def _serve(inbox, outbox):
+    worker = ShardWorker()
+    while True:
+        try:
+            message = inbox.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        op, args = message
+        try:
+            outbox.send((True, worker.handle(op, args)))
+        except Exception as exc:
+            outbox.send((False, exc))
+
+
+class ProcessShard:
+    """A ShardWorker in its own process (python -m game.shards), spoken to over two pipes.
+
+    A fresh interpreter rather than multiprocessing, so the child never
+    re-imports app.py (and its Socket.IO server and background tasks).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        child_in, parent_out = os.pipe()
+        parent_in, child_out = os.pipe()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.process = subprocess.Popen([sys.executable, "-m", "game.shards", str(child_in), str(child_out)],
+                                        cwd=root, pass_fds=(child_in, child_out))
+        os.close(child_in)
+        os.close(child_out)
+        self._out = Connection(parent_out, readable=False)
+        self._in = Connection(parent_in, writable=False)
+        self._lock = threading.Lock()
+
+    def request(self, op, *args):
+        with self._lock:
+            self._out.send((op, args))
+            ok, value = self._in.recv()
+        if not ok:
+            raise value
+        return value
+
+    def close(self):
+        with self._lock:
+            try:
+                self._out.send(None)
+            except OSError:
+                pass
+            self._out.close()
+            self._in.close()
+        try:
+            self.process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class RateMeter:
+    """Events per second over a sliding window of one-second buckets."""
+
+    def __init__(self, window=RATE_WINDOW, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.buckets = deque()   # [second, count]
+
+    def add(self, count):
+        second = int(self.clock())
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += count
+        else:
+            self.buckets.append([second, count])
+        self._trim(second)
+
+    def _trim(self, now):
+        while self.buckets and self.buckets[0][0] <= now - self.window:
+            self.buckets.popleft()
+
+    def rate(self):
+        self._trim(int(self.clock()))
+        return sum(count for _, count in self.buckets) / self.window
+
+
+class ShardRouter:
+    """Front router: owner lookup, command forwarding, migration and per-shard stats."""
+
+    def __init__(self, shards=(), vnodes=VNODES, clock=time.monotonic):
+        self.shards = {}
+        self.ring = HashRing(vnodes=vnodes)
+        self.placed = set()          # room ids handed to shards
+        self.meters = {}
+        self.migrated = 0
+        self.clock = clock
+        self._lock = threading.RLock()
+        for shard in shards:
+            self.shards[shard.name] = shard
+            self.ring.add(shard.name)
+            self.meters[shard.name] = RateMeter(clock=clock)
+
+    @classmethod
+    def spawn(cls, count, **kwargs):
+        """A router over `count` new worker processes."""
+        return cls([ProcessShard(f"s{i}") for i in range(count)], **kwargs)
+
+    def owns(self, room_id):
+        return room_id in self.placed
+
+    def owner(self, room_id):
+        with self._lock:
+            return self.ring.owner(room_id)
+
+    def adopt(self, room_id, room):
+        """Hand a room (the lobby's record) to its owner shard."""
+        data = pickle.dumps(room, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.shards[self.ring.owner(room_id)].request('adopt', room_id, data)
+            self.placed.add(room_id)
+
+    def drop(self, room_id):
+        with self._lock:
+            if room_id in self.placed:
+                self.placed.discard(room_id)
+                self.shards[self.ring.owner(room_id)].request('drop', room_id)
+
+    def update(self, room_id, fields):
+        """Set room fields the front changed (a {name: value} dict) on the owner's copy."""
+        self._send(room_id, 'update', room_id, fields)
+
+    def game_fields(self, room_id):
+        """The owner's current GAME_FIELDS for the room ({} if it has none)."""
+        return self._send(room_id, 'game_fields', room_id)[0] or {}
+
+    def in_game(self, room_id):
+        """Whether the owner's copy of the room has a hand in progress."""
+        return bool(self._send(room_id, 'in_game', room_id)[0])
+
+    def dispatch(self, room_id, method, args=(), sender=None, sender_sid=None):
+        """Run a GameState command on the room's owner; returns its (name, payload, to) emits."""
+        emits, name = self._send(room_id, 'command', room_id, method, tuple(args), sender, sender_sid)
+        if emits is None:
+            return []
+        meter = self.meters.get(name)
+        if meter:
+            meter.add(len(emits))
+        return emits
+
+    def _send(self, room_id, op, *args):
+        """Request on the room's owner; returns (result, shard name)."""
+        while True:
+            with self._lock:
+                name = self.ring.owner(room_id)
+                shard = self.shards[name]
+            result = shard.request(op, *args)
+            # A request that finds no room raced a migration: ask the new owner
+            if result is not None or op not in RETRIED or self.owner(room_id) == name:
+                return result, name
+
+    def add_shard(self, shard):
+        """Put a shard on the ring and move over the rooms it now owns; returns their ids."""
+        with self._lock:
+            old = self.ring.copy()
+            self.shards[shard.name] = shard
+            self.meters[shard.name] = RateMeter(clock=self.clock)
+            self.ring.add(shard.name)
+            return self._migrate(old)
+
+    def spawn_shard(self):
+        """Start one more worker process under the next free name; returns (name, moved room ids)."""
+        with self._lock:
+            name = next(f"s{i}" for i in itertools.count() if f"s{i}" not in self.shards)
+            return name, self.add_shard(ProcessShard(name))
+
+    def remove_shard(self, name):
+        """Move a shard's rooms to their new owners and take it off the ring; returns their ids."""
+        with self._lock:
+            if name not in self.shards:
+                raise KeyError(name)
+            if len(self.shards) == 1:
+                raise ValueError("cannot remove the last shard")
+            old = self.ring.copy()
+            self.ring.remove(name)
+            moved = self._migrate(old)
+            shard = self.shards.pop(name)
+            self.meters.pop(name)
+        shard.close()
+        return moved
+
+    def _migrate(self, old_ring):
+        moved = []
+        for room_id in sorted(self.placed):
+            before, after = old_ring.owner(room_id), self.ring.owner(room_id)
+            if before == after:
+                continue
+            data = self.shards[before].request('release', room_id)
+            if data is not None:
+                self.shards[after].request('adopt', room_id, data)
+            moved.append(room_id)
+        self.migrated += len(moved)
+        return moved
+
+    def stats(self):
+        """Rooms, events and events/sec per shard."""
+        with self._lock:
+            shards = dict(self.shards)
+            meters = dict(self.meters)
+        per_shard = {}
+        for name, shard in shards.items():
+            counts = shard.request('stats')
+            per_shard[name] = {'rooms': counts['rooms'], 'events': counts['events'],
+                               'events_per_sec': round(meters[name].rate(), 2)}
+        return {'shards': per_shard, 'rooms': len(self.placed), 'migrated': self.migrated}
+
+    def close(self):
+        for shard in self.shards.values():
+            shard.close()
+
+
+if __name__ == "__main__":
+    _serve(Connection(int(sys.argv[1]), writable=False), Connection(int(sys.argv[2]), readable=False))
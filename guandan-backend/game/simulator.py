@@ -0,0 +1,320 @@
+# guandan-backend/game/simulator.py
+
+"""Monte Carlo self-play.
+
+Plays complete matches through the headless GameState engine (same dealing,
+hand rules, level scoring and tribute rules as the server) with pluggable
+player policies, spread over a process pool.  Each worker gets its own
+random.Random seeded from --seed, so a run is reproducible for a given seed
+and worker count.
+
+    python -m game.simulator --matches 200 --workers 4
+    python -m game.simulator --matches 50 --no-wild-cards --policy greedy random greedy random
+"""
+
+import abc
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .deck import create_deck
+from .engine import LEVEL_SEQUENCE, GameState, level_index, partner_of
+from .hands import KEY_TIER_SHIFT
+
+PLAYERS = ["p1", "p2", "p3", "p4"]
+MAX_ROUNDS = 100      # a match that has not finished by then is cut off
+MAX_STEPS = 5000      # moves per round before giving up on a stuck policy
+
+
+class Policy(abc.ABC):
+    """Base player policy.  Subclasses implement play(); tribute defaults follow the usual rules."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    @abc.abstractmethod
+    def play(self, state, player, options):
+        """Pick one of options (legal Plays, weakest first) or None to pass.  Leading must not pass."""
+
+    def tribute(self, state, player):
+        """Card to pay as tribute: the strongest card that is not a wild."""
+        ctx = state.game['context']
+        cards = [c for c in state.hands[player] if not ctx.card_is_wild(c)] or list(state.hands[player])
+        return max(cards, key=lambda c: _single_strength(ctx, c))
+
+    def return_card(self, state, player):
+        """Card to hand back for a tribute: the weakest one."""
+        ctx = state.game['context']
+        return min(state.hands[player], key=lambda c: _single_strength(ctx, c))
+
+    def choose_tribute(self, state, player, tie_cards):
+        return tie_cards[0]['card']
+
+
+def _single_strength(ctx, card):
+    play = ctx.classify_play(None, [card])
+    return play.key if play else -1
+
+
+class RandomPolicy(Policy):
+    """Any legal play, passing now and then when following."""
+    pass_rate = 0.3
+
+    def play(self, state, player, options):
+        if state.game['current_play'] is not None and self.rng.random() < self.pass_rate:
+            return None
+        return self.rng.choice(options) if options else None
+
+
+class GreedyPolicy(Policy):
+    """Shed the weakest play; keep bombs for beating opponents, never beat the partner."""
+
+    def play(self, state, player, options):
+        game = state.game
+        plain = [p for p in options if not p.key >> KEY_TIER_SHIFT]
+        if game['current_play'] is None:
+            # Lead with the weakest play of the family that sheds the most cards
+            if not plain:
+                return options[0] if options else None
+            most = max(len(p.cards) for p in plain)
+            return next(p for p in plain if len(p.cards) == most)
+        winner = game.get('current_winner')
+        if winner == partner_of(state.room['teams'], player):
+            return None
+        if plain:
+            return plain[0]
+        return options[0] if options else None
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'greedy': GreedyPolicy,
+}
+
+
+def load_policy(name):
+    """A policy class by registry name or 'module:Class'."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attr = name.partition(':')
+    return getattr(importlib.import_module(module), attr)
+
+
+def new_stats():
+    return {
+        'matches': 0,
+        'rounds': 0,
+        'unfinished_matches': 0,
+        'moves': 0,
+        'win_types': Counter(),
+        'finish_positions': {p: Counter() for p in PLAYERS},
+        'bombs': Counter(),
+        'rounds_with_bomb': 0,
+        'rounds_per_match': Counter(),
+        'level_ups': Counter(),
+        'winning_team_level': Counter(),
+        'tributes': Counter(),
+    }
+
+
+def merge_stats(total, part):
+    for key, value in part.items():
+        if isinstance(value, dict) and not isinstance(value, Counter):
+            for sub, counter in value.items():
+                total[key].setdefault(sub, Counter()).update(counter)
+        elif isinstance(value, Counter):
+            total[key].update(value)
+        else:
+            total[key] += value
+    return total
+
+
+def play_round(state, policies, rng, stats):
+    """Deal and play one round to its round_summary; returns the summary result."""
+    deck = create_deck()
+    rng.shuffle(deck)
+    events = state.start_round(deck)
+    if state.room.get('tribute_state'):
+        events = run_tribute(state, policies, stats)
+
+    update = None
+    bombs = 0
+    for _ in range(MAX_STEPS):
+        game = state.game
+        if game is None:
+            break
+        if update and update.get('can_end_round'):
+            events = state.end_trick(update['current_player'])
+        else:
+            player = game['players'][game['turn_index']]
+            ctx = game['context']
+            options = ctx.enumerate_plays(state.hands[player].to_list(), game['classified_play'])
+            choice = policies[player].play(state, player, options)
+            if choice is None and game['current_play'] is None and options:
+                choice = options[0]  # leading: passing is not allowed
+            if choice is not None:
+                events = state.play(player, choice.cards)
+                if choice.key >> KEY_TIER_SHIFT:
+                    stats['bombs'][choice.type] += 1
+                    bombs += 1
+            else:
+                events = state.pass_(player)
+            stats['moves'] += 1
+        for event in events:
+            if event.name == 'error_msg':
+                raise RuntimeError(f"engine rejected a policy move: {event.data}")
+            if event.name == 'game_update':
+                update = event.data
+            elif event.name == 'round_summary':
+                summary = event.data
+    else:
+        raise RuntimeError("round did not finish")
+
+    result = summary['result']
+    stats['rounds'] += 1
+    stats['rounds_with_bomb'] += bool(bombs)
+    stats['win_types'][result.get('win_type')] += 1
+    stats['level_ups'][state.room.get('level_up')] += 1
+    for position, player in enumerate(summary['finishOrder'], 1):
+        stats['finish_positions'][player][position] += 1
+    winners = result.get('winning_team') or []
+    if winners:
+        stats['winning_team_level'][max((result['levels'][p] for p in winners), key=level_index)] += 1
+    return result
+
+
+def run_tribute(state, policies, stats):
+    tribute = state.room['tribute_state']
+    stats['tributes']['blocked' if tribute['blocked'] else tribute['type']] += 1
+    if tribute['blocked']:
+        return []
+    events = []
+    for t in tribute['tributes']:
+        events = state.pay_tribute(t['from'], policies[t['from']].tribute(state, t['from']))
+    for t in tribute['tributes']:
+        events = state.return_tribute(t['to'], t['from'], policies[t['to']].return_card(state, t['to']))
+    if any(e.name == 'tribute_prompt_choice' for e in events):
+        chooser = tribute['chooser']
+        events = state.choose_tribute(policies[chooser].choose_tribute(state, chooser, tribute['tie_cards']))
+    return events
+
+
+def play_match(policies, rng, settings, stats, max_rounds=MAX_ROUNDS):
+    state = GameState.new(PLAYERS, settings, room_id="sim")
+    for rounds in range(1, max_rounds + 1):
+        result = play_round(state, policies, rng, stats)
+        if result.get('game_over'):
+            break
+    else:
+        stats['unfinished_matches'] += 1
+    stats['matches'] += 1
+    stats['rounds_per_match'][rounds] += 1
+    return state
+
+
+def run_worker(job):
+    """Play `matches` matches with one seeded RNG stream; returns stats."""
+    seed, matches, policy_names, settings = job
+    rng = random.Random(seed)
+    policies = {p: load_policy(name)(random.Random(rng.getrandbits(64)))
+                for p, name in zip(PLAYERS, policy_names)}
+    stats = new_stats()
+    for _ in range(matches):
+        play_match(policies, rng, settings, stats)
+    return stats
+
+
+def simulate(matches, workers=1, seed=0, policy_names=('greedy',) * 4, settings=None):
+    """Run matches split across workers; returns merged stats with timing."""
+    workers = max(1, min(workers, matches))
+    shares = [matches // workers + (i < matches % workers) for i in range(workers)]
+    jobs = [(seed * 1_000_003 + i, n, tuple(policy_names), settings or {}) for i, n in enumerate(shares)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_worker(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_worker, jobs))
+    total = new_stats()
+    for part in results:
+        merge_stats(total, part)
+    total['elapsed'] = time.perf_counter() - start
+    return total
+
+
+def report(stats, out=None):
+    out = out or sys.stdout
+    elapsed = stats['elapsed'] or 1e-9
+    rounds = stats['rounds'] or 1
+    out.write(f"{stats['matches']} matches, {stats['rounds']} rounds, {stats['moves']} moves "
+              f"in {stats['elapsed']:.1f}s ({stats['rounds'] / elapsed:.1f} rounds/s, "
+              f"{stats['matches'] / elapsed:.2f} matches/s)\n")
+    if stats['unfinished_matches']:
+        out.write(f"  {stats['unfinished_matches']} matches hit the {MAX_ROUNDS}-round cap\n")
+    out.write("win types:     " + _shares(stats['win_types'], rounds) + "\n")
+    out.write("tributes:      " + _shares(stats['tributes'], rounds) + "\n")
+    # A round ends as soon as one team is out, so the last seats often never finish
+    out.write("finish positions (1st, 2nd, 3rd, still holding cards):\n")
+    for player, counter in sorted(stats['finish_positions'].items()):
+        placed = [counter[i] for i in range(1, 4)]
+        shares = placed + [stats['rounds'] - sum(placed)]
+        out.write(f"  {player}: " + " ".join(f"{n / rounds:6.1%}" for n in shares) + "\n")
+    bombs = sum(stats['bombs'].values())
+    out.write(f"bombs:         {bombs / rounds:.2f} per round, {stats['rounds_with_bomb'] / rounds:.1%} of rounds; "
+              + _shares(stats['bombs'], bombs or 1) + "\n")
+    out.write("level ups:     " + _shares(stats['level_ups'], rounds) + "\n")
+    levels = sorted(stats['winning_team_level'].items(), key=lambda kv: level_index(kv[0]))
+    out.write("winner level:  " + " ".join(f"{lv}:{n}" for lv, n in levels) + "\n")
+    per_match = stats['rounds_per_match']
+    if per_match:
+        mean = sum(k * v for k, v in per_match.items()) / sum(per_match.values())
+        out.write(f"rounds/match:  mean {mean:.1f}, min {min(per_match)}, max {max(per_match)}\n")
+
+
+def _shares(counter, total):
+    return ", ".join(f"{k}: {v / total:.1%}" for k, v in counter.most_common())
+
+
+def to_json(stats):
+    return {k: (dict(v) if isinstance(v, Counter) else
+                {p: dict(c) for p, c in v.items()} if isinstance(v, dict) else v)
+            for k, v in stats.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play simulation of Guandan matches.")
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', nargs='+', default=['greedy'],
+                        help="policy name or module:Class, one for all seats or one per seat "
+                             f"(built in: {', '.join(POLICIES)})")
+    parser.add_argument('--no-wild-cards', action='store_true')
+    parser.add_argument('--trump-suit', default="hearts")
+    parser.add_argument('--starting-level', default="2", choices=LEVEL_SEQUENCE)
+    parser.add_argument('--json', metavar='PATH', help="also write the stats as JSON")
+    args = parser.parse_args(argv)
+
+    policy_names = args.policy * 4 if len(args.policy) == 1 else args.policy
+    if len(policy_names) != 4:
+        parser.error("--policy takes one name or four")
+    settings = {
+        "wildCards": not args.no_wild_cards,
+        "trumpSuit": args.trump_suit,
+        "startingLevels": [args.starting_level] * 4,
+    }
+    stats = simulate(args.matches, args.workers, args.seed, policy_names, settings)
+    report(stats)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(to_json(stats), f, indent=2, default=str)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# guandan-backend/game/store.py
+
+"""Where rooms live between commands.
+
+The handlers in app.py work on rooms.rooms, the process-global dict.  A room
+store decides where that dict's entries come from:
+
+MemoryStore   rooms.rooms is the store.  One worker process (the default).
+RedisStore    rooms are pickled into Redis.  Each command takes the room's
+              lock there, loads the room into rooms.rooms, runs, and writes
+              it back, so any worker can serve any room.
+
+app.py runs every room command inside store.session(room_id) (on the room's
+queue, game/actors.py), and with REDIS_URL set it also passes the URL to
+Socket.IO as its message queue, so an emit from one worker reaches sockets
+connected to the others.  open_store(url) picks the backend; a URL needs
+redis-py (pip install redis), which that message queue requires anyway.
+
+The write-back and the unlock are one Lua script (EVAL) that first checks
+the lock is still this worker's.  If a command outlived LOCK_TTL_MS and
+another worker has taken the room since, nothing is written and the session
+raises LockLost instead of overwriting the newer copy.
+
+create(room_id, room) stores a new room only if the id is free (SET NX in
+Redis), so two workers creating the same room cannot both succeed.
+
+With RedisStore, rooms.rooms is only a cache of the last loaded copies; the
+username index is rebuilt from each loaded room, so the "already in another
+room" check only sees rooms this worker has served.  Rooms are pickled, so
+the store must be trusted like the process itself.
+"""
+
+import pickle
+import time
+import uuid
+from contextlib import contextmanager
+
+from . import rooms as room_registry
+
+KEY_PREFIX = "guandan:"
+LOCK_TTL_MS = 5000     # a worker that dies mid-command frees the room after this
+LOCK_WAIT = 5.0        # seconds to wait for another worker's command
+
+# KEYS[1] lock.  Delete it if it still holds our token (ARGV[1]).
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS[1] lock, KEYS[2] room.  If the lock still holds our token (ARGV[1]),
+# write the room (ARGV[2]; delete it when there is none) and unlock.
+COMMIT_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if #ARGV > 1 then
+    redis.call('SET', KEYS[2], ARGV[2])
+else
+    redis.call('DEL', KEYS[2])
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
+class RoomLocked(TimeoutError):
+    """Another worker held the room's lock for longer than LOCK_WAIT."""
+
+
+class LockLost(RuntimeError):
+    """The room's lock expired during a command; its changes were not saved."""
+
+
+class MemoryStore:
+    """rooms.rooms itself: sessions are free and nothing is shared."""
+    shared = False
+
+    def __init__(self, local=None):
+        self.local = room_registry.rooms if local is None else local
+
+    def load(self, room_id):
+        return self.local.get(room_id)
+
+    def save(self, room_id, room):
+        self.local[room_id] = room
+
+    def create(self, room_id, room):
+        """Store room unless room_id is taken; returns whether it was stored."""
+        return self.local.setdefault(room_id, room) is room
+
+    def delete(self, room_id):
+        self.local.pop(room_id, None)
+
+    def exists(self, room_id):
+        return room_id in self.local
+
+    def room_ids(self):
+        return list(self.local)
+
+    @contextmanager
+    def session(self, room_id):
+        yield self.local.get(room_id)
+
+
+class RedisStore:
+    """Pickled rooms in Redis, one lock per room.  client: a redis-py style client."""
+    shared = True
+
+    def __init__(self, client, local=None, prefix=KEY_PREFIX, lock_ttl_ms=LOCK_TTL_MS, lock_wait=LOCK_WAIT):
+        self.client = client
+        self.local = room_registry.rooms if local is None else local
+        self.prefix = prefix
+        self.lock_ttl_ms = lock_ttl_ms
+        self.lock_wait = lock_wait
+
+    def _key(self, room_id):
+        return f"{self.prefix}room:{room_id}"
+
+    def _lock_key(self, room_id):
+        return f"{self.prefix}lock:{room_id}"
+
+    def load(self, room_id):
+        data = self.client.get(self._key(room_id))
+        return None if data is None else pickle.loads(data)
+
+    def save(self, room_id, room):
+        self.client.set(self._key(room_id), pickle.dumps(room, pickle.HIGHEST_PROTOCOL))
+
+    def create(self, room_id, room):
+        """Store room unless room_id is taken (SET NX); returns whether it was stored."""
+        if not self.client.set(self._key(room_id), pickle.dumps(room, pickle.HIGHEST_PROTOCOL), nx=True):
+            return False
+        self.local[room_id] = room
+        return True
+
+    def delete(self, room_id):
+        self.client.delete(self._key(room_id))
+
+    def exists(self, room_id):
+        return bool(self.client.exists(self._key(room_id)))
+
+    def room_ids(self):
+        skip = len(self._key(""))
+        return [k.decode()[skip:] if isinstance(k, bytes) else k[skip:]
+                for k in self.client.scan_iter(match=self._key("*"), count=500)]
+
+    def _acquire(self, room_id):
+        """Take the room's lock (SET NX PX with a random token); returns the token."""
+        key = self._lock_key(room_id)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.001
+        while not self.client.set(key, token, nx=True, px=self.lock_ttl_ms):
+            if time.monotonic() > deadline:
+                raise RoomLocked(room_id)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return token
+
+    def _release(self, room_id, token):
+        # Only release our own lock; after a TTL expiry it may belong to another worker
+        self.client.eval(RELEASE_SCRIPT, 1, self._lock_key(room_id), token)
+
+    @contextmanager
+    def lock(self, room_id):
+        """Hold the room's lock across workers; yields the lock token."""
+        token = self._acquire(room_id)
+        try:
+            yield token
+        finally:
+            self._release(room_id, token)
+
+    @contextmanager
+    def session(self, room_id):
+        """Lock, load into rooms.rooms, yield the room, then write it back (or delete it if dropped).
+
+        Raises LockLost, with nothing written, if the lock expired meanwhile.
+        """
+        token = self._acquire(room_id)
+        try:
+            room = self.load(room_id)
+            if room is None:
+                self.local.pop(room_id, None)
+            else:
+                self.local[room_id] = room
+                for seat, username in enumerate(room.get('slots') or ()):
+                    if username:
+                        room_registry.seat_user(room_id, username, seat)
+            yield room
+        except BaseException:
+            self._release(room_id, token)
+            raise
+        current = self.local.get(room_id)
+        if current is None and room is None:
+            self._release(room_id, token)
+            return
+        args = [token]
+        if current is not None:
+            args.append(pickle.dumps(current, pickle.HIGHEST_PROTOCOL))
+        keys = (self._lock_key(room_id), self._key(room_id))
+        if not self.client.eval(COMMIT_SCRIPT, 2, *keys, *args):
+            # Another worker may have changed the room since; drop our copy
+            self.local.pop(room_id, None)
+            raise LockLost(room_id)
+
+
+def connect(url):
+    """A redis-py client for url."""
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError("a Redis room store needs redis-py: pip install redis") from None
+    return redis.Redis.from_url(url)
+
+
+def open_store(url=None):
+    """MemoryStore when url is empty, otherwise a RedisStore on url."""
+    if not url:
+        return MemoryStore()
+    return RedisStore(connect(url))
@@ -0,0 +1,155 @@
+# guandan-backend/game/timers.py
+
+"""One scheduler for every delayed server action.
+
+Room expiry after the last socket leaves and the short pause before dealing
+once all sids are registered each used to get a thread of their own that
+slept until it was due.  A Scheduler keeps them in one heap instead, driven
+by a single background task (app.py starts it with
+socketio.start_background_task(scheduler.run, socketio.sleep)).
+
+Timers are keyed, e.g. ('expire', room_id) or ('deal', room_id): scheduling
+a key that is already pending reschedules it, and cancel(key) drops it.
+Cancelled and replaced entries stay in the heap until they reach the top and
+are skipped there (or the heap is rebuilt when they outnumber the live ones).
+
+stats() reports pending timers per kind (the first element of the key) and
+how late timers fired relative to their deadline.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+log = logging.getLogger(__name__)
+
+TICK = 0.05          # longest the run loop sleeps, so newly added earlier timers are noticed
+LATENESS_WINDOW = 1000
+
+
+class Scheduler:
+    """Keyed one-shot timers on a heap, fired by run() or fire_due()."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []                  # (due, seq, key)
+        self._pending = {}               # key -> (due, seq, fn, args)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.lateness = deque(maxlen=LATENESS_WINDOW)
+        self.running = False
+
+    def schedule(self, key, delay, fn, *args):
+        """Run fn(*args) in delay seconds, replacing any pending timer with this key."""
+        with self._lock:
+            due = self.clock() + delay
+            seq = next(self._seq)
+            if key in self._pending:
+                self.counts['rescheduled'] += 1
+            self._pending[key] = (due, seq, fn, args)
+            heapq.heappush(self._heap, (due, seq, key))
+            self.counts['scheduled'] += 1
+            if len(self._heap) > 2 * len(self._pending) + 64:
+                self._compact()
+            return due
+
+    def cancel(self, key):
+        """Drop the pending timer for key; True if there was one."""
+        with self._lock:
+            if self._pending.pop(key, None) is None:
+                return False
+            self.counts['cancelled'] += 1
+            return True
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def next_due(self):
+        """Deadline of the earliest live timer, or None."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _compact(self):
+        # A reschedule storm would otherwise leave the heap full of dead entries
+        self._heap = [(due, seq, key) for key, (due, seq, _, _) in self._pending.items()]
+        heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        heap, pending = self._heap, self._pending
+        while heap:
+            due, seq, key = heap[0]
+            entry = pending.get(key)
+            if entry is not None and entry[1] == seq:
+                return
+            heapq.heappop(heap)
+
+    def _pop_due(self, now):
+        with self._lock:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return None
+            due, _, key = heapq.heappop(self._heap)
+            _, _, fn, args = self._pending.pop(key)
+            return due, key, fn, args
+
+    def fire_due(self):
+        """Run every timer whose deadline has passed; returns how many ran."""
+        fired = 0
+        while True:
+            now = self.clock()
+            entry = self._pop_due(now)
+            if entry is None:
+                return fired
+            due, key, fn, args = entry
+            self.lateness.append(now - due)
+            self.counts['fired'] += 1
+            fired += 1
+            try:
+                fn(*args)
+            except Exception:
+                self.counts['errors'] += 1
+                log.exception("timer %r failed", key)
+
+    def run(self, sleep=time.sleep):
+        """Fire timers until stop(); sleep is socketio.sleep under the server."""
+        self.running = True
+        while self.running:
+            self.fire_due()
+            due = self.next_due()
+            wait = TICK if due is None else min(TICK, max(0.0, due - self.clock()))
+            sleep(wait)
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        """Pending timers by kind, lifetime counters and firing lateness in ms."""
+        with self._lock:
+            kinds = Counter(k[0] if isinstance(k, tuple) else k for k in self._pending)
+            late = sorted(self.lateness)
+        lateness = {'samples': len(late)}
+        if late:
+            lateness.update(
+                mean_ms=round(1000 * sum(late) / len(late), 3),
+                p99_ms=round(1000 * late[min(len(late) - 1, int(len(late) * 0.99))], 3),
+                max_ms=round(1000 * late[-1], 3),
+            )
+        return {
+            'pending': sum(kinds.values()),
+            'pending_by_kind': dict(kinds),
+            'scheduled': self.counts['scheduled'],
+            'rescheduled': self.counts['rescheduled'],
+            'cancelled': self.counts['cancelled'],
+            'fired': self.counts['fired'],
+            'errors': self.counts['errors'],
+            'lateness': lateness,
+        }
+
+
+scheduler = Scheduler()
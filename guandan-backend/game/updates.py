@@ -0,0 +1,141 @@
+# guandan-backend/game/updates.py
+
+"""Sequenced, delta-encoded game_update stream.
+
+In rooms created with the deltaUpdates setting, every game_update is sent as
+a game_delta instead: the next sequence number plus only the fields that
+changed since the previous update on that stream, with hands sent as the
+cards removed from / added to each hand that changed.  A client applies
+deltas in order; on a gap (or with no base at all) it asks for a
+game_snapshot, the full current payload with its sequence number.
+
+There is one stream per recipient: the whole room, or each player when hands
+are delivered privately.  Hands are multisets, so apply_delta() keeps the
+cards but not necessarily their order.
+"""
+
+from collections import Counter
+
+from .events import Event
+
+STREAMS_KEY = 'update_streams'
+
+
+def _copy(value):
+    # Payloads share dicts/lists with the live room (levels, teams, ...); keep our own
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def hand_delta(old, new):
+    """{'removed': [...], 'added': [...]} turning old into new (empty lists left out)."""
+    before, after = Counter(old), Counter(new)
+    delta = {}
+    removed = list((before - after).elements())
+    added = list((after - before).elements())
+    if removed:
+        delta['removed'] = removed
+    if added:
+        delta['added'] = added
+    return delta
+
+
+def apply_hand_delta(hand, delta):
+    hand = list(hand)
+    for card in delta.get('removed', ()):
+        hand.remove(card)
+    hand.extend(delta.get('added', ()))
+    return hand
+
+
+def diff_update(old, new):
+    """The changed parts of a game_update payload: 'set', 'unset' and 'hands'."""
+    delta = {}
+    changed = {k: v for k, v in new.items() if k != 'hands' and (k not in old or old[k] != v)}
+    if changed:
+        delta['set'] = changed
+    unset = [k for k in old if k not in new]
+    if unset:
+        delta['unset'] = unset
+    if 'hands' in new:
+        old_hands = old.get('hands') or {}
+        hands = {}
+        for player, hand in new['hands'].items():
+            if player not in old_hands:
+                hands[player] = {'added': list(hand)}
+            elif old_hands[player] != hand:
+                hands[player] = hand_delta(old_hands[player], hand)
+        gone = [p for p in old_hands if p not in new['hands']]
+        if hands:
+            delta['hands'] = hands
+        if gone:
+            delta['hands_unset'] = gone
+    return delta
+
+
+def apply_delta(state, delta):
+    """A new full payload from state and one game_delta (what a client does)."""
+    state = dict(state)
+    for key in delta.get('unset', ()):
+        state.pop(key, None)
+    state.update(delta.get('set', {}))
+    if 'hands' in delta or 'hands_unset' in delta:
+        hands = dict(state.get('hands') or {})
+        for player in delta.get('hands_unset', ()):
+            hands.pop(player, None)
+        for player, change in delta.get('hands', {}).items():
+            hands[player] = apply_hand_delta(hands.get(player, []), change)
+        state['hands'] = hands
+    return state
+
+
+class UpdateStream:
+    """Sequence number and last full payload of one recipient's update stream."""
+    __slots__ = ('seq', 'last')
+
+    def __init__(self):
+        self.seq = 0
+        self.last = None
+
+    def encode(self, to, payload):
+        """The Event carrying payload on this stream: a snapshot for the first one, then deltas."""
+        first = self.last is None
+        delta = None if first else diff_update(self.last, payload)
+        self.seq += 1
+        self.last = _copy(payload)
+        if first:
+            return self.snapshot(to)
+        delta['seq'] = self.seq
+        return Event('game_delta', delta, to)
+
+    def snapshot(self, to):
+        return Event('game_snapshot', {'seq': self.seq, 'state': self.last}, to)
+
+
+def delta_events(room, events):
+    """Replace game_update events with game_delta/game_snapshot in deltaUpdates rooms."""
+    if not room.get('settings', {}).get('deltaUpdates'):
+        return events
+    streams = room.setdefault(STREAMS_KEY, {})
+    out = []
+    for event in events:
+        if event.name == 'game_update':
+            stream = streams.get(event.to)
+            if stream is None:
+                stream = streams[event.to] = UpdateStream()
+            out.append(stream.encode(event.to, event.data))
+        else:
+            out.append(event)
+    return out
+
+
+def snapshot_event(room, username):
+    """game_snapshot for a (re)joining or desynced player, or None before the first update."""
+    streams = room.get(STREAMS_KEY, {})
+    stream = streams.get(username) or streams.get(None)
+    if stream is None or stream.last is None:
+        return None
+    return stream.snapshot(username)
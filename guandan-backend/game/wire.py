@@ -0,0 +1,98 @@
+# guandan-backend/game/wire.py
+
+"""Optional compact binary encoding for the hand, play and update events.
+
+JSON stays the default.  A client that registers with encoding 'binary'
+receives those events as one MessagePack document (a Socket.IO binary
+attachment) instead; guandan-frontend/src/wire.js decodes them.  Card lists
+under the keys in CARD_KEYS ('cards', 'hand', delta 'removed'/'added', and
+each player's list under 'hands') are packed as MessagePack extension type
+CARDS_EXT: one byte per card, the face id from cards.py.  Everything else
+uses the plain MessagePack types.
+
+MessagePack comes from the msgpack package.  It is optional for the server:
+without it only JSON is offered (ENCODINGS).
+"""
+
+from .cards import CARD_NAME, FACE_ID
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack
+    msgpack = None
+
+JSON = 'json'
+BINARY = 'binary'
+ENCODINGS = (JSON, BINARY) if msgpack is not None else (JSON,)
+BINARY_EVENTS = frozenset(('game_started', 'all_hands', 'game_update', 'game_delta', 'game_snapshot',
+                           'deal_hand', 'tribute_complete', 'batch'))
+CARD_KEYS = frozenset(('cards', 'hand', 'removed', 'added'))
+HANDS_KEY = 'hands'
+CARDS_EXT = 1
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("game.wire needs msgpack for binary frames: pip install msgpack")
+
+
+def _cards(value):
+    """CARDS_EXT for a non-empty list of card strings, else value prepared as usual."""
+    if type(value) is list and value:
+        try:
+            return msgpack.ExtType(CARDS_EXT, bytes(map(FACE_ID.__getitem__, value)))
+        except (KeyError, TypeError):
+            pass
+    return _prepare(value)
+
+
+def _prepare(obj):
+    """obj with its card lists swapped for CARDS_EXT values."""
+    if type(obj) is dict:
+        out = {}
+        for key, value in obj.items():
+            if key in CARD_KEYS:
+                out[key] = _cards(value)
+            elif key == HANDS_KEY and type(value) is dict:
+                out[key] = {player: _cards(hand) for player, hand in value.items()}
+            else:
+                out[key] = _prepare(value)
+        return out
+    if type(obj) is list or type(obj) is tuple:
+        return [_prepare(item) for item in obj]
+    return obj
+
+
+def _ext_hook(code, data):
+    if code == CARDS_EXT:
+        return [CARD_NAME[b] for b in data]
+    return msgpack.ExtType(code, data)
+
+
+def pack(obj):
+    """MessagePack bytes for a JSON-style payload, card lists packed as CARDS_EXT."""
+    _require_msgpack()
+    return msgpack.packb(_prepare(obj), use_bin_type=True)
+
+
+def unpack(data):
+    """Inverse of pack(); CARDS_EXT comes back as card strings."""
+    _require_msgpack()
+    return msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_ext_hook)
+
+
+def wire_payloads(room, event, encodings=None):
+    """[(to, payload)] for one event; to=None is a room broadcast.
+
+    Events outside BINARY_EVENTS, and every event in a room without binary
+    clients, go out unchanged.  Otherwise a room-wide event is sent per
+    player, packed once and shared by every binary client.
+    """
+    encodings = room.get('encodings', {}) if encodings is None else encodings
+    if event.name not in BINARY_EVENTS or BINARY not in encodings.values():
+        return [(event.to, event.data)]
+    if event.to is not None:
+        binary = encodings.get(event.to) == BINARY
+        return [(event.to, pack(event.data) if binary else event.data)]
+    packed = pack(event.data)
+    return [(p, packed if encodings.get(p) == BINARY else event.data) for p in room.get('players', [])]
@@ -0,0 +1,51 @@
+"""Helpers shared by the engine tests: a dealt four-player game and random legal play."""
+
+import random
+from game.deck import create_deck
+from game.engine import GameState
+
+PLAYERS = ["ann", "bob", "cat", "dan"]
+
+def shuffled_deck(seed=0):
+    """A full double deck shuffled with random.Random(seed)."""
+    deck = create_deck()
+    random.Random(seed).shuffle(deck)
+    return deck
+
+def started(settings=None, seed=0, room_id="local", sids=False):
+    """A GameState for PLAYERS dealt from shuffled_deck(seed), and its start_round events.
+    sids=True registers a socket id per player, as the server would."""
+    state = GameState.new(PLAYERS, settings, room_id=room_id)
+    if sids:
+        state.room['sids'] = {p: "sid-" + p for p in PLAYERS}
+    return state, state.start_round(shuffled_deck(seed))
+
+def random_moves(state, rng, max_steps=3000):
+    """Yield the events of random legal moves until the hand is over."""
+    update = None
+    for _ in range(max_steps):
+        game = state.game
+        if game is None:
+            return
+        if update and update.get('can_end_round'):
+            events = state.end_trick(update['current_player'])
+        else:
+            player = state.current_player()
+            options = game['context'].enumerate_plays(state.hands[player].to_list(), game['classified_play'])
+            if options and (game['current_play'] is None or rng.random() < 0.6):
+                events = state.play(player, rng.choice(options).cards)
+            else:
+                events = state.pass_(player)
+        errors = [e.data for e in events if e.name == 'error_msg']
+        assert not errors, errors
+        updates = [e.data for e in events if e.name == 'game_update']
+        update = updates[-1] if updates else update
+        yield events
+    raise AssertionError("hand did not finish")
+
+def play_random_hand(state, rng, max_steps=3000):
+    """Drive one hand with random legal moves until round_summary; returns all events."""
+    log = []
+    for events in random_moves(state, rng, max_steps):
+        log.extend(events)
+    return log
@@ -0,0 +1,117 @@
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import pytest
+from tests.helpers import PLAYERS, random_moves, started
+from game.actors import RoomQueues
+
+@pytest.fixture
+def fast_switching():
+    # Make the interpreter switch threads often, so unserialized code would interleave
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(old)
+
+def test_commands_run_in_order_and_return_results():
+    queues = RoomQueues()
+    seen = []
+    futures = [queues.submit("r1", seen.append, i) for i in range(5)]
+    assert seen == list(range(5))
+    assert all(f.done() for f in futures)
+    assert not queues.busy("r1")
+
+def test_failure_is_reported_and_queue_keeps_going():
+    queues = RoomQueues()
+    bad = queues.submit("r1", lambda: 1 / 0)
+    good = queues.submit("r1", lambda: "ok")
+    assert isinstance(bad.exception(), ZeroDivisionError)
+    assert good.result() == "ok"
+    assert queues.stats()['errors'] == 1
+
+def test_nested_submit_runs_after_current_command():
+    queues = RoomQueues()
+    seen = []
+    def outer():
+        queues.submit("r1", seen.append, "inner")
+        seen.append("outer")
+    queues.submit("r1", outer)
+    assert seen == ["outer", "inner"]
+
+def test_rooms_run_in_parallel():
+    queues = RoomQueues(ThreadPoolExecutor(2))
+    both_inside = threading.Barrier(2, timeout=5)
+    futures = [queues.submit(room, both_inside.wait) for room in ("r1", "r2")]
+    wait(futures, timeout=5)
+    # The barrier only opens if both rooms' commands were running at once
+    assert all(f.exception() is None for f in futures)
+
+def test_one_room_never_runs_two_commands(fast_switching):
+    queues = RoomQueues(ThreadPoolExecutor(8))
+    active = [0]
+    overlaps = []
+    order = []
+    def command(i):
+        active[0] += 1
+        overlaps.append(active[0])
+        order.append(i)
+        active[0] -= 1
+    def client(start):
+        for i in range(start, start + 200):
+            queues.submit("r1", command, i)
+    threads = [threading.Thread(target=client, args=(n * 1000,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    queues.submit("r1", lambda: None).result(5)
+    assert set(overlaps) == {1}
+    assert len(order) == 1600
+    # Each client's commands keep their submission order
+    for n in range(8):
+        mine = [i for i in order if n * 1000 <= i < n * 1000 + 200]
+        assert mine == sorted(mine)
+
+def test_concurrent_plays_and_passes_keep_game_consistent(fast_switching):
+    state, _ = started(seed=3)
+    room = state.room
+    queues = RoomQueues(ThreadPoolExecutor(4))
+    # Every command takes the next random legal move for whoever's turn it is,
+    # so each one is accepted however the clients' submissions interleave.
+    # A generator also refuses to be resumed while it is running, so two
+    # commands overlapping would fail the test too.
+    moves = random_moves(state, random.Random(3))
+    held = [108]
+    made = [0]
+    problems = []
+
+    def check():
+        game = room.get('game')
+        total = sum(len(h) for h in room['hands'].values())
+        if total > held[0]:
+            problems.append("cards came back into hands")
+        held[0] = total
+        if game:
+            if not 0 <= game['turn_index'] < 4:
+                problems.append(f"turn_index {game['turn_index']}")
+            if any(len(room['hands'][p]) for p in game['finish_order']):
+                problems.append("finished player still holds cards")
+
+    def act(player):
+        if next(moves, None) is not None:
+            made[0] += 1
+        check()
+
+    def client(player):
+        return [queues.submit("r1", act, player) for _ in range(300)]
+
+    with ThreadPoolExecutor(len(PLAYERS)) as clients:
+        batches = list(clients.map(client, PLAYERS))
+    futures = [f for batch in batches for f in batch]
+    wait(futures, timeout=30)
+    assert all(f.done() and f.exception() is None for f in futures)
+    assert problems == []
+    # The first command leads, and a lead always plays
+    assert made[0] > 0 and held[0] < 108
+    assert queues.stats()['run'] == 1200
@@ -0,0 +1,60 @@
+import random
+import pytest
+np = pytest.importorskip("numpy")
+from game.batch import BATCH_CODES, INVALID_KEY, batch_counts, beats_batch, classify_batch
+from game.classify import classify_counts
+from game.deck import create_deck
+from game.hands import beats, hand_key, hand_type
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+def random_counts(rng, rows):
+    counts, wilds, flush = [], [], []
+    for _ in range(rows):
+        c = [0] * 15
+        slots = rng.sample(range(15), rng.randint(1, 4))
+        for _ in range(rng.randint(1, 10)):
+            s = rng.choice(slots)
+            if c[s] < (2 if s >= 13 else 8):
+                c[s] += 1
+        counts.append(c)
+        wilds.append(rng.choice([0, 0, 1, 2]))
+        flush.append(rng.random() < 0.3)
+    return counts, wilds, flush
+
+def test_matches_classify_counts_and_hand_key():
+    rng = random.Random(15)
+    counts, wilds, flush = random_counts(rng, 20000)
+    for level in ("2", LEVEL, "A"):
+        result = classify_batch(np.array(counts), np.array(wilds), np.array(flush), level)
+        for i in range(len(counts)):
+            want = classify_counts(counts[i], wilds[i], flush[i], level)
+            assert result.hand_info(i, level) == want
+            if want:
+                assert result.keys[i] == hand_key(want, sum(counts[i]) + wilds[i])
+            else:
+                assert result.keys[i] == INVALID_KEY
+
+def test_real_hands_and_beats_match_scalar():
+    rng = random.Random(16)
+    deck = create_deck()
+    hands = [rng.sample(deck, rng.choice([1, 2, 3, 4, 5, 5, 6, 6])) for _ in range(3000)]
+    counts, wilds, flush = batch_counts(hands, LEVEL, TRUMP, WILD)
+    result = classify_batch(counts, wilds, flush, LEVEL)
+    assert [result.hand_info(i, LEVEL) for i in range(len(hands))] == [hand_type(h, LEVEL, TRUMP, WILD) for h in hands]
+    for prev in (hands[0], ["5S", "5D"], ["9S", "9D", "9C", "9H"]):
+        [key] = classify_batch(*batch_counts([prev], LEVEL, TRUMP, WILD), LEVEL).keys
+        got = beats_batch(int(key), result.keys)
+        assert got.tolist() == [hand_type(h, LEVEL, TRUMP, WILD) is not None and beats({'cards': prev}, {'cards': h}, LEVEL, TRUMP, WILD)
+                                for h in hands]
+    assert beats_batch(None, result.keys).tolist() == (result.types > 0).tolist()
+
+def test_type_codes():
+    counts = np.zeros((3, 15), dtype=int)
+    counts[0, 13] = counts[0, 14] = 2
+    counts[1, 4] = 4
+    counts[2, 0] = counts[2, 5] = 1
+    result = classify_batch(counts, level_rank=LEVEL)
+    assert result.types.tolist() == [BATCH_CODES['joker_bomb'], BATCH_CODES['bomb'], 0]
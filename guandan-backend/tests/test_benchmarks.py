@@ -0,0 +1,48 @@
+import json
+import pytest
+import time
+from benchmarks.harness import Case, compare, main, measure, percentile
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+def test_measure_reports_rates_and_latency():
+    result = measure(Case("noop", lambda x: x, [(i,) for i in range(10)]), min_time=0.001)
+    assert result['calls'] >= 50
+    assert result['ops_per_sec'] > 0
+    assert result['p50_us'] <= result['p99_us']
+
+def test_measure_percentiles_are_per_call():
+    # One input in ten is slow: p99 sees it, p50 does not
+    slow = lambda x: time.sleep(0.002) if x == 0 else None
+    result = measure(Case("mixed", slow, [(i,) for i in range(10)]), min_time=0.001)
+    assert result['p99_us'] >= 2000
+    assert result['p50_us'] < 1000
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {'a': {'ops_per_sec': 100.0}, 'b': {'ops_per_sec': 100.0}, 'gone': {'ops_per_sec': 1.0}}
+    results = {'a': {'ops_per_sec': 85.0}, 'b': {'ops_per_sec': 70.0}, 'new': {'ops_per_sec': 5.0}}
+    assert [r[0] for r in compare(results, baseline, 0.2)] == ['b']
+
+def test_main_writes_json_and_fails_on_regression(tmp_path, capsys):
+    fast = lambda: [Case("case", lambda: None, [()])]
+    out = tmp_path / "bench.json"
+    assert main("test", fast, ["--json", str(out), "--min-time", "0.001"]) == 0
+    saved = json.loads(out.read_text())
+    assert saved['suite'] == "test" and "case" in saved['results']
+    saved['results']['case']['ops_per_sec'] = 1e15
+    out.write_text(json.dumps(saved))
+    assert main("test", fast, ["--baseline", str(out), "--min-time", "0.001"]) == 1
+    assert "REGRESSION case" in capsys.readouterr().out
+
+def test_preamble_runs_after_argument_parsing(capsys):
+    fast = lambda: [Case("case", lambda: None, [()])]
+    preamble = lambda: print("PREAMBLE")
+    with pytest.raises(SystemExit):
+        main("test", fast, ["--help"], preamble=preamble)
+    assert "PREAMBLE" not in capsys.readouterr().out
+    assert main("test", fast, ["--min-time", "0.001"], preamble=preamble) == 0
+    assert capsys.readouterr().out.startswith("PREAMBLE")
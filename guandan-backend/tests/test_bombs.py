@@ -0,0 +1,54 @@
+import random
+import pytest
+from game.bombs import BombIndex
+from game.deck import create_deck, deal_cards, shuffle_deck
+from game.hands import hand_type
+from game.moves import enumerate_plays
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+def bomb_values(plays):
+    return {(p.type, p.rank) for p in plays if p.type in ("bomb", "straight_flush", "joker_bomb")}
+
+def test_reports_each_kind_of_bomb():
+    hand = ["9S", "9D", "9C", "9H", "7H", "3S", "4S", "5S", "6S", "JoB", "JoB", "JoR", "JoR"]
+    index = BombIndex(hand, LEVEL, TRUMP, WILD)
+    found = [(p.type, p.rank, len(p.cards)) for p in index.bombs()]
+    assert ("bomb", "9", 4) in found
+    assert ("bomb", "9", 5) in found
+    assert ("straight_flush", "7", 5) in found
+    assert found[-1] == ("joker_bomb", "JoR", 4)
+    for p in index.bombs():
+        assert hand_type(p.cards, LEVEL, TRUMP, WILD) == p.hand_info
+
+def test_keys_are_sorted():
+    index = BombIndex(["AS", "AD", "AC", "AH", "3S", "3D", "3C", "3H"], LEVEL, TRUMP, WILD)
+    keys = [p.key for p in index.bombs()]
+    assert keys == sorted(keys)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_move_generator(seed):
+    random.seed(seed)
+    deck = create_deck()
+    shuffle_deck(deck)
+    for hand in deal_cards(deck):
+        index = BombIndex(hand, LEVEL, TRUMP, WILD)
+        assert bomb_values(index.bombs()) == bomb_values(enumerate_plays(hand, None, LEVEL, TRUMP, WILD))
+
+def test_remove_updates_index():
+    random.seed(11)
+    deck = create_deck()
+    shuffle_deck(deck)
+    hand = deal_cards(deck)[0]
+    index = BombIndex(hand, LEVEL, TRUMP, WILD)
+    rng = random.Random(3)
+    while hand:
+        played = rng.sample(hand, min(len(hand), rng.randint(1, 5)))
+        for card in played:
+            hand.remove(card)
+        index.remove(played)
+        fresh = BombIndex(hand, LEVEL, TRUMP, WILD)
+        assert [p.hand_info for p in index.bombs()] == [p.hand_info for p in fresh.bombs()]
+    assert not index.has_bomb()
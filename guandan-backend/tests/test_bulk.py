@@ -0,0 +1,27 @@
+import pytest
+np = pytest.importorskip("numpy")
+from game.bulk import deal_batch, deal_to_hands, hands_to_deal, shuffle_batch
+from game.deck import create_deck, deal_cards
+
+def test_shape_and_every_deal_is_a_full_deck():
+    deals = deal_batch(500, seed=3)
+    assert deals.shape == (500, 4, 27) and deals.dtype == np.uint8
+    flat = np.sort(deals.reshape(500, -1), axis=1)
+    assert (flat == np.arange(108)).all()
+
+def test_seeded_and_rows_differ():
+    assert (deal_batch(20, seed=9) == deal_batch(20, seed=9)).all()
+    decks = shuffle_batch(50, seed=9)
+    assert len({row.tobytes() for row in decks}) == 50
+
+def test_round_trip_matches_deal_cards():
+    deck = shuffle_batch(1, seed=4)[0]
+    names = [create_deck()[c] for c in deck]
+    deal = deal_batch(1, seed=4)[0]
+    assert deal_to_hands(deal) == deal_cards(names, 4)
+    # Which physical copy a card is cannot be recovered from its name
+    assert (hands_to_deal(deal_to_hands(deal)) % 54 == deal % 54).all()
+
+def test_uneven_player_count_rejected():
+    with pytest.raises(ValueError):
+        deal_batch(1, num_players=5)
@@ -0,0 +1,57 @@
+import pytest
+from game.cards import (
+    CARD_NAME, CARD_RANK, CARD_SUIT, CARD_IS_JOKER, NUM_CARDS, NUM_FACES,
+    RANK_NAMES, SUIT_NAMES, encode_card, encode_cards, decode_cards, wild_face
+)
+from game.deck import create_deck
+from game.hands import hand_type, hand_type_ids, beats, beats_ids, find_wild_ids, card_is_trump_id
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+def test_every_physical_card_has_an_id():
+    deck = create_deck()
+    assert NUM_CARDS == len(deck) == 108
+    assert CARD_NAME == deck
+    for cid, card in enumerate(deck):
+        assert encode_card(card) == cid % NUM_FACES
+
+def test_lookup_tables():
+    cid = encode_card("10H")
+    assert RANK_NAMES[CARD_RANK[cid]] == "10"
+    assert SUIT_NAMES[CARD_SUIT[cid]] == "hearts"
+    assert not CARD_IS_JOKER[cid]
+    assert CARD_IS_JOKER[encode_card("JoR")]
+    assert encode_card("10h") == cid
+
+def test_bad_card_raises():
+    with pytest.raises(ValueError):
+        encode_card("1X")
+
+def test_duplicates_get_second_deck_id():
+    ids = encode_cards(["7H", "7H", "8S"])
+    assert ids[1] == ids[0] + NUM_FACES
+    assert decode_cards(ids) == ["7H", "7H", "8S"]
+
+def test_wild_face():
+    assert wild_face(LEVEL, TRUMP, WILD) == encode_card("7H")
+    assert wild_face(LEVEL, TRUMP, False) is None
+
+def test_id_fast_paths_match_string_api():
+    cards = ["4H", "7H", "7H", "5D", "6S"]
+    ids = encode_cards(cards)
+    assert hand_type_ids(ids, LEVEL, TRUMP, WILD) == hand_type(cards, LEVEL, TRUMP, WILD)
+    assert find_wild_ids(ids, LEVEL, TRUMP, WILD) == ids[1:3]
+    prev = ["AH"]
+    assert beats_ids(encode_cards(prev), encode_cards(["7H"]), LEVEL, TRUMP, WILD) == \
+        beats({"cards": prev}, {"cards": ["7H"]}, LEVEL, TRUMP, WILD)
+
+def test_card_is_trump_id():
+    assert card_is_trump_id(encode_card("JoB"), LEVEL, TRUMP, WILD)
+    assert card_is_trump_id(encode_card("3H"), LEVEL, TRUMP, WILD)
+    assert card_is_trump_id(encode_card("7S"), LEVEL, TRUMP, WILD)
+    assert not card_is_trump_id(encode_card("3S"), LEVEL, TRUMP, WILD)
+
+def test_unknown_card_is_not_a_hand():
+    assert hand_type(["XH"], LEVEL, TRUMP, WILD) is None
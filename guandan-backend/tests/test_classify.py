@@ -0,0 +1,92 @@
+import random
+import pytest
+from game.classify import classify, classify_counts, hand_counts, NUM_SLOTS
+from game.cards import encode_cards
+from game.deck import create_deck
+from game.hands import hand_type
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+CASES = [
+    ["5H"], ["7H"], ["JoR"],
+    ["8H", "8D"], ["7H", "7H"], ["7H", "7S"], ["7H", "8S"], ["JoB", "JoB"],
+    ["9H", "9S", "9C"], ["9H", "9S", "7H"], ["9H", "7H", "7H"],
+    ["7H", "8H", "8D", "8S", "9H"], ["8S", "8D", "9C", "9H", "7H"],
+    ["3H", "4H", "6D", "7H", "7H"], ["4H", "7H", "7H", "5D", "6S"],
+    ["9H", "10H", "JH", "QH", "KH"], ["JS", "QS", "KS", "AS", "2S"],
+    ["4H", "4D", "5S", "5C", "6D", "7H"], ["5H", "6H", "7H", "7H", "4S", "4D"],
+    ["8S", "8D", "8C", "9H", "9S", "7H"], ["4H", "4D", "5H", "7H", "7H", "5C"],
+    ["KS", "KD", "AS", "AD", "2S", "2D"], ["AS", "AD", "AC", "2S", "2D", "2C"],
+    ["JoB", "JoB", "JoR", "JoR"], ["JoB", "JoB", "JoR", "7H"],
+    ["6H", "6S", "6D", "6C"], ["7H", "7S", "7D", "7C", "7H"],
+    ["3H", "4H", "JoB", "6H", "7H"],
+]
+
+@pytest.mark.parametrize("cards", CASES)
+def test_matches_hand_type(cards):
+    for wild in (True, False):
+        assert classify(cards, LEVEL, TRUMP, wild) == hand_type(cards, LEVEL, TRUMP, wild)
+
+def test_matches_hand_type_on_random_plays():
+    rng = random.Random(7)
+    deck = create_deck()
+    levels = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+    for _ in range(5000):
+        level = rng.choice(levels)
+        ranks = rng.sample(levels, rng.randint(1, 3))
+        pool = [c for c in deck if c[:-1] in ranks or c[:-1] == level]
+        cards = rng.sample(pool, min(len(pool), rng.randint(1, 6)))
+        assert classify(cards, level, TRUMP, WILD) == hand_type(cards, level, TRUMP, WILD), cards
+
+def test_classify_counts_vector():
+    counts, wilds, flush = hand_counts(encode_cards(["9H", "10H", "JH", "QH", "7H"]), LEVEL, TRUMP, WILD)
+    assert len(counts) == NUM_SLOTS
+    assert (wilds, flush) == (1, True)
+    assert classify_counts(counts, wilds, flush, LEVEL) == ("straight_flush", "Q", None)
+    assert classify_counts(counts, wilds, False, LEVEL) == ("straight", "Q", None)
+
+def test_empty_play():
+    assert classify([], LEVEL, TRUMP, WILD) is None
+
+# === ClassifyCache ===
+from game.classify import ClassifyCache
+
+def test_cache_hits_on_same_shape():
+    cache = ClassifyCache(maxsize=8)
+    assert cache.classify(["8H", "8D"], LEVEL, TRUMP, WILD) == ("pair", "8", None)
+    # Different physical cards, same rank multiset
+    assert cache.classify(["8S", "8C"], LEVEL, TRUMP, WILD) == ("pair", "8", None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+def test_cache_key_includes_round_context():
+    cache = ClassifyCache(maxsize=8)
+    assert cache.classify(["7H"], "7", TRUMP, True) == ("single", "7", "wild")
+    assert cache.classify(["7H"], "7", TRUMP, False) == ("single", "7", None)
+    assert cache.classify(["7H"], "7", "spades", True) == ("single", "7", None)
+    assert cache.stats()["misses"] == 3
+
+def test_cache_caches_invalid_hands():
+    cache = ClassifyCache(maxsize=8)
+    assert cache.classify(["8H", "9D"], LEVEL, TRUMP, WILD) is None
+    assert cache.classify(["8S", "9C"], LEVEL, TRUMP, WILD) is None
+    assert cache.hits == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = ClassifyCache(maxsize=2)
+    cache.classify(["3H"])
+    cache.classify(["4H"])
+    cache.classify(["3S"])  # hit, 3 is now most recent
+    cache.classify(["5H"])  # evicts 4
+    assert cache.evictions == 1
+    cache.classify(["4H"])
+    assert cache.stats()["misses"] == 4
+    cache.resize(1)
+    assert len(cache) == 1 and cache.evictions == 3
+
+def test_cache_disabled_with_zero_size():
+    cache = ClassifyCache(maxsize=0)
+    assert cache.classify(["3H"]) == ("single", "3", None)
+    assert len(cache) == 0
@@ -0,0 +1,55 @@
+import random
+from game.cards import CARD_NAME, NUM_CARDS
+from game.context import game_context, round_context
+from game.deck import create_deck, deal_cards, shuffle_deck
+from game.hands import beats, card_is_trump, hand_type, is_wild
+from game.multiset import Hand
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+def test_tables_match_string_helpers():
+    for level in ("2", "7", "A"):
+        for wild in (True, False):
+            ctx = round_context(level, TRUMP, wild)
+            for cid in range(NUM_CARDS):
+                card = CARD_NAME[cid]
+                assert ctx.is_wild[cid] == is_wild(card, level, TRUMP, wild)
+                assert ctx.is_trump[cid] == card_is_trump(card, level, TRUMP, wild)
+
+def test_contexts_are_shared():
+    assert round_context(LEVEL, TRUMP, WILD) is round_context(LEVEL, TRUMP, WILD)
+    assert round_context(LEVEL, TRUMP, True) is round_context(LEVEL, TRUMP, 1)
+    assert round_context(LEVEL, TRUMP, WILD).wild_card == "7H"
+    assert round_context(LEVEL, TRUMP, False).wild_card is None
+
+def test_classify_and_beats_match_hands():
+    ctx = round_context(LEVEL, TRUMP, WILD)
+    rng = random.Random(9)
+    deck = create_deck()
+    for _ in range(3000):
+        a = rng.sample(deck, rng.randint(1, 6))
+        b = rng.sample(deck, len(a))
+        assert ctx.classify(a) == hand_type(a, LEVEL, TRUMP, WILD)
+        prev, curr = {'cards': a}, {'cards': b}
+        assert ctx.beats(prev, curr) == beats(prev, curr, LEVEL, TRUMP, WILD)
+    assert ctx.classify(["XX"]) is None
+    assert ctx.classify_play("p1", ["3S", "4D"]) is None
+
+def test_take_uses_round_wild():
+    ctx = round_context(LEVEL, TRUMP, WILD)
+    hand = Hand(["9S", "7H", "3C"])
+    assert ctx.take(hand, ["9S", "9D"]) == ["9S", "7H"]
+    assert hand == ["3C"]
+
+def test_game_context_builds_once():
+    game = {'levelRank': LEVEL, 'trumpSuit': TRUMP, 'wildCards': WILD}
+    ctx = game_context(game)
+    assert game['context'] is ctx
+    assert game_context(game) is ctx
+    deck = create_deck()
+    shuffle_deck(deck)
+    hand = deal_cards(deck, 4)[0]
+    assert ctx.bomb_index(hand).bombs() is not None
+    assert [p.cards for p in ctx.enumerate_plays(hand)]
@@ -0,0 +1,126 @@
+import random
+import pytest
+import subprocess
+import sys
+from tests.helpers import PLAYERS, play_random_hand, random_moves, shuffled_deck, started
+from game.deck import create_deck
+from game.engine import GameState, new_room
+
+def names(events):
+    return [e.name for e in events]
+
+def test_engine_imports_without_flask():
+    code = "import sys, game.engine; assert 'flask' not in sys.modules and 'eventlet' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_start_round_deals_and_reports():
+    state = GameState.new(PLAYERS, room_id="r1")
+    deck = create_deck()
+    events = state.start_round(deck=list(deck))
+    assert names(events) == ['game_started', 'room_update', 'all_hands']
+    assert events[0].data['roomId'] == "r1"
+    assert all(len(state.hands[p]) == 27 for p in PLAYERS)
+    assert state.room['teams'] == [["ann", "cat"], ["bob", "dan"]]
+    assert state.current_player() == "ann"
+
+def test_errors_are_addressed_to_the_actor():
+    state = GameState.new(PLAYERS, {"wildCards": False})  # no wild to cover a missing card
+    state.start_round()
+    [event] = state.play("bob", ["3S"])
+    assert (event.name, event.data, event.to) == ('error_msg', "Not your turn!", "bob")
+    [event] = state.play("ann", ["XX"])
+    assert event.data == "Invalid hand type!"
+    held = set(state.hands["ann"])
+    missing = next(c for c in create_deck() if c not in held)
+    [event] = state.play("ann", [missing])
+    assert event.data == "You do not have the cards you're trying to play."
+    assert names(state.pass_("bob")) == ['error_msg']
+
+def test_passing_and_ending_before_anyone_plays():
+    state = GameState.new(PLAYERS)
+    state.start_round(deck=create_deck())
+    [event] = state.end_trick("ann")
+    assert (event.name, event.data) == ('error_msg', "You can't end the round")
+    for player in PLAYERS:
+        [event] = state.pass_(player)
+        assert event.name == 'game_update' and not event.data['can_end_round']
+    assert state.current_player() == "ann"
+
+def test_full_hands_and_tribute_round():
+    rng = random.Random(5)
+    state = GameState.new(PLAYERS)
+    state.start_round(shuffled_deck(rng.getrandbits(32)))
+    log = play_random_hand(state, rng)
+    summary = log[-1]
+    assert summary.name == 'round_summary'
+    assert len(summary.data['finishOrder']) >= 2
+    assert state.game is None and state.room['last_finish_order']
+
+    events = state.start_round(shuffled_deck(rng.getrandbits(32)))
+    tribute = state.room['tribute_state']
+    assert names(events)[-1] == 'tribute_start'
+    if not tribute['blocked']:
+        for t in tribute['tributes']:
+            card = state.hands[t['from']].to_list()[0]
+            events = state.pay_tribute(t['from'], card)
+        assert names(events) == ['tribute_prompt_return']
+        for t in tribute['tributes']:
+            card = state.hands[t['to']].to_list()[0]
+            events = state.return_tribute(t['to'], t['from'], card)
+        if names(events) == ['tribute_prompt_choice']:
+            events = state.choose_tribute(tribute['tie_cards'][0]['card'])
+        assert names(events) == ['tribute_complete', 'game_update']
+    assert sum(len(state.hands[p]) for p in PLAYERS) == 108
+    assert play_random_hand(state, rng)[-1].name == 'round_summary'
+
+@pytest.mark.parametrize("levels, expected", [(("J", "Q"), "J"), (("K", "A"), "K"), (("10", "A"), "10")])
+def test_round_summary_level_rank_for_face_levels(levels, expected):
+    state = GameState.new(PLAYERS)
+    state.start_round(deck=create_deck())
+    team, other = state.room['teams']
+    state.room['levels'].update(zip(team, levels))
+    state.game['finish_order'] = other + team   # team 0 loses and keeps its levels
+    [summary] = state.end_hand()
+    assert summary.data['result']['level_rank'] == expected
+
+def test_bombs_are_read_from_the_current_hand():
+    state, _ = started(seed=4)
+    rng = random.Random(4)
+    for _ in zip(range(20), random_moves(state, rng)):
+        pass
+    for player in PLAYERS:
+        plays = state.game['context'].enumerate_plays(state.hands[player].to_list())
+        expected = {(p.type, p.rank) for p in plays if p.type in ("bomb", "straight_flush", "joker_bomb")}
+        assert {(p.type, p.rank) for p in state.bombs(player)} == expected
+    assert 'bomb_indexes' not in state.room.FIELDS
+
+def test_tribute_commands_outside_the_tribute_phase_are_ignored():
+    state = GameState.new(PLAYERS)
+    assert state.choose_tribute("3S") == []
+    state.room['tribute_state'] = None   # as left behind by a finished tribute
+    assert state.choose_tribute("3S") == []
+    assert state.pay_tribute("ann", "3S") == []
+    assert state.return_tribute("ann", "bob", "3S") == []
+
+def test_new_room_matches_lobby_layout():
+    room = new_room(["a", "b"], {"wildCards": False})
+    assert room['slots'] == ["a", "b", None, None]
+    assert room['settings']['wildCards'] is False and room['settings']['trumpSuit'] == "hearts"
+
+def test_tribute_choice_swaps_both_or_neither():
+    state = GameState.new(PLAYERS)
+    state.start_round(deck=create_deck())
+    hands = state.hands
+    give_c, give_d = hands["cat"].to_list()[0], hands["dan"].to_list()[0]
+    back_a = hands["ann"].to_list()[0]
+    missing = next(c for c in create_deck() if c not in hands["bob"])
+    state.room['tribute_state'] = {
+        'chooser': "ann",
+        'tie_cards': [{'from': "cat", 'to': "ann", 'card': give_c},
+                      {'from': "dan", 'to': "bob", 'card': give_d}],
+        'exchange_cards': {"ann": {'to': "cat", 'card': back_a}, "bob": {'to': "dan", 'card': missing}},
+    }
+    before = {p: sorted(hands[p]) for p in PLAYERS}
+    [event] = state.choose_tribute(give_c)
+    assert event.name == 'error_msg'
+    assert {p: sorted(hands[p]) for p in PLAYERS} == before
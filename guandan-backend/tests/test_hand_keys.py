@@ -0,0 +1,120 @@
+import itertools
+import pytest
+from game.hands import (
+    BOMB_PRIORITY, hand_type, hand_key, key_beats, key_parts, rank_index, type_beats, TYPE_CODES
+)
+from game.plays import classify_play, sort_plays, bucket_plays
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD_CARD = "7H"
+RANKS = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2']
+SUITS = ['S', 'D', 'C', 'H']
+
+
+def reference_type_beats(prev_type, prev_len, curr_type, curr_len):
+    """type_beats() before comparison keys, kept as the oracle."""
+    prev_is_bomb = prev_type[0] in BOMB_PRIORITY
+    curr_is_bomb = curr_type[0] in BOMB_PRIORITY
+
+    # Joker bomb beats everything
+    if curr_type[0] == 'joker_bomb' and prev_type[0] != 'joker_bomb':
+        return True
+
+    # Bomb vs non-bomb
+    if curr_is_bomb and not prev_is_bomb:
+        return True
+    if not curr_is_bomb and prev_is_bomb:
+        return False
+
+    # Bomb vs bomb: compare type and rank
+    if curr_is_bomb and prev_is_bomb:
+        prev_rank = BOMB_PRIORITY[prev_type[0]]
+        curr_rank = BOMB_PRIORITY[curr_type[0]]
+        if curr_rank != prev_rank:
+            return curr_rank > prev_rank
+        else:
+            return rank_index(curr_type[1]) > rank_index(prev_type[1])
+
+    # Type mismatch (e.g. straight vs triple)
+    if prev_type[0] != curr_type[0] or prev_len != curr_len:
+        return False
+
+    # Otherwise compare ranks (including wild handling)
+    prev_rank = prev_type[1]
+    curr_rank = curr_type[1]
+    prev_is_wild = prev_type[-1] == 'wild'
+    curr_is_wild = curr_type[-1] == 'wild'
+
+    # Wild beats non-wild, unless opponent is a joker
+    if curr_is_wild and not prev_is_wild:
+        if prev_rank in ('JoB', 'JoR'):
+            return False
+        return True
+    if not curr_is_wild and prev_is_wild:
+        if curr_rank in ('JoB', 'JoR'):
+            return True
+        return False
+
+    # Compare by natural rank
+    return rank_index(curr_rank) > rank_index(prev_rank)
+
+
+
+def natural(rank, n):
+    """n cards of rank, never using the wild card."""
+    suits = [s for s in SUITS if rank + s != WILD_CARD] * 2
+    return [rank + s for s in suits[:n]]
+
+def representative_hands():
+    hands = [["JoB"], ["JoR"], [WILD_CARD], ["JoB", "JoB"], ["JoR", "JoR"],
+             [WILD_CARD, WILD_CARD], [WILD_CARD, "7S"], ["JoR", "JoR", WILD_CARD],
+             ["JoB", "JoB", WILD_CARD], ["JoB", "JoB", "JoR", "JoR"]]
+    for r in RANKS:
+        hands += [natural(r, 1), natural(r, 2), natural(r, 3),
+                  natural(r, 2) + [WILD_CARD], natural(r, 1) + [WILD_CARD, WILD_CARD]]
+        for size in range(4, 9):
+            hands.append(natural(r, size))
+            hands.append(natural(r, size - 1) + [WILD_CARD])
+            hands.append(natural(r, size) + [WILD_CARD, WILD_CARD])
+    for t, p in itertools.permutations(RANKS, 2):
+        hands.append(natural(t, 3) + natural(p, 2))
+    for t, p in itertools.permutations(RANKS[::3], 2):
+        hands.append(natural(t, 2) + natural(p, 2) + [WILD_CARD])
+    for i in range(len(RANKS) - 4):
+        window = RANKS[i:i + 5]
+        hands.append([r + "S" for r in window])
+        hands.append([window[0] + "D"] + [r + "S" for r in window[1:]])
+        hands.append([r + "S" for r in window[:-1]] + [WILD_CARD])
+    for i in range(len(RANKS) - 2):
+        hands.append([c for r in RANKS[i:i + 3] for c in natural(r, 2)])
+    for i in range(len(RANKS) - 1):
+        hands.append([c for r in RANKS[i:i + 2] for c in natural(r, 3)])
+    return hands
+
+@pytest.mark.parametrize("wild", [True, False])
+def test_keys_match_reference_beats_on_every_pair(wild):
+    classified = []
+    for cards in representative_hands():
+        info = hand_type(cards, LEVEL, TRUMP, wild)
+        if info is not None:
+            classified.append((info, len(cards), hand_key(info, len(cards))))
+    assert len(classified) > 300
+    for (p_info, p_len, p_key), (c_info, c_len, c_key) in itertools.product(classified, repeat=2):
+        expected = reference_type_beats(p_info, p_len, c_info, c_len)
+        assert key_beats(p_key, c_key) == expected, (p_info, c_info)
+        assert type_beats(p_info, p_len, c_info, c_len) == expected
+
+def test_key_parts():
+    tier, code, length, strength = key_parts(hand_key(("pair", "8", None), 2))
+    assert (tier, code, length, strength) == (0, TYPE_CODES["pair"], 2, rank_index("8"))
+    assert key_parts(hand_key(("straight_flush", "K", None), 5))[0] == BOMB_PRIORITY["straight_flush"]
+
+def test_sort_and_bucket_plays():
+    plays = [classify_play("A", c, LEVEL, TRUMP, True) for c in
+             (["9S"], ["JoR"], ["3S", "3D"], ["4S", "4D", "4C", "4H"], ["AS"], ["JoB", "JoB", "JoR", "JoR"])]
+    ordered = [p.cards for p in sort_plays(plays)]
+    assert ordered[0] == ["9S"] and ordered[-1] == ["JoB", "JoB", "JoR", "JoR"]
+    buckets = bucket_plays(plays)
+    singles = buckets[hand_key(("single", "3", None), 1) >> 8]
+    assert [p.cards for p in singles] == [["9S"], ["AS"], ["JoR"]]
@@ -0,0 +1,51 @@
+import json
+import pytest
+from tests.helpers import PLAYERS, started
+from game.engine import new_room
+from game.models import Game, Room, Settings, TributeState, wire
+from game.multiset import Hand
+
+def test_records_have_no_dict():
+    for record in (Room(), Game(), Settings(), TributeState()):
+        assert not hasattr(record, '__dict__')
+
+def test_mapping_interface():
+    room = Room(players=["ann"], hands={})
+    assert room['players'] == ["ann"] and room.get('game') is None
+    assert 'game' not in room and 'players' in room
+    room['game'] = Game(turn_index=0)
+    assert room['game']['turn_index'] == 0
+    del room['game']
+    assert 'game' not in room
+    assert room.setdefault('sids', {}) == {} and 'sids' in room
+    assert room.pop('sids') == {} and room.pop('sids', None) is None
+    assert set(room) == {'players', 'hands'} and len(room) == 2
+    with pytest.raises(KeyError):
+        room['game']
+
+def test_undeclared_fields_are_rejected():
+    room = Room()
+    with pytest.raises(KeyError):
+        room['colour'] = "red"
+    assert room.get('colour', 1) == 1 and 'colour' not in room
+
+def test_to_wire_is_json_and_skips_private_fields():
+    room = new_room(PLAYERS, {"trumpSuit": "spades"})
+    room['sids'] = {"ann": "sid"}
+    room['hands'] = {"ann": Hand(["3H"])}
+    data = json.loads(json.dumps(room.to_wire()))
+    assert data['settings']['trumpSuit'] == "spades"
+    assert 'sids' not in data and 'hands' not in data
+    assert wire({"hands": room['hands']}) == {"hands": {"ann": ["3H"]}}
+
+def test_to_dict_nests_records():
+    room = new_room(PLAYERS)
+    data = room.to_dict()
+    assert type(data) is dict and type(data['settings']) is dict
+    assert data['players'] is room['players']
+
+def test_engine_events_are_json():
+    state, events = started()
+    assert isinstance(state.room['game'], Game) and isinstance(state.room['settings'], Settings)
+    for event in events:
+        json.dumps(event.data)
@@ -0,0 +1,69 @@
+import itertools
+import random
+from collections import Counter
+import pytest
+from game.cards import encode_cards
+from game.classify import hand_counts
+from game.deck import create_deck
+from game.hands import beats, hand_type
+from game.moves import enumerate_plays
+from game.plays import classify_play
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+LEVELS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+
+def value(cards, level):
+    counts, wilds, _ = hand_counts(encode_cards(cards), level, TRUMP, WILD)
+    return (tuple(counts), wilds, hand_type(cards, level, TRUMP, WILD))
+
+def brute_force(hand, prev, level):
+    found = set()
+    for k in range(1, len(hand) + 1):
+        for combo in itertools.combinations(hand, k):
+            cards = list(combo)
+            if hand_type(cards, level, TRUMP, WILD) is None:
+                continue
+            if prev and not beats(prev, {"cards": cards}, level, TRUMP, WILD):
+                continue
+            found.add(value(cards, level))
+    return found
+
+@pytest.mark.parametrize("seed", range(12))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    level = rng.choice(LEVELS)
+    ranks = rng.sample(LEVELS, 4)
+    pool = [c for c in create_deck() if c[:-1] in ranks or c[:-1] == level or c.startswith("Jo")]
+    hand = rng.sample(pool, 9)
+    prev = None
+    if seed % 2:
+        candidates = [["8S"], ["5D", "5C"], ["3S", "4D", "5C", "6H", "7S"], ["9S", "9D", "9C", "9H"]]
+        prev = {"cards": candidates[seed % len(candidates)]}
+
+    plays = enumerate_plays(hand, prev, level, TRUMP, WILD)
+    values = [value(p.cards, level) for p in plays]
+    assert len(values) == len(set(values))
+    assert set(values) == brute_force(hand, prev, level)
+    for p in plays:
+        assert not Counter(p.cards) - Counter(hand)
+        assert hand_type(p.cards, level, TRUMP, WILD) == p.hand_info
+
+def test_plays_are_sorted_weakest_first():
+    plays = enumerate_plays(["3S", "3D", "9C", "JoR"], None, LEVEL, TRUMP, WILD)
+    assert [p.cards for p in plays] == [["3S"], ["9C"], ["JoR"], ["3S", "3D"]]
+
+def test_only_beating_plays_returned():
+    hand = ["5S", "5D", "9C", "9H", "KS"]
+    plays = enumerate_plays(hand, {"player": "B", "cards": ["8S", "8D"]}, LEVEL, TRUMP, WILD)
+    assert [p.hand_info for p in plays] == [("pair", "9", None)]
+
+def test_accepts_classified_prev_and_finds_bombs():
+    prev = classify_play("B", ["AS", "AD", "AC", "AH"], LEVEL, TRUMP, WILD)
+    hand = ["JoB", "JoB", "JoR", "JoR", "3S", "4S", "5S", "6S", "7H"]
+    types = [p.type for p in enumerate_plays(hand, prev, LEVEL, TRUMP, WILD)]
+    assert types == ["straight_flush", "joker_bomb"]
+
+def test_invalid_prev_means_no_plays():
+    assert enumerate_plays(["3S"], {"cards": ["3S", "9D"]}, LEVEL, TRUMP, WILD) == []
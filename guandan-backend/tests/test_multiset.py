@@ -0,0 +1,71 @@
+import pytest
+from game.multiset import Hand, hand_to_wire, swap_cards
+
+def test_keeps_display_order():
+    hand = Hand(["3H", "7H", "3H", "KS"])
+    hand.remove("7H")
+    hand.append("2C")
+    assert hand.to_list() == ["3H", "3H", "KS", "2C"]
+    assert hand == ["3H", "3H", "KS", "2C"]
+    assert len(hand) == 4
+
+def test_count_contains_remove():
+    hand = Hand(["3H", "3H", "JoR"])
+    assert hand.count("3H") == 2 and "JoR" in hand
+    hand.remove("3H")
+    assert hand.count("3H") == 1
+    with pytest.raises(ValueError):
+        hand.remove("4D")
+
+def test_take_substitutes_wilds():
+    hand = Hand(["8S", "8D", "7H", "KC"])
+    assert hand.take(["8S", "8D", "8C"], wild="7H") == ["8S", "8D", "7H"]
+    assert hand == ["KC"]
+
+def test_take_is_all_or_nothing():
+    hand = Hand(["8S", "7H"])
+    assert hand.take(["8S", "8D", "8C"], wild="7H") is None
+    assert hand == ["8S", "7H"]
+    assert Hand(["8S"]).take(["8D"]) is None
+
+def test_compacts_after_many_removals():
+    cards = [f"{r}{s}" for r in ["3", "4", "5", "6", "7", "8", "9"] for s in "SHDC"] * 2
+    hand = Hand(cards)
+    for card in cards[:50]:
+        hand.remove(card)
+    assert hand.to_list() == cards[50:]
+    assert hand.count("9C") == 1
+
+def test_only_two_decks_of_cards():
+    hand = Hand(["3H", "3H"])
+    with pytest.raises(ValueError):
+        hand.append("3H")
+    with pytest.raises(ValueError):
+        hand.append("XX")
+    assert "XX" not in hand and hand.count("XX") == 0
+    assert hand.take(["XX"]) is None
+    assert hand == ["3H", "3H"]
+
+def test_long_runs_of_swaps_stay_indexed():
+    hand = Hand(["3H", "4H"])
+    for _ in range(600):
+        hand.remove("3H")
+        hand.append("3H")
+        hand.append("5S")
+        hand.remove("5S")
+    assert hand == ["4H", "3H"] and hand.count("3H") == 1 and "5S" not in hand
+
+def test_wire_list_is_cached_until_changed():
+    hand = Hand(["3H"])
+    assert hand_to_wire(hand) is hand_to_wire(hand)
+    hand.append("4H")
+    assert hand_to_wire(hand) == ["3H", "4H"]
+    assert hand_to_wire(["5S"]) == ["5S"]
+
+def test_swap_cards_is_atomic():
+    hands = {"A": Hand(["3H", "JoR"]), "B": Hand(["4S"])}
+    swap_cards(hands, "A", "JoR", "B", "4S")
+    assert hands == {"A": ["3H", "4S"], "B": ["JoR"]}
+    with pytest.raises(ValueError):
+        swap_cards(hands, "A", "3H", "B", "9D")
+    assert hands["A"] == ["3H", "4S"]
@@ -0,0 +1,31 @@
+from collections import Counter
+from benchmarks.oracle import hand_ids, rank_multisets, run
+from game.cards import CARD_SUIT, FACE_BY_RANK_SUIT
+from game.classify import hand_counts
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+def test_rank_multisets_respect_caps():
+    found = list(rank_multisets(3, [2, 1, 3]))
+    assert sorted(map(tuple, found)) == sorted([(2, 1, 0), (2, 0, 1), (1, 1, 1), (1, 0, 2), (0, 1, 2), (0, 0, 3)])
+
+def test_hand_ids_build_the_requested_variant():
+    wild = FACE_BY_RANK_SUIT[(4, 2)]  # 7H
+    counts = [0] * 15
+    counts[0], counts[1], counts[13] = 2, 1, 1
+    for flush in (True, False):
+        ids = hand_ids(counts, 1, wild, flush)
+        assert max(Counter(ids).values()) == 1
+        assert hand_counts(ids, LEVEL, TRUMP, WILD) == (counts, 1, flush)
+    counts[0] = 8
+    assert hand_ids(counts, 0, wild, True) is None
+    assert {CARD_SUIT[c] for c in hand_ids(counts, 0, wild, False)} == {-1, 0, 1, 2, 3}
+
+def test_small_space_matches_and_mismatches_are_reported():
+    total = run(levels=(LEVEL, "2"), max_cards=4, workers=1)
+    assert total['hands'] > 1000 and total['mismatches'] == 0
+    broken = run(levels=(LEVEL,), max_cards=2, candidate="game.hands:find_wild_ids", workers=1)
+    assert broken['mismatches'] == broken['hands']
+    assert len(broken['examples']) == min(20, broken['hands'])
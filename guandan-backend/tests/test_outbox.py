@@ -0,0 +1,72 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tests.helpers import PLAYERS, started
+from game.engine import private_events
+from game.outbox import BATCH_STATS, batch_stats, coalesce
+
+def test_disabled_by_default():
+    state, events = started({}, sids=True)
+    split = private_events(state.room, events)
+    assert [(e.name, e.data, e.to) for e in state.deliver(events)] == [(e.name, e.data, e.to) for e in split]
+
+def test_one_frame_per_player_in_order():
+    state, events = started({"batchEvents": True}, sids=True)
+    out = state.deliver(events)
+    assert sorted(e.to for e in out) == sorted(PLAYERS)
+    for frame in out:
+        assert frame.name == 'batch'
+        assert [name for name, _ in frame.data['events']] == [e.name for e in events]
+
+def test_private_events_stay_private():
+    state, events = started({"batchEvents": True, "privateHands": True}, sids=True)
+    for frame in state.deliver(events):
+        for name, data in frame.data['events']:
+            if 'hands' in data:
+                assert list(data['hands']) == [frame.to]
+
+def test_play_merges_hands_and_update():
+    state, _ = started({"batchEvents": True}, sids=True)
+    player = state.current_player()
+    play = state.game['context'].enumerate_plays(state.hands[player].to_list(), None)[0]
+    out = state.deliver(state.play(player, play.cards))
+    assert len(out) == 4
+    assert all([n for n, _ in e.data['events']] == ['all_hands', 'game_update'] for e in out)
+
+def test_single_event_is_not_wrapped():
+    state, _ = started({"batchEvents": True, "privateHands": False}, sids=True)
+    events = state.pass_("nobody")
+    assert state.deliver(events) == events
+    player = state.current_player()
+    play = state.game['context'].enumerate_plays(state.hands[player].to_list(), None)[0]
+    state.play(player, play.cards)
+    events = state.pass_(state.current_player())
+    assert [e.name for e in events] == ['game_update']
+    assert state.deliver(events) == events
+
+def test_waits_for_every_sid():
+    state, events = started({"batchEvents": True})
+    state.room['sids'] = {"ann": "sid-ann"}
+    assert coalesce(state.room, events) == events
+
+def test_counters():
+    BATCH_STATS.clear()
+    state, events = started({"batchEvents": True, "privateHands": False}, sids=True)
+    out = state.deliver(events)
+    stats = batch_stats()
+    assert stats['events_in'] == len(events)
+    assert stats['frames_out'] == len(out) == 4
+    assert stats['merged'] == {e.name: 4 for e in events}
+
+def test_counters_add_up_across_threads():
+    BATCH_STATS.clear()
+    state, events = started({"batchEvents": True, "privateHands": False}, sids=True)
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: coalesce(state.room, events), range(2000)))
+    finally:
+        sys.setswitchinterval(old)
+    stats = batch_stats()
+    assert stats['events_in'] == 2000 * len(events)
+    assert stats['frames_out'] == 2000 * 4
@@ -0,0 +1,43 @@
+import pytest
+from game.hands import beats
+from game.plays import Play, classify_play, beats_classified
+
+LEVEL = "7"
+TRUMP = "hearts"
+WILD = True
+
+def play(cards, player="A"):
+    return classify_play(player, cards, LEVEL, TRUMP, WILD)
+
+def test_classify_play_record():
+    p = play(["9H", "9S", "7H"], player="B")
+    assert (p.player, p.type, p.rank, p.wild) == ("B", "triple", "9", True)
+    assert p.to_dict() == {"player": "B", "cards": ["9H", "9S", "7H"]}
+    assert not hasattr(p, "__dict__")
+
+def test_invalid_play_is_none():
+    assert play(["3H", "5S"]) is None
+
+def test_nothing_to_beat():
+    assert beats_classified(None, play(["3H"]))
+
+PAIRS = [
+    (["AH"], ["7H"]),
+    (["7H"], ["AH"]),
+    (["7H"], ["JoB"]),
+    (["JoB"], ["7S"]),
+    (["6S", "6H"], ["7H", "7S", "7D", "7C"]),
+    (["6H", "6S", "6D", "6C"], ["7H", "7S", "7D", "7C"]),
+    (["5S", "5H", "5D", "5C"], ["9H", "10H", "JH", "QH", "KH"]),
+    (["AS", "AH", "AD", "AC"], ["JoR", "JoR", "JoB", "JoB"]),
+    (["JoR", "JoR", "JoB", "JoB"], ["9H", "10H", "JH", "QH", "KH"]),
+    (["3S", "4S", "5D", "6C", "7S"], ["8S", "8D", "9C", "9H", "9S"]),
+    (["8S", "8D"], ["9C", "9H"]),
+    (["9S", "9D"], ["8C", "8H"]),
+    (["9S", "9D"], ["9C", "9H"]),
+]
+
+@pytest.mark.parametrize("prev,curr", PAIRS)
+def test_beats_classified_matches_beats(prev, curr):
+    expected = beats({"cards": prev}, {"cards": curr}, LEVEL, TRUMP, WILD)
+    assert beats_classified(play(prev), play(curr)) == expected
@@ -0,0 +1,50 @@
+import json
+from tests.helpers import PLAYERS, started
+from game.engine import private_events
+
+def test_private_by_default():
+    state, events = started()
+    assert state.room['settings']['privateHands'] is True
+    out = state.deliver(events)
+    assert all(list(e.data['hands']) == [e.to] for e in out if 'hands' in e.data)
+
+def test_shared_delivery_when_disabled():
+    state, events = started({"privateHands": False})
+    assert state.deliver(events) == events
+    assert all(e.to is None for e in events)
+
+def test_each_player_only_gets_own_hand():
+    state, events = started({"privateHands": True})
+    out = state.deliver(events)
+    for name in ('game_started', 'all_hands'):
+        copies = [e for e in out if e.name == name]
+        assert sorted(e.to for e in copies) == sorted(PLAYERS)
+        for e in copies:
+            assert list(e.data['hands']) == [e.to]
+            assert e.data['hands'][e.to] == state.hands[e.to].to_list()
+            assert e.data['hand_counts'] == {p: 27 for p in PLAYERS}
+    room_update = [e for e in out if e.name == 'room_update']
+    assert len(room_update) == 1 and room_update[0].to is None
+
+def test_game_update_after_play_is_private():
+    state, _ = started({"privateHands": True})
+    player = state.current_player()
+    play = state.game['context'].enumerate_plays(state.hands[player].to_list(), None)[0]
+    out = state.deliver(state.play(player, play.cards))
+    updates = [e for e in out if e.name == 'game_update']
+    assert len(updates) == 4
+    for e in updates:
+        assert set(e.data['hands']) == {e.to}
+        assert e.data['hand_counts'][player] == 27 - len(play.cards)
+
+def test_deal_hand_goes_to_requester():
+    state, _ = started({"privateHands": True})
+    [event] = state.deliver(state.deal_hand("bob"))
+    assert event.to == "bob" and event.data['hand'] == state.hands["bob"].to_list()
+
+def test_private_payload_is_smaller():
+    state, events = started({"privateHands": True})
+    hands = next(e for e in events if e.name == 'all_hands')
+    public = len(json.dumps(hands.data))
+    private = [len(json.dumps(e.data)) for e in private_events(state.room, [hands])]
+    assert max(private) * 2.5 < public
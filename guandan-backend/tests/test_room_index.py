@@ -0,0 +1,96 @@
+import random
+import pytest
+from game import rooms
+from game.rooms import (attach_sid, check_indexes, create_room, detach_sid, drop_room, find_user,
+                        join_room, move_seat, register_sid, user_rooms)
+
+@pytest.fixture(autouse=True)
+def clean_rooms():
+    saved = dict(rooms.rooms), dict(rooms.user_index), dict(rooms.sid_index)
+    for table in (rooms.rooms, rooms.user_index, rooms.sid_index):
+        table.clear()
+    yield
+    for table, old in zip((rooms.rooms, rooms.user_index, rooms.sid_index), saved):
+        table.clear()
+        table.update(old)
+
+def test_lobby_lifecycle_keeps_indexes_consistent():
+    room_id = create_room("ann", "red", True)
+    assert find_user("ann") == (room_id, 0)
+    for name in ("bob", "cat"):
+        assert join_room(name, room_id)
+    assert find_user("cat") == (room_id, 2)
+    assert move_seat(room_id, "cat", 3)
+    assert find_user("cat") == (room_id, 3)
+    register_sid(room_id, "ann", "s1")
+    register_sid(room_id, "bob", "s2")
+    assert rooms.sid_index == {"s1": room_id, "s2": room_id}
+    assert check_indexes() == []
+
+    # Reconnect: the new sid replaces the old one everywhere
+    register_sid(room_id, "ann", "s3")
+    detach_sid("s1")
+    assert "s1" not in rooms.sid_index and rooms.rooms[room_id]["sids"]["ann"] == "s3"
+    assert check_indexes() == []
+
+    assert detach_sid("s2") == (room_id, False)
+    assert detach_sid("s3") == (room_id, True)
+    drop_room(room_id)
+    assert find_user("ann") is None and rooms.sid_index == {}
+    assert check_indexes() == []
+
+def test_a_name_can_sit_in_several_rooms():
+    a = create_room("ann", "red", True)
+    b = create_room("bob", "red", True)
+    assert join_room("ann", b)
+    assert user_rooms("ann") == {a: 0, b: 1}
+    assert find_user("ann") == (b, 1)
+    assert check_indexes() == []
+
+    drop_room(b)
+    assert user_rooms("ann") == {a: 0}
+    assert check_indexes() == []
+
+def test_sid_moves_between_rooms():
+    a = create_room("ann", "red", True)
+    b = create_room("bob", "red", True)
+    attach_sid(a, "s1")
+    attach_sid(b, "s1")
+    assert rooms.sid_index["s1"] == b and "s1" not in rooms.rooms[a]["connected_sids"]
+    assert check_indexes() == []
+
+def test_checker_reports_drift():
+    room_id = create_room("ann", "red", True)
+    rooms.rooms[room_id]["slots"][1] = "ghost"
+    rooms.sid_index["stale"] = room_id
+    problems = check_indexes()
+    assert any("ghost" in p for p in problems)
+    assert any("stale" in p for p in problems)
+
+def test_random_operations_stay_consistent():
+    rng = random.Random(5)
+    users = [f"u{i}" for i in range(40)]
+    live_sids = []
+    ops = ["create", "join", "move", "sid", "disconnect", "drop"]
+    for step in range(2000):
+        op = rng.choices(ops, weights=[2, 6, 2, 6, 4, 1])[0]
+        free = [u for u in users if not find_user(u)]
+        seated = [u for u in users if find_user(u)]
+        if op == "create" and free:
+            create_room(rng.choice(free), "red", True)
+        elif op == "join" and free and rooms.rooms:
+            join_room(rng.choice(free), rng.choice(list(rooms.rooms)))
+        elif op == "move" and seated:
+            user = rng.choice(seated)
+            move_seat(find_user(user)[0], user, rng.randrange(4))
+        elif op == "sid" and seated:
+            user = rng.choice(seated)
+            register_sid(find_user(user)[0], user, f"s{step}")
+            live_sids.append(f"s{step}")
+        elif op == "disconnect" and live_sids:
+            room_id, empty = detach_sid(live_sids.pop(rng.randrange(len(live_sids))))
+            if empty:
+                drop_room(room_id)
+        elif op == "drop" and rooms.rooms:
+            drop_room(rng.choice(list(rooms.rooms)))
+        assert check_indexes() == [], step
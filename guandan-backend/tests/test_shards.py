@@ -0,0 +1,167 @@
+import random
+from collections import Counter
+import pytest
+from tests.helpers import PLAYERS, play_random_hand, shuffled_deck
+from game.engine import GameState, new_room
+from game.shards import GAME_FIELDS, HashRing, LocalShard, ProcessShard, RateMeter, ShardRouter
+
+IDS = [f"room-{i}" for i in range(4000)]
+
+def owners(ring):
+    return {room_id: ring.owner(room_id) for room_id in IDS}
+
+def test_ring_spreads_rooms_evenly():
+    ring = HashRing(["s0", "s1", "s2", "s3"])
+    counts = Counter(owners(ring).values())
+    assert set(counts) == {"s0", "s1", "s2", "s3"}
+    assert max(counts.values()) < 1.25 * len(IDS) / 4
+    assert owners(HashRing(["s3", "s1", "s0", "s2"])) == owners(ring)
+
+def test_adding_and_removing_moves_only_the_affected_rooms():
+    ring = HashRing(["s0", "s1", "s2", "s3"])
+    before = owners(ring)
+    ring.add("s4")
+    after = owners(ring)
+    moved = [r for r in IDS if before[r] != after[r]]
+    assert all(after[r] == "s4" for r in moved)
+    assert 0.1 < len(moved) / len(IDS) < 0.3
+    ring.remove("s1")
+    final = owners(ring)
+    assert all(final[r] == after[r] for r in IDS if after[r] != "s1")
+
+def lobby_room():
+    """A seated room with sids, before its first deal, as the lobby hands it over."""
+    room = new_room(PLAYERS)
+    room['sids'] = {p: f"sid-{p}" for p in PLAYERS}
+    return room
+
+def first_card(state):
+    player = state.current_player()
+    return player, state.hands[player].to_list()[0]
+
+def test_router_emits_match_local_engine():
+    router = ShardRouter([LocalShard("s0"), LocalShard("s1")])
+    room, deck = lobby_room(), shuffled_deck(1)
+    local = GameState("r1", lobby_room())
+    router.adopt("r1", room)
+    assert router.owns("r1")
+    assert router.dispatch("r1", 'start_round', (list(deck),)) == local.emits(local.start_round(list(deck)))
+    for _ in range(6):
+        player, card = first_card(local)
+        expected = local.emits(local.play(player, [card]), player, "reply-sid")
+        assert router.dispatch("r1", 'play', (player, [card]), player, "reply-sid") == expected
+    assert router.dispatch("r1", 'snapshot_event', ("ann",)) == local.emits(local.run('snapshot_event', "ann"))
+
+def test_lobby_fields_sync_both_ways():
+    router = ShardRouter([LocalShard("s0"), LocalShard("s1")])
+    room, deck = lobby_room(), shuffled_deck(2)
+    mirror = GameState("r1", lobby_room())
+    router.adopt("r1", room)
+    router.dispatch("r1", 'start_round', (list(deck),))
+    mirror.start_round(list(deck))
+    fields = router.game_fields("r1")
+    assert fields == {name: mirror.room[name] for name in GAME_FIELDS if name in mirror.room}
+    assert router.game_fields("missing") == {}
+    # bob's socket went away on the front: the shard stops addressing it
+    router.update("r1", {'sids': {p: f"sid-{p}" for p in PLAYERS if p != "bob"}})
+    player, card = first_card(mirror)
+    emits = router.dispatch("r1", 'play', (player, [card]))
+    assert emits and all(to != "sid-bob" for _, _, to in emits)
+
+class Forwarding:
+    """A GameState whose moves are also sent to the router, for random_moves to drive."""
+    def __init__(self, state, router):
+        self.state, self.router = state, router
+    def __getattr__(self, name):
+        return getattr(self.state, name)
+    def run(self, method, *args):
+        self.router.dispatch(self.state.room_id, method, args)
+        return self.state.run(method, *args)
+    def play(self, *args):
+        return self.run('play', *args)
+    def pass_(self, *args):
+        return self.run('pass_', *args)
+    def end_trick(self, *args):
+        return self.run('end_trick', *args)
+
+def test_in_game_follows_the_shards_copy():
+    router = ShardRouter([LocalShard("s0"), LocalShard("s1")])
+    router.adopt("r1", lobby_room())
+    assert router.owns("r1") and not router.in_game("r1")
+    mirror = Forwarding(GameState("r1", lobby_room()), router)
+    mirror.run('start_round', list(shuffled_deck(4)))
+    assert router.in_game("r1")
+    play_random_hand(mirror, random.Random(4))
+    assert mirror.game is None and router.owns("r1") and not router.in_game("r1")
+
+def test_removing_unknown_or_last_shard_is_refused():
+    router = ShardRouter([LocalShard("s0")])
+    router.adopt("r1", lobby_room())
+    with pytest.raises(KeyError):
+        router.remove_shard("s9")
+    with pytest.raises(ValueError):
+        router.remove_shard("s0")
+    assert router.owner("r1") == "s0" and router.stats()['shards']['s0']['rooms'] == 1
+
+def test_migration_keeps_games_going():
+    router = ShardRouter([LocalShard(f"s{i}") for i in range(3)])
+    mirrors = {}
+    for i in range(60):
+        room, deck = lobby_room(), shuffled_deck(i)
+        router.adopt(f"r{i}", room)
+        mirrors[f"r{i}"] = GameState(f"r{i}", lobby_room())
+        router.dispatch(f"r{i}", 'start_round', (list(deck),))
+        mirrors[f"r{i}"].start_round(list(deck))
+
+    def play_everywhere():
+        for room_id, mirror in mirrors.items():
+            player, card = first_card(mirror)
+            expected = mirror.emits(mirror.play(player, [card]))
+            assert router.dispatch(room_id, 'play', (player, [card])) == expected
+
+    play_everywhere()
+    before = {r: router.owner(r) for r in mirrors}
+    moved = router.add_shard(LocalShard("s3"))
+    assert moved and all(router.owner(r) == "s3" for r in moved)
+    assert set(moved) == {r for r in mirrors if router.owner(r) != before[r]}
+    play_everywhere()
+
+    gone = [r for r in mirrors if router.owner(r) == "s0"]
+    assert sorted(router.remove_shard("s0")) == sorted(gone)
+    play_everywhere()
+    stats = router.stats()
+    assert set(stats['shards']) == {"s1", "s2", "s3"}
+    assert sum(s['rooms'] for s in stats['shards'].values()) == 60
+    assert stats['migrated'] == len(moved) + len(gone)
+
+    router.drop("r0")
+    assert not router.owns("r0") and router.stats()['rooms'] == 59
+
+def test_rate_meter_window():
+    now = [100.0]
+    meter = RateMeter(window=10, clock=lambda: now[0])
+    meter.add(30)
+    now[0] += 5
+    meter.add(20)
+    assert meter.rate() == 5.0
+    now[0] += 6
+    assert meter.rate() == 2.0
+
+def test_process_shards_serve_and_migrate():
+    router = ShardRouter([ProcessShard("p0")])
+    try:
+        room, deck = lobby_room(), shuffled_deck(3)
+        mirror = GameState("r1", lobby_room())
+        router.adopt("r1", room)
+        router.dispatch("r1", 'start_round', (list(deck),))
+        mirror.start_round(list(deck))
+        router.add_shard(ProcessShard("p1"))
+        router.remove_shard("p0")
+        player, card = first_card(mirror)
+        assert router.dispatch("r1", 'play', (player, [card])) == mirror.emits(mirror.play(player, [card]))
+        assert router.stats()['shards']['p1']['rooms'] == 1
+        name, moved = router.spawn_shard()
+        assert name == "s0" and sorted(router.stats()['shards']) == ["p1", "s0"]
+        assert moved == (["r1"] if router.owner("r1") == "s0" else [])
+    finally:
+        router.close()
@@ -0,0 +1,34 @@
+import random
+import pytest
+from game.simulator import GreedyPolicy, Policy, RandomPolicy, load_policy, main, simulate, to_json
+
+def test_same_seed_same_results():
+    a = simulate(2, seed=7)
+    b = simulate(2, seed=7)
+    assert to_json(a) | {'elapsed': 0} == to_json(b) | {'elapsed': 0}
+    assert a['matches'] == 2 and a['rounds'] >= 2
+    assert sum(a['win_types'].values()) == a['rounds']
+    assert sum(a['level_ups'].values()) == a['rounds']
+
+def test_worker_pool_merges_stats():
+    stats = simulate(2, workers=2, seed=1, policy_names=('random', 'greedy', 'random', 'greedy'),
+                     settings={"wildCards": False})
+    assert stats['matches'] == 2
+    firsts = sum(c[1] for c in stats['finish_positions'].values())
+    assert firsts == stats['rounds']
+
+def test_policies_load_by_name_or_path():
+    assert load_policy('greedy') is GreedyPolicy
+    assert load_policy('game.simulator:RandomPolicy') is RandomPolicy
+
+def test_policy_must_implement_play():
+    class NoPlay(Policy):
+        pass
+    with pytest.raises(TypeError):
+        NoPlay(random.Random(0))
+
+def test_command_line(tmp_path, capsys):
+    out = tmp_path / "sim.json"
+    assert main(["--matches", "1", "--json", str(out)]) == 0
+    assert "rounds/match" in capsys.readouterr().out
+    assert out.exists()
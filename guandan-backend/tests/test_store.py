@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+import pytest
+from benchmarks.resp import RespClient, RespError, RespServer
+from tests.helpers import PLAYERS, shuffled_deck
+from game import rooms
+from game.engine import GameState, new_room
+from game.store import LockLost, MemoryStore, RedisStore, RoomLocked, open_store
+
+@pytest.fixture
+def server():
+    server = RespServer().start()
+    yield server
+    server.stop()
+
+@pytest.fixture(autouse=True)
+def clean_indexes():
+    saved = dict(rooms.user_index)
+    yield
+    rooms.user_index.clear()
+    rooms.user_index.update(saved)
+
+def worker(server, **kwargs):
+    """A RedisStore with its own connection and local room cache, like one worker process."""
+    return RedisStore(RespClient.from_url(server.url), local={}, **kwargs)
+
+def test_client_commands(server):
+    client = RespClient.from_url(server.url)
+    assert client.ping()
+    assert client.get("k") is None
+    assert client.set("k", b"\x00\r\nbinary") is True
+    assert client.get("k") == b"\x00\r\nbinary"
+    assert client.set("k", "x", nx=True) is None
+    assert client.set("t", "1", px=20) and client.exists("t", "k") == 2
+    time.sleep(0.05)
+    assert client.get("t") is None
+    for i in range(25):
+        client.set(f"room:{i}", i)
+    assert sorted(client.scan_iter(match="room:*", count=7)) == sorted(f"room:{i}".encode() for i in range(25))
+    assert client.delete("k", "missing") == 1
+    with pytest.raises(RespError):
+        client.execute("NOPE")
+    with pytest.raises(RespError):
+        client.eval("return 1", 0)
+
+def test_open_store_picks_backend(server):
+    assert isinstance(open_store(None), MemoryStore)
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError, match="redis-py"):
+            open_store(server.url)
+    else:
+        assert isinstance(open_store(server.url), RedisStore)
+
+def test_session_loads_and_writes_back(server):
+    a, b = worker(server), worker(server)
+    a.save("r1", new_room(PLAYERS))
+    with a.session("r1") as room:
+        assert a.local["r1"] is room
+        room['ready']["ann"] = True
+    with b.session("r1") as room:
+        assert room['ready']["ann"] is True
+        del b.local["r1"]              # drop_room inside a command
+    assert not a.exists("r1") and a.room_ids() == []
+    with a.session("r1") as room:
+        assert room is None and "r1" not in a.local
+
+def test_create_only_stores_a_free_room_id(server):
+    a, b = worker(server), worker(server)
+    first, second = new_room(PLAYERS), new_room(PLAYERS[::-1])
+    assert a.create("r1", first) and a.local["r1"] is first
+    assert not b.create("r1", second) and "r1" not in b.local
+    assert b.load("r1")['players'] == PLAYERS
+
+def test_game_moves_across_workers_match_single_process(server):
+    deck = shuffled_deck(7)
+    local = GameState.new(PLAYERS, room_id="r1")
+    workers = [worker(server), worker(server)]
+    workers[0].save("r1", new_room(PLAYERS))
+    local.start_round(list(deck))
+    with workers[0].session("r1") as room:
+        GameState("r1", room).start_round(list(deck))
+    rng = random.Random(1)
+    for step in range(40):
+        player = local.current_player()
+        card = local.hands[player].to_list()[0]
+        move = (lambda s: s.play(player, [card])) if rng.random() < 0.5 else (lambda s: s.pass_(player))
+        expected = [(e.name, e.to) for e in move(local)]
+        with workers[step % 2].session("r1") as room:
+            got = [(e.name, e.to) for e in move(GameState("r1", room))]
+        assert got == expected
+    final = workers[1].load("r1")
+    assert final['hands'] == local.hands
+    assert final['game']['turn_index'] == local.game['turn_index']
+
+def test_lock_serializes_workers(server):
+    stores = [worker(server) for _ in range(4)]
+    stores[0].save("r1", new_room(PLAYERS))
+    def bump(store):
+        for _ in range(25):
+            with store.session("r1") as room:
+                room['round_number'] = room.get('round_number', 0) + 1
+    threads = [threading.Thread(target=bump, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stores[0].load("r1")['round_number'] == 100
+
+def test_lock_timeout_and_expiry(server):
+    a = worker(server, lock_ttl_ms=100)
+    b = worker(server, lock_wait=0.02)
+    with a.lock("r1"):
+        with pytest.raises(RoomLocked):
+            with b.lock("r1"):
+                pass
+    a.client.set("guandan:lock:r1", "dead-worker", px=50)
+    c = worker(server, lock_wait=1.0)
+    with c.lock("r1"):
+        pass
+    assert a.client.get("guandan:lock:r1") is None
+
+def test_expired_lock_is_not_written_through(server):
+    a, b = worker(server, lock_ttl_ms=50), worker(server)
+    a.save("r1", new_room(PLAYERS))
+    with pytest.raises(LockLost):
+        with a.session("r1") as room:
+            room['round_number'] = 1
+            time.sleep(0.1)                  # a's lock expires and b takes the room
+            with b.session("r1") as other:
+                other['round_number'] = 2
+    assert "r1" not in a.local
+    assert a.load("r1")['round_number'] == 2
+    assert a.client.get("guandan:lock:r1") is None
+
+def test_failed_command_releases_the_lock(server):
+    a = worker(server)
+    a.save("r1", new_room(PLAYERS))
+    with pytest.raises(KeyError):
+        with a.session("r1"):
+            raise KeyError("boom")
+    assert a.client.get("guandan:lock:r1") is None
+    with a.lock("r1"):
+        a.client.set("guandan:lock:r1", "someone-else")
+    assert a.client.get("guandan:lock:r1") == b"someone-else"   # not ours, left alone
+
+def test_memory_store_is_the_rooms_dict():
+    store = MemoryStore({})
+    store.save("r1", new_room(PLAYERS))
+    with store.session("r1") as room:
+        assert room is store.local["r1"]
+    assert store.room_ids() == ["r1"]
+    assert not store.create("r1", new_room(PLAYERS)) and store.create("r2", new_room(PLAYERS))
+    store.delete("r2")
+    store.delete("r1")
+    assert not store.exists("r1")
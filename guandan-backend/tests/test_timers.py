@@ -0,0 +1,83 @@
+import threading
+from game.timers import Scheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    def __call__(self):
+        return self.now
+
+def make():
+    clock = FakeClock()
+    return clock, Scheduler(clock)
+
+def test_fires_in_deadline_order():
+    clock, timers = make()
+    fired = []
+    timers.schedule(('deal', 'r1'), 0.3, fired.append, 'deal')
+    timers.schedule(('expire', 'r1'), 10, fired.append, 'expire')
+    timers.schedule(('turn', 'r2'), 5, fired.append, 'turn')
+    assert timers.fire_due() == 0
+    clock.now += 6
+    assert timers.fire_due() == 2
+    assert fired == ['deal', 'turn']
+    clock.now += 10
+    timers.fire_due()
+    assert fired == ['deal', 'turn', 'expire']
+    assert timers.stats()['pending'] == 0
+
+def test_cancel_and_reschedule():
+    clock, timers = make()
+    fired = []
+    timers.schedule(('expire', 'r1'), 10, fired.append, 1)
+    assert timers.cancel(('expire', 'r1'))
+    assert not timers.cancel(('expire', 'r1'))
+    timers.schedule(('expire', 'r2'), 1, fired.append, 'old')
+    timers.schedule(('expire', 'r2'), 5, fired.append, 'new')
+    clock.now += 2
+    timers.fire_due()
+    assert fired == []
+    assert timers.next_due() == 105.0
+    clock.now += 4
+    timers.fire_due()
+    assert fired == ['new']
+    counts = timers.stats()
+    assert (counts['cancelled'], counts['rescheduled'], counts['fired']) == (1, 1, 1)
+
+def test_reschedule_storm_keeps_heap_small():
+    clock, timers = make()
+    for i in range(10000):
+        timers.schedule(('expire', f"r{i % 10}"), 10 + i * 0.001, lambda: None)
+    assert timers.stats()['pending_by_kind'] == {'expire': 10}
+    assert len(timers._heap) <= 2 * 10 + 65
+
+def test_stats_report_lateness_and_errors():
+    clock, timers = make()
+    timers.schedule(('deal', 'r1'), 1, lambda: 1 / 0)
+    timers.schedule(('deal', 'r2'), 2, lambda: None)
+    clock.now += 2.5
+    assert timers.fire_due() == 2
+    stats = timers.stats()
+    assert stats['errors'] == 1 and stats['fired'] == 2
+    assert stats['lateness']['samples'] == 2
+    assert stats['lateness']['max_ms'] == 1500.0 and stats['lateness']['mean_ms'] == 1000.0
+
+def test_run_loop_fires_on_a_single_thread():
+    timers = Scheduler()
+    done = threading.Event()
+    threads = set()
+    def record():
+        threads.add(threading.get_ident())
+        if timers.stats()['fired'] == 50:
+            done.set()
+    for i in range(50):
+        timers.schedule(('expire', f"r{i}"), 0.01 + i * 0.001, record)
+    worker = threading.Thread(target=timers.run, daemon=True)
+    worker.start()
+    try:
+        assert done.wait(5)
+    finally:
+        timers.stop()
+        worker.join(1)
+    assert threads == {worker.ident}
+    assert timers.stats()['lateness']['max_ms'] < 1000
@@ -0,0 +1,75 @@
+import json
+import random
+from collections import Counter
+from tests.helpers import PLAYERS, random_moves, started
+from game.engine import private_events
+from game.updates import apply_delta, delta_events, diff_update, hand_delta, apply_hand_delta
+
+def same_update(a, b):
+    hands_a, hands_b = a.get('hands', {}), b.get('hands', {})
+    assert {p: Counter(h) for p, h in hands_a.items()} == {p: Counter(h) for p, h in hands_b.items()}
+    assert {k: v for k, v in a.items() if k != 'hands'} == {k: v for k, v in b.items() if k != 'hands'}
+
+def replay(settings, seed):
+    """Play one hand; every client rebuilds each full game_update from snapshot + deltas."""
+    state, events = started(settings, seed)
+    clients = {}
+    sizes = [0, 0]
+    for batch in [events] + list(random_moves(state, random.Random(seed))):
+        plain = private_events(state.room, batch)
+        sent = delta_events(state.room, plain)
+        full = [e for e in plain if e.name == 'game_update']
+        coded = [e for e in sent if e.name in ('game_delta', 'game_snapshot')]
+        assert len(full) == len(coded)
+        for want, got in zip(full, coded):
+            if got.name == 'game_snapshot':
+                clients[got.to] = (got.data['seq'], got.data['state'])
+            else:
+                seq, current = clients[got.to]
+                assert got.data['seq'] == seq + 1
+                clients[got.to] = (got.data['seq'], apply_delta(current, got.data))
+            same_update(clients[got.to][1], want.data)
+            sizes[0] += len(json.dumps(want.data))
+            sizes[1] += len(json.dumps(got.data))
+    return state, sizes
+
+def test_hand_delta_round_trip():
+    old = ["3H", "3H", "5S", "JoR"]
+    new = ["3H", "5S", "KD"]
+    delta = hand_delta(old, new)
+    assert delta == {'removed': ["3H", "JoR"], 'added': ["KD"]}
+    assert Counter(apply_hand_delta(old, delta)) == Counter(new)
+
+def test_diff_only_carries_changes():
+    old = {'current_player': "ann", 'levels': {"ann": "2"}, 'hands': {"ann": ["3H", "4H"], "bob": ["5S"]}}
+    new = {'current_player': "bob", 'levels': {"ann": "2"}, 'hands': {"ann": ["4H"], "bob": ["5S"]}}
+    delta = diff_update(old, new)
+    assert delta == {'set': {'current_player': "bob"}, 'hands': {"ann": {'removed': ["3H"]}}}
+    assert apply_delta(old, delta) == new
+
+def test_disabled_by_default():
+    state, events = started({})
+    split = private_events(state.room, events)
+    assert [(e.name, e.data, e.to) for e in state.deliver(events)] == [(e.name, e.data, e.to) for e in split]
+
+def test_replayed_deltas_match_full_updates():
+    state, sizes = replay({"deltaUpdates": True, "wildCards": False}, seed=1)
+    assert sizes[1] * 3 < sizes[0]
+
+def test_private_streams_are_per_player():
+    state, sizes = replay({"deltaUpdates": True, "privateHands": True, "wildCards": False}, seed=2)
+    assert set(state.room['update_streams']) == set(PLAYERS)
+    assert sizes[1] < sizes[0]
+
+def test_snapshot_after_missed_deltas():
+    state, _ = started({"deltaUpdates": True, "wildCards": False}, seed=3)
+    assert state.snapshot_event("ann") is None
+    batches = random_moves(state, random.Random(3))
+    last = None
+    for _ in range(5):
+        for e in state.deliver(next(batches)):
+            if e.name in ('game_delta', 'game_snapshot'):
+                last = e
+    snapshot = state.snapshot_event("ann")
+    assert snapshot.to == "ann" and snapshot.data['seq'] == last.data['seq']
+    assert snapshot.data['state']['current_player'] == state.current_player()
@@ -0,0 +1,58 @@
+import json
+import pytest
+pytest.importorskip("msgpack")
+from tests.helpers import PLAYERS, started
+from game.engine import Event
+from game.wire import BINARY, CARDS_EXT, JSON, pack, unpack, wire_payloads
+
+@pytest.mark.parametrize("value", [
+    0, 127, 128, -1, -32, -33, -200, 70000, -70000, 2**40, -2**40, 1.5,
+    "", "x" * 40, "y" * 300, b"ab", [1] * 20, {str(i): i for i in range(20)},
+    None, True, False, [], {"nested": [{"a": [None, "b"]}]},
+])
+def test_round_trip(value):
+    assert unpack(pack(value)) == value
+
+def test_card_lists_are_one_byte_per_card():
+    cards = ["3H", "10S", "JoR", "3H", "2C"]
+    packed = pack({"cards": cards})
+    # fixmap(1), fixstr "cards", ext8 header (0xc7, len, type), then the face ids
+    assert packed[7:10] == bytes((0xc7, len(cards), CARDS_EXT))
+    assert len(packed) == 10 + len(cards)
+    assert unpack(packed) == {"cards": cards}
+
+def test_hands_and_deltas_use_card_ext():
+    payload = {"hands": {"ann": ["3H", "4H"], "bob": []},
+               "delta": {"hands": {"cat": {"removed": ["5S"], "added": ["JoB"]}}}}
+    assert unpack(pack(payload)) == payload
+
+def test_non_card_strings_stay_strings():
+    assert unpack(pack({"cards": ["ann", "bob"]})) == {"cards": ["ann", "bob"]}
+
+def test_engine_payloads_match_json():
+    state, events = started()
+    for event in events:
+        packed = pack(event.data)
+        assert unpack(packed) == json.loads(json.dumps(event.data))
+        if event.name == 'all_hands':
+            assert len(packed) * 4 < len(json.dumps(event.data))
+
+def test_truncated_data_is_rejected():
+    with pytest.raises(ValueError):
+        unpack(pack({"cards": ["3H", "4H"]})[:-1])
+
+def test_json_rooms_are_unchanged():
+    room = {'players': PLAYERS, 'encodings': {p: JSON for p in PLAYERS}}
+    event = Event('game_update', {'hands': {}})
+    assert wire_payloads(room, event) == [(None, event.data)]
+
+def test_mixed_room_splits_broadcasts():
+    room = {'players': PLAYERS, 'encodings': {"ann": BINARY, "bob": JSON}}
+    data = {'hands': {"ann": ["3H"]}, 'current_player': "ann"}
+    out = dict(wire_payloads(room, Event('game_update', data)))
+    assert set(out) == set(PLAYERS)
+    assert unpack(out["ann"]) == data
+    assert out["bob"] is data and out["cat"] is data
+    # Lobby and error events are never packed
+    assert wire_payloads(room, Event('error_msg', "no", "ann")) == [("ann", "no")]
+    assert wire_payloads(room, Event('deal_hand', {'hand': ["3H"]}, "ann"))[0][1] == pack({'hand': ["3H"]})
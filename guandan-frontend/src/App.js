@@ -3,6 +3,7 @@
 import React, { useState, useEffect, useRef } from "react";
 import { io } from "socket.io-client";
 import CreateJoinRoom from "./CreateJoinRoom";
+import { WIRE_ENCODING, decodeFrame } from "./wire";
 import {
   DndContext,
   closestCenter,
@@ -107,6 +108,26 @@ function teamName(teams, player) {
 function seatTeam(idx) {
   return idx % 2 === 0 ? "A" : "B";
 }
+// Rebuild a full game_update payload from the previous one and a game_delta
+function applyGameDelta(state, delta) {
+  const next = { ...state };
+  (delta.unset || []).forEach(key => { delete next[key]; });
+  Object.assign(next, delta.set || {});
+  if (delta.hands || delta.hands_unset) {
+    const hands = { ...(next.hands || {}) };
+    (delta.hands_unset || []).forEach(player => { delete hands[player]; });
+    Object.entries(delta.hands || {}).forEach(([player, change]) => {
+      const hand = [...(hands[player] || [])];
+      (change.removed || []).forEach(card => {
+        const i = hand.indexOf(card);
+        if (i !== -1) hand.splice(i, 1);
+      });
+      hands[player] = hand.concat(change.added || []);
+    });
+    next.hands = hands;
+  }
+  return next;
+}
 
 function SortableCard({ card, idx, ...props }) {
   const {attributes, listeners, setNodeRef, transform, transition, isDragging} = useSortable({id: card + idx});
@@ -155,6 +176,7 @@ export default function App() {
   const [trumpSuit, setTrumpSuit] = useState("hearts");
   const [startingLevels, setStartingLevels] = useState(["2","2","2","2"]);
   const [hands, setHands] = useState({});
+  const [handCounts, setHandCounts] = useState({}); // card counts when the server only sends your own hand
   const [handOrder, setHandOrder] = useState([]);
   const [errorMsg, setErrorMsg] = useState("");
   const [tributeState, setTributeState] = useState(null);
@@ -188,6 +210,14 @@ export default function App() {
     s.on("connect", () => setConnected(true));
     s.on("disconnect", () => setConnected(false));
 
+    // Hand, play and update events may come as binary frames (see ./wire)
+    const onFrame = (name, handler) => s.on(name, data => handler(decodeFrame(data)));
+
+    // ---- Coalesced frames (rooms created with batchEvents): replay each event in order
+    onFrame("batch", ({ events }) => {
+      events.forEach(([name, data]) => s.listeners(name).forEach(handler => handler(data)));
+    });
+
     // ---- Lobby/Game Join
     s.on("room_joined", data => {
       console.log("[ROOM_JOINED]", data);
@@ -212,7 +242,8 @@ export default function App() {
       setHands({});
       s.emit("register_sid", {
         roomId: data.roomId,
-        username: data.username
+        username: data.username,
+        encoding: WIRE_ENCODING
       });
     });
 
@@ -236,7 +267,7 @@ export default function App() {
 
 
     // ---- Game Start
-    s.on("game_started", data => {
+    onFrame("game_started", data => {
       setFinishOrder([]);
       setCurrentPlayer(data.current_player);
       setCurrentPlay(null);
@@ -254,6 +285,7 @@ export default function App() {
       setStartingLevels((data.startingLevels) || ["2","2","2","2"]);
       setLevelRank((data.levelRank) || "2");
       setHands(data.hands || {});
+      setHandCounts(data.hand_counts || {});
       if (data.hands && lobbyInfoRef.current?.username) {
         const startHand = data.hands[lobbyInfoRef.current.username] || [];
         // Sort by your desired sort order (rank, suit, whatever)
@@ -263,7 +295,7 @@ export default function App() {
     });
 
     // ---- Handle the all_hands broadcast: update *your* hand only
-    s.on("all_hands", data => {
+    onFrame("all_hands", data => {
       console.log("[SOCKET] all_hands event received", data);
       if (lobbyInfoRef.current) {
         const username = lobbyInfoRef.current.username;
@@ -285,7 +317,7 @@ export default function App() {
     });
 
     // ---- In-game updates (after every move)
-    s.on("game_update", data => {
+    const applyGameUpdate = data => {
       console.log("[SOCKET] Game update:");
       console.log("  current_player:", data.current_player);
       console.log("  can_end_round:", data.can_end_round);
@@ -305,6 +337,7 @@ export default function App() {
       setStartingLevels((data.startingLevels) || ["2","2","2","2"]);
       setLevelRank((data.levelRank) || "2");
       setHands(data.hands || {});
+      setHandCounts(data.hand_counts || {});
       if (Array.isArray(data.finish_order) && data.finish_order.length > 0) {
         setFinishOrder(data.finish_order);
       }
@@ -316,6 +349,24 @@ export default function App() {
           setPlayerHand(data.hands[username]);
         }
       }
+    };
+    onFrame("game_update", applyGameUpdate);
+
+    // ---- Delta-encoded updates (rooms created with deltaUpdates)
+    let updateStream = null; // { seq, state } of the last applied update
+    onFrame("game_snapshot", ({ seq, state }) => {
+      updateStream = { seq, state };
+      applyGameUpdate(state);
+    });
+    onFrame("game_delta", delta => {
+      if (!updateStream || delta.seq !== updateStream.seq + 1) {
+        // Missed an update: ask for the full state instead
+        const info = lobbyInfoRef.current;
+        if (info) s.emit("request_snapshot", { roomId: info.roomId, username: info.username });
+        return;
+      }
+      updateStream = { seq: delta.seq, state: applyGameDelta(updateStream.state, delta) };
+      applyGameUpdate(updateStream.state);
     });
 
     s.on("hand_over", (data) => {
@@ -365,7 +416,7 @@ export default function App() {
     });
 
     s.on("tribute_update", (data) => setTributeState(data.tribute_state));
-    s.on("tribute_complete", (data) => {
+    onFrame("tribute_complete", (data) => {
       console.log("[SOCKET] tribute_complete received", data);
       setTributeState(null);  // clear modal
       if (data.hands && lobbyInfoRef.current?.username) {
@@ -972,7 +1023,7 @@ export default function App() {
 
             const hand = hands && hands[player] ? hands[player] : [];
             const maxCardWidth = 36;
-            const cardCount = hand.length;
+            const cardCount = handCounts[player] ?? hand.length;
 
             // Container is always 100%, but inner stack is absolute-positioned
             const boxWidth = 120; // px - can adjust this to fit your design, try 100-160px
@@ -0,0 +1,27 @@
+// guandan-frontend/src/wire.js
+
+import { decode, ExtensionCodec } from "@msgpack/msgpack";
+
+// Opt in to binary frames with REACT_APP_WIRE_ENCODING=binary; JSON otherwise.
+export const WIRE_ENCODING = process.env.REACT_APP_WIRE_ENCODING === "binary" ? "binary" : "json";
+
+// Face ids from guandan-backend/game/cards.py: one byte per card in a CARDS_EXT.
+const SUITS = ["S", "H", "D", "C"];
+const RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"];
+const CARD_NAMES = SUITS.flatMap(suit => RANKS.map(rank => rank + suit)).concat(["JoR", "JoB"]);
+const CARDS_EXT = 1;
+
+const extensionCodec = new ExtensionCodec();
+extensionCodec.register({
+  type: CARDS_EXT,
+  encode: () => null,
+  decode: data => Array.from(data, id => CARD_NAMES[id]),
+});
+
+// Binary frames (game/wire.py) arrive as an ArrayBuffer; JSON payloads pass through.
+export function decodeFrame(data) {
+  if (data instanceof ArrayBuffer || ArrayBuffer.isView(data)) {
+    return decode(data, { extensionCodec });
+  }
+  return data;
+}